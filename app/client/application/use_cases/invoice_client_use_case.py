@@ -1,4 +1,4 @@
-from typing import Dict, Any 
+from typing import Dict, Any, Optional
 import uuid
 import json
 import logging 
@@ -15,7 +15,13 @@ from ...application.dtos.client_event_dto import ClientEventDTO
 from ...application.dtos.client_mongo_dto import ClientMongoDTO 
 from ...application.dtos.factura_client_dto import FacturaClientDTO
 
+from company.domain.entities.company import Company
 from company.domain.repositories.company_repository import CompanyRepository
+from company.domain.services.company_credentials import CompanyCredentialResolver, FacturaCredentials
+from invoice.application.use_cases.issue_invoice_use_case import IssueInvoiceUseCase
+from shared.domain.repositories.lease_repository import LeaseRepository
+from shared.domain.services.single_flight import SingleFlight
+from shared.exceptions import ServiceUnavailableException
 from shared.responses import ErrorResponse
 
 logger = logging.getLogger(__name__)
@@ -26,11 +32,24 @@ class InvoiceClientUseCase:
         self, 
         client_repository: ClientRepository, 
         external_client_repository: ExternalClientRepository, 
-        company_repository: CompanyRepository
+        company_repository: CompanyRepository,
+        credential_resolver: CompanyCredentialResolver,
+        issue_invoice_use_case: IssueInvoiceUseCase,
+        lease_repository: Optional[LeaseRepository] = None,
+        lease_ttl_seconds: float = 60.0,
+        lease_wait_seconds: float = 30.0,
+        lease_poll_seconds: float = 0.5
     ):
         self.client_repository = client_repository
         self.external_client_repository = external_client_repository 
         self.company_repository = company_repository
+        self.credential_resolver = credential_resolver
+        self.issue_invoice_use_case = issue_invoice_use_case
+        self.lease_repository = lease_repository
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.lease_wait_seconds = lease_wait_seconds
+        self.lease_poll_seconds = lease_poll_seconds
+        self._client_creations = SingleFlight()
         
     async def execute(self, invoice_data: Dict[str, Any]) -> Dict[str, Any]: 
         
@@ -43,69 +62,168 @@ class InvoiceClientUseCase:
                     "error": "company_id es requerido para facturar"
                 }
 
-            company = await self.company_repository.get_by_id(company_id)
+            request_id = invoice_data.get("request_id")
+            if not request_id:
+                # Sin llave de idempotencia un reintento podría timbrar dos veces
+                return {
+                    "success": False,
+                    "error": "request_id (o message_id del mensaje) es requerido para facturar"
+                }
+
+            event_dto = ClientEventDTO(**invoice_data)
+            rfc = invoice_data.get("rfc")
+            business_name = invoice_data.get("business_name")
+
+            # Empresa y validación de catálogos son independientes
+            company, validation_result = await asyncio.gather(
+                self.company_repository.get_by_id(company_id),
+                self._validate_input_data(event_dto)
+            )
+
             if not company: 
                 return {
                     "success": False, 
                     "error": f"Empresa no encontrada: {company_id}"
                 }   
+
+            credentials = await self.credential_resolver.for_company(company)
+            if credentials is None:
+                return {
+                    "success": False,
+                    "error": f"La empresa {company_id} no tiene credenciales de Factura.com"
+                }
                 
             logger.info(f"Facturando para la empresa: {company.business_name}")
 
-            event_dto = ClientEventDTO(**invoice_data)
-
-            validation_result = await self._validate_input_data(event_dto)
             if not validation_result["valid"]:
                 return {
                     "success": False,
                     "error": f"Datos inválidos: {validation_result['error']}"
                 }
             
-            rfc = invoice_data.get("rfc")
-            business_name = invoice_data.get("business_name")
-            
             logger.info(f"Procesando facturación para RFC: {rfc}, Empresa: {business_name}")
             logger.info(f"Datos completos recibidos: {json.dumps(invoice_data, indent=2)}")
-
-            existing_client = await self.client_repository.find_by_rfc(rfc)
             
+            # El receptor debe existir en la cuenta de la empresa: el de otra empresa o de la cuenta del servicio no sirve
+            existing_client = await self.client_repository.find_by_company(rfc, company_id, credentials.account)
             if existing_client: 
                 factura_client_uid = existing_client.external_uid 
                 internal_client_id = existing_client.id
                 logger.info(f"Usando cliente existente: {internal_client_id}")
             else:
                 logger.info(f"Creando nuevo cliente con RFC: {rfc}")
-                client_creation_result = await self._create_client(event_dto)
+                client_creation_result = await self._get_or_create_client(company_id, rfc, event_dto, validation_result, credentials)
                 factura_client_uid = client_creation_result["factura_uid"]
                 internal_client_id = client_creation_result["internal_client_id"]
                 logger.info(f"Nuevo cliente creado: {internal_client_id}")
             
             invoice_result = await self._create_invoice(
+                company,
                 factura_client_uid, 
-                invoice_data.get("invoice_details", {})
+                invoice_data.get("invoice_details", {}),
+                request_id
             )
 
             logger.info(f"Resultado de facturación: {invoice_result}")
 
+            if not invoice_result["success"]:
+                return {
+                    "success": False,
+                    "error": invoice_result.get("error"),
+                    "invoice_id": invoice_result.get("invoice_id"),
+                    "internal_client_id": internal_client_id,
+                    "factura_client_id": factura_client_uid,
+                    "internal_company_id": company_id
+                }
+
             return {
                 "success": True, 
                 "invoice_id": invoice_result.get("invoice_id"), 
+                "uuid": invoice_result.get("uuid"),
+                "series": invoice_result.get("series"),
+                "folio": invoice_result.get("folio"),
                 "internal_client_id": internal_client_id, 
                 "factura_client_id": factura_client_uid, 
                 "internal_company_id": company_id,
                 "message": "Invoice processed successfully"
             }
 
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error processing invoice: {str(e)}", exc_info=True)
             return {"success": False, "error": str(e)}
 
-    async def _create_invoice(self, client_uid: str, invoice_details: Dict[str, Any]) -> Dict[str, Any]: 
-        logger.info(f"Creando factura para cliente UID: {client_uid}")
-        logger.info(f"Detalles de factura: {json.dumps(invoice_details, indent=2)}")
-        return {"invoice_id": "inv_12345"}
+    async def _create_invoice(
+        self,
+        company: Company,
+        client_uid: str,
+        invoice_details: Dict[str, Any],
+        request_id: str
+    ) -> Dict[str, Any]: 
+        logger.info(f"Creando factura {request_id} para cliente UID: {client_uid}")
+        return await self.issue_invoice_use_case.execute(company, client_uid, invoice_details, request_id)
+
+    async def _get_or_create_client(
+        self,
+        company_id: str,
+        rfc: str,
+        event_dto: ClientEventDTO,
+        validation_result: Dict[str, Any],
+        credentials: FacturaCredentials
+    ) -> Dict[str, Any]:
+        """Una sola creación por (empresa, RFC): dentro del proceso con single-flight y entre procesos con un lease."""
+        key = f"{company_id}:{str(rfc or '').strip().upper()}"
+        return await self._client_creations.run(
+            key,
+            lambda: self._create_client_with_lease(key, company_id, rfc, event_dto, validation_result, credentials)
+        )
+
+    async def _create_client_with_lease(
+        self,
+        key: str,
+        company_id: str,
+        rfc: str,
+        event_dto: ClientEventDTO,
+        validation_result: Dict[str, Any],
+        credentials: FacturaCredentials
+    ) -> Dict[str, Any]:
+        if self.lease_repository is None:
+            return await self._create_client(event_dto, validation_result, credentials)
+
+        lease_key = f"client_creation:{key}"
+        owner = uuid.uuid4().hex
+        deadline = asyncio.get_running_loop().time() + self.lease_wait_seconds
 
-    async def _create_client(self, client_data: ClientEventDTO) -> Dict[str, Any]: 
+        while True:
+            if await self.lease_repository.acquire(lease_key, owner, self.lease_ttl_seconds):
+                try:
+                    # Otro proceso pudo crearlo mientras se esperaba el lease
+                    existing_client = await self.client_repository.find_by_company(rfc, company_id, credentials.account)
+                    if existing_client:
+                        return {"factura_uid": existing_client.external_uid, "internal_client_id": existing_client.id}
+                    return await self._create_client(event_dto, validation_result, credentials)
+                finally:
+                    await self.lease_repository.release(lease_key, owner)
+
+            if asyncio.get_running_loop().time() >= deadline:
+                raise ServiceUnavailableException(
+                    f"Creación del cliente {rfc} en curso en otro proceso",
+                    retry_after=self.lease_poll_seconds
+                )
+
+            logger.info(f"Cliente {rfc} en creación por otro proceso, esperando")
+            await asyncio.sleep(self.lease_poll_seconds)
+            existing_client = await self.client_repository.find_by_company(rfc, company_id, credentials.account)
+            if existing_client:
+                return {"factura_uid": existing_client.external_uid, "internal_client_id": existing_client.id}
+
+    async def _create_client(
+        self,
+        client_data: ClientEventDTO,
+        validation_result: Dict[str, Any],
+        credentials: FacturaCredentials
+    ) -> Dict[str, Any]: 
         
         try:
             #factura_payload = self._map_to_factura_format(client_data)
@@ -113,22 +231,36 @@ class InvoiceClientUseCase:
             factura_payload = factura_dto.model_dump(exclude_none=True)
 
             logger.info(f"Datos para Factura.com: {json.dumps(factura_payload, indent=2)}")
+
+            # Un intento previo pudo crear el receptor y cortarse (timeout del handler) antes de guardarlo
+            existing = await self.external_client_repository.find_client(client_data.rfc, client_data.business_name, credentials)
+            if existing and existing.get("UID"):
+                factura_uid = existing["UID"]
+                logger.info(f"Cliente {client_data.rfc} ya existe en Factura.com, se concilia: {factura_uid}")
+            else:
+                factura_response = await self.external_client_repository.create_client(factura_payload, credentials)
+                logger.info(f"Respuesta de Factura.com: {json.dumps(factura_response, indent=2)}")
+
+                if factura_response.get("status") != "success":
+                    raise Exception(f"Factura.com error: {factura_response.get('message')}")
+
+                factura_uid = factura_response.get('Data', {}).get('UID')
+                if not factura_uid:
+                    raise Exception("No se obtuvo UID de Factura.com")
+
+                await asyncio.sleep(2)
+
+            # Si falla, el reintento encuentra el receptor con find_client en lugar de duplicarlo
+            client_details = await self.external_client_repository.get_client_by_id(factura_uid, credentials)
             
-            factura_response = await self.external_client_repository.create_client(factura_payload)
-            logger.info(f"Respuesta de Factura.com: {json.dumps(factura_response, indent=2)}")
-            
-            if factura_response.get("status") != "success":
-                raise Exception(f"Factura.com error: {factura_response.get('message')}")
-                
-            factura_uid = factura_response.get('Data', {}).get('UID')
-            if not factura_uid:
-                raise Exception("No se obtuvo UID de Factura.com")
-            
-            await asyncio.sleep(2)
-            
-            client_details = await self.external_client_repository.get_client_by_id(factura_uid)
-            
-            client_id = await self._create_client_in_database(client_data, factura_uid, client_details)
+            client_id = await self._create_client_in_database(
+                client_data,
+                factura_uid,
+                client_details,
+                validation_result.get("tax_regime_name", ""),
+                validation_result.get("cfdi_use_name", ""),
+                credentials.account
+            )
             
             return {
                 "factura_uid": factura_uid, 
@@ -139,11 +271,16 @@ class InvoiceClientUseCase:
             logger.error(f"Error creando cliente: {str(e)}")
             raise
 
-    async def _create_client_in_database(self, event_data: ClientEventDTO, factura_uid: str, factura_response: Dict[str, Any]) -> str:
+    async def _create_client_in_database(
+        self,
+        event_data: ClientEventDTO,
+        factura_uid: str,
+        factura_response: Dict[str, Any],
+        tax_regime_name: str,
+        cfdi_use_name: str,
+        factura_account: str
+    ) -> str:
         try:
-            tax_regime_name = await self._get_tax_regime_name(event_data.tax_regime)
-            cfdi_use_name = await self._get_cfdi_use_name(event_data.cfdi_use)
-
             mongo_dto = ClientMongoDTO.from_event_dto(
                 event_dto=event_data,
                 factura_uid=factura_uid, 
@@ -153,6 +290,7 @@ class InvoiceClientUseCase:
             )
 
             client_dict = mongo_dto.model_dump(by_alias=False, exclude_none=True)
+            client_dict["factura_account"] = factura_account
             
             client_model = Client(**client_dict)
             created_client = await self.client_repository.create(client_model)
@@ -171,61 +309,37 @@ class InvoiceClientUseCase:
             logger.error(f"Error creando cliente en BD: {str(e)}")
             raise
 
-    async def _validate_input_data(self, invoice_data: Dict[str, Any]) -> Dict[str, Any]:  
-        errors = []
-        
+    async def _validate_input_data(self, invoice_data: ClientEventDTO) -> Dict[str, Any]:  
+        """Valida régimen, uso CFDI y país en paralelo; los nombres obtenidos se reutilizan al guardar el cliente."""
         tax_regime = invoice_data.tax_regime
-        if tax_regime:
-            regime_validation = await self.external_client_repository.validate_tax_regime(tax_regime)
-            if not regime_validation["valid"]:
-                errors.append(regime_validation["error"])
-            
         cfdi_use = invoice_data.cfdi_use
-        if cfdi_use: 
-            cfdi_validation = await self.external_client_repository.validate_cfdi_use(cfdi_use, tax_regime)
-            
-            if not cfdi_validation["valid"]:
-                errors.append(cfdi_validation["error"])
-
         country = invoice_data.get_address_field("country") or "MEX"
-        if country: 
-            country_validation = await self.external_client_repository.validate_country(country)
-            if not country_validation:
-                errors.append(f"País no válido: {country}")
+
+        regime_validation, cfdi_validation, country_validation = await asyncio.gather(
+            self._validate_optional(self.external_client_repository.validate_tax_regime, tax_regime),
+            self._validate_optional(self.external_client_repository.validate_cfdi_use, cfdi_use, tax_regime),
+            self.external_client_repository.validate_country(country)
+        )
+
+        errors = []
+        if regime_validation and not regime_validation["valid"]:
+            errors.append(regime_validation["error"])
+        if cfdi_validation and not cfdi_validation["valid"]:
+            errors.append(cfdi_validation["error"])
+        if not country_validation:
+            errors.append(f"País no válido: {country}")
 
         if errors:
             return {"valid": False, "error": "; ".join(errors)}
 
-        return {"valid": True}
+        return {
+            "valid": True,
+            "tax_regime_name": (regime_validation or {}).get("name") or "",
+            "cfdi_use_name": (cfdi_validation or {}).get("name") or ""
+        }
 
-    async def _get_tax_regime_name(self, regime_code: str) -> str: 
-        if not regime_code:
-            return ""
-        
-        try: 
-            
-            validation_result = await self.external_client_repository.validate_tax_regime(regime_code)
-            if validation_result["valid"]:
-                return validation_result["name"]
-            else:
-                logger.warning(f"Régimen {regime_code} no encontrado en catálogo: {validation_result.get('error')}")
-            
-        except Exception as e: 
-            logger.error(f"Error obteniendo el nombre de régimen: {str(e)}")
-            return ""
-
-    async def _get_cfdi_use_name(self, cfdi_use: str) -> str: 
-        if not cfdi_use: 
-            return ""
-        
-        try: 
-            validation_result = await self.external_client_repository.validate_cfdi_use(cfdi_use)
-            
-            if validation_result["valid"]:
-                return validation_result["name"]
-            else: 
-                logger.error(f"Uso CFDI {cfdi_use} no encontrado en catálogo: {validation_result}")
-                return ""
-        except Exception as e: 
-                logger.warning(f"Error obteniendo nombre de uso CFDI: {str(e)}")
-                return ""
\ No newline at end of file
+    @staticmethod
+    async def _validate_optional(validator, value: Optional[str], *args) -> Optional[Dict[str, Any]]:
+        if not value:
+            return None
+        return await validator(value, *args)
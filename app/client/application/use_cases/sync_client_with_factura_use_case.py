@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import uuid
 import logging
@@ -11,6 +11,8 @@ from ...domain.entities.client_contact import ClientContact
 from ...domain.repositories.client_repository import ClientRepository
 from ...domain.repositories.external_client_repository import ExternalClientRepository
 from company.domain.repositories.company_repository import CompanyRepository
+from company.domain.services.company_credentials import CompanyCredentialResolver
+from shared.exceptions import ServiceUnavailableException
 
 logger = logging.getLogger(__name__)
 
@@ -20,65 +22,179 @@ class SyncClientWithFacturaUseCase:
         self, 
         client_repository: ClientRepository, 
         external_client_repository: ExternalClientRepository, 
-        company_repository: CompanyRepository
+        company_repository: CompanyRepository,
+        credential_resolver: CompanyCredentialResolver
     ):
         self.client_repository = client_repository
         self.external_client_repository = external_client_repository
         self.company_repository = company_repository
+        self.credential_resolver = credential_resolver
 
     async def execute(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            client_model, result = await self._prepare(event_data)
+            if client_model is None:
+                return result
 
-            company_id = event_data.get("company_id")
-            if not company_id: 
-                return {
-                    "success": False, 
-                    "error": "company_id es requerido para facturar"
-                }
-
-            company = await self.company_repository.get_by_id(company_id)
-            if not company: 
-                return {
-                    "success": False, 
-                    "error": f"Empresa no encontrada: {company_id}"
-                }   
+            created_client = await self._create_client_in_database(client_model)
+            return self._created_result(result, created_client)
             
-            logger.info(f"Datos recibidos del evento cliente: {json.dumps(event_data, indent=2)}")
-
-            client_data = self._map_to_factura_format(event_data)
+        except ServiceUnavailableException:
+            raise
+        except Exception as e: 
+            logger.error(f"Error inesperado en use case: {str(e)}")
+            return {"success": False, "error": str(e)}
 
-            response = await self.external_client_repository.create_client(client_data)
+    async def execute_batch(self, events: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], ServiceUnavailableException]]:
+        """Sincroniza varios clientes: llamadas a Factura.com concurrentes y una sola escritura en lote.
 
-            if response.get("status") == 'success': 
-                factura_client_uid = response.get('Data', {}).get('UID')
+        Los eventos repetidos de un mismo (empresa, RFC) dentro del lote comparten el resultado del primero.
+        """
+        first_of_key: Dict[Any, int] = {}
+        for index, event_data in enumerate(events):
+            first_of_key.setdefault(self._client_key(event_data, index), index)
+        unique = sorted(first_of_key.values())
 
-                logger.info(f"Cliente creado con UID: {factura_client_uid}")
+        prepared: List[Any] = [None] * len(events)
+        outcomes = await asyncio.gather(*(self._prepare(events[index]) for index in unique), return_exceptions=True)
+        for index, outcome in zip(unique, outcomes):
+            prepared[index] = outcome
 
-                await asyncio.sleep(2)
-                
-                client_details = await self.external_client_repository.get_client_by_id(factura_client_uid)
+        results: List[Any] = [None] * len(events)
+        pending_positions = []
+        pending_clients = []
 
-                client_id = await self._create_client_in_database(event_data, factura_client_uid, client_details)
+        for index in unique:
+            item = prepared[index]
+            if isinstance(item, ServiceUnavailableException):
+                # Se propaga al emisor para que el consumer lo difiera
+                results[index] = item
+                continue
+            if isinstance(item, Exception):
+                logger.error(f"Error inesperado en use case: {str(item)}")
+                results[index] = {"success": False, "error": str(item)}
+                continue
 
-                return {
-                    "success": True, 
-                    "client_id" : client_id, 
-                    "factura_client_id" : factura_client_uid, 
-                    "data": response, 
-                    "message" : "Client successfully created in Factura.com and local database"
-                }
-            
+            client_model, result = item
+            if client_model is None:
+                results[index] = result
             else:
+                pending_positions.append(index)
+                pending_clients.append(client_model)
+
+        if pending_clients:
+            try:
+                created_clients = await self.client_repository.bulk_create(pending_clients)
+            except Exception as e:
+                logger.error(f"Error en escritura en lote de clientes: {str(e)}")
+                created_clients = [e] * len(pending_clients)
+
+            for index, created_client in zip(pending_positions, created_clients):
+                if isinstance(created_client, Exception):
+                    results[index] = {
+                        "success": False,
+                        "error": f"Cliente creado en Factura.com ({prepared[index][1]['factura_client_id']}) pero no guardado: {str(created_client)}"
+                    }
+                else:
+                    results[index] = self._created_result(prepared[index][1], created_client)
+
+        for index, event_data in enumerate(events):
+            if results[index] is None:
+                results[index] = results[first_of_key[self._client_key(event_data, index)]]
+        return results
+
+    @staticmethod
+    def _client_key(event_data: Dict[str, Any], index: int) -> Any:
+        company_id, rfc = event_data.get("company_id"), event_data.get("rfc")
+        if not company_id or not rfc:
+            return index
+        return company_id, str(rfc).strip().upper()
+
+    async def _prepare(self, event_data: Dict[str, Any]) -> Tuple[Optional[Client], Dict[str, Any]]:
+        company_id = event_data.get("company_id")
+        if not company_id: 
+            return None, {
+                "success": False, 
+                "error": "company_id es requerido para facturar"
+            }
+
+        company = await self.company_repository.get_by_id(company_id)
+        if not company: 
+            return None, {
+                "success": False, 
+                "error": f"Empresa no encontrada: {company_id}"
+            }   
+        
+        credentials = await self.credential_resolver.for_company(company)
+        if credentials is None:
+            return None, {
+                "success": False,
+                "error": f"La empresa {company_id} no tiene credenciales de Factura.com"
+            }
+
+        # La ruta serializa por (empresa, RFC): un evento repetido encuentra aquí el cliente y no lo vuelve a crear
+        existing_client = await self.client_repository.find_by_company(event_data.get("rfc"), company_id, credentials.account)
+        if existing_client:
+            logger.info(f"Cliente {event_data.get('rfc')} ya sincronizado para la empresa {company_id}: {existing_client.id}")
+            return None, {
+                "success": True,
+                "client_id": existing_client.id,
+                "factura_client_id": existing_client.external_uid,
+                "message": "Client already synchronized with Factura.com"
+            }
+
+        logger.info(f"Datos recibidos del evento cliente: {json.dumps(event_data, indent=2)}")
+
+        client_data = self._map_to_factura_format(event_data)
+
+        # Un intento previo pudo crear el receptor y cortarse (timeout del handler) antes de guardarlo
+        existing = await self.external_client_repository.find_client(
+            str(event_data.get("rfc", "")), str(event_data.get("business_name", "")), credentials
+        )
+        if existing and existing.get("UID"):
+            factura_client_uid = existing["UID"]
+            response = {"status": "success", "Data": existing}
+            logger.info(f"Cliente {event_data.get('rfc')} ya existe en Factura.com, se concilia: {factura_client_uid}")
+        else:
+            response = await self.external_client_repository.create_client(client_data, credentials)
+
+            if response.get("status") != 'success':
                 error_msg = response.get('message', 'Unknown error from Factura.com')
                 logger.error(f"Error de Factura.com: {error_msg}")
-                return {
+                return None, {
                     "success": False,
                     "error": error_msg
                 }
-            
-        except Exception as e: 
-            logger.error(f"Error inesperado en use case: {str(e)}")
-            return {"success": False, "error": str(e)}
+
+            factura_client_uid = response.get('Data', {}).get('UID')
+
+            logger.info(f"Cliente creado con UID: {factura_client_uid}")
+
+            await asyncio.sleep(2)
+
+        # Si falla, el reintento encuentra el receptor con find_client en lugar de duplicarlo
+        client_details = await self.external_client_repository.get_client_by_id(factura_client_uid, credentials)
+
+        client_model = await self._build_client(event_data, factura_client_uid, client_details, credentials.account)
+        return client_model, {"factura_client_id": factura_client_uid, "data": response}
+
+    def _created_result(self, prepared: Dict[str, Any], created_client: Any) -> Dict[str, Any]:
+        if hasattr(created_client, 'inserted_id'):
+            client_id = str(created_client.inserted_id)
+        elif hasattr(created_client, 'id'):
+            client_id = str(created_client.id)
+        else:
+            client_id = str(created_client)
+        
+        logger.info(f"Cliente creado en BD con ObjectId: {client_id}")
+
+        return {
+            "success": True, 
+            "client_id" : client_id, 
+            "factura_client_id" : prepared["factura_client_id"], 
+            "data": prepared["data"], 
+            "message" : "Client successfully created in Factura.com and local database"
+        }
 
     def _map_to_factura_format(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
@@ -125,7 +241,13 @@ class SyncClientWithFacturaUseCase:
             logger.error(f"Error en mapeo de datos: {str(e)}")
             raise
 
-    async def _create_client_in_database(self, event_data: Dict[str, Any], factura_uid: str, factura_response: Dict[str, Any]) -> str:
+    async def _build_client(
+        self,
+        event_data: Dict[str, Any],
+        factura_uid: str,
+        factura_response: Dict[str, Any],
+        factura_account: str
+    ) -> Client:
         try:
             factura_data = factura_response.get('Data', {})
             contact_data = factura_data.get('Contacto', {})
@@ -167,6 +289,7 @@ class SyncClientWithFacturaUseCase:
                 "tenant_id": event_data.get("tenant_id", str(uuid.uuid4())),
                 "external_uid": factura_uid,
                 "company_id": event_data.get("company_id"),
+                "factura_account": factura_account,
                 "rfc": event_data.get("rfc"),
                 "business_name": event_data.get("business_name"),
                 "tax_regime": event_data.get("tax_regime"),
@@ -183,18 +306,15 @@ class SyncClientWithFacturaUseCase:
                 "emails": emails if emails else None
             }
             
-            client_model = Client(**client_dict)
-            created_client = await self.client_repository.create(client_model)
-            
-            if hasattr(created_client, 'inserted_id'):
-                client_id = str(created_client.inserted_id)
-            elif hasattr(created_client, 'id'):
-                client_id = str(created_client.id)
-            else:
-                client_id = str(created_client)
+            return Client(**client_dict)
             
-            logger.info(f"Cliente creado en BD con ObjectId: {client_id}")
-            return client_id
+        except Exception as e:
+            logger.error(f"Error construyendo cliente: {str(e)}")
+            raise
+
+    async def _create_client_in_database(self, client_model: Client) -> Client:
+        try:
+            return await self.client_repository.create(client_model)
             
         except Exception as e:
             logger.error(f"Error creando cliente en BD: {str(e)}")
@@ -10,6 +10,7 @@ class Client(BaseModel):
     tenant_id: str 
     external_uid: Optional[str] = None
     company_id: Optional[str] = Field(None, description="ID de la empresa que factura que factura para este cliente")
+    factura_account: Optional[str] = Field(None, description="Cuenta de Factura.com donde existe el receptor (la de la empresa)")
     
     rfc: str
     business_name: str
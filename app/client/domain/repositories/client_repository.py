@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod 
-from typing import Optional, List 
+from typing import Optional, List, Union 
 from ..entities.client import Client 
 
 class ClientRepository(ABC):
@@ -8,6 +8,11 @@ class ClientRepository(ABC):
     async def create(self, client: Client) -> Client:
         pass 
 
+    @abstractmethod
+    async def bulk_create(self, clients: List[Client]) -> List[Union[Client, Exception]]:
+        """Inserta en lote sin orden; devuelve por posición el cliente creado o el error de ese elemento."""
+        pass
+
     @abstractmethod 
     async def get_by_id(self, client_id: str) -> Optional[Client]:
         pass
@@ -17,7 +22,8 @@ class ClientRepository(ABC):
         pass
 
     @abstractmethod
-    async def find_by_company(self, rfc: str, company_id: str) -> Optional[Client]:
+    async def find_by_company(self, rfc: str, company_id: str, factura_account: Optional[str] = None) -> Optional[Client]:
+        """Con `factura_account` solo devuelve el receptor creado en esa cuenta de Factura.com."""
         pass
     
     
@@ -1,14 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from company.domain.services.company_credentials import FacturaCredentials
 
 class ExternalClientRepository(ABC): 
     
     @abstractmethod 
-    async def create_client(self, client_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_client(self, client_data: Dict[str, Any], credentials: FacturaCredentials) -> Dict[str, Any]:
+        """Crea el receptor en la cuenta de la empresa emisora; los catálogos sí son los de la cuenta del servicio."""
         pass 
     
+    @abstractmethod
+    async def find_client(self, rfc: str, business_name: Optional[str], credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
+        """Receptor ya creado en la cuenta con ese RFC (y razón social si el RFC es genérico); concilia una creación cortada."""
+        pass
+
     @abstractmethod 
-    async def get_client_by_id(self, uid: str) -> Dict[str, Any]:
+    async def get_client_by_id(self, uid: str, credentials: FacturaCredentials) -> Dict[str, Any]:
         pass 
 
     @abstractmethod
@@ -6,6 +6,7 @@ from ...application.dtos.client_response import ClientResponseDTO
 from ...application.dtos.create_client_dto import CreateClientDTO 
 
 from shared.responses import SuccessResponse 
+from shared.infrastructure.monitoring.server_timing import timed
 from shared.exceptions import BusinessException, NotFoundException 
 
 class ClientController:
@@ -19,23 +20,24 @@ class ClientController:
             
             client = await self.create_client_use_case.execute(client_dto)
             
-            client_response = ClientResponseDTO(
-                id=client.id, 
-                tenant_id=client.tenant_id, 
-                external_uid=client.external_uid,
-                rfc=client.rfc,
-                business_name=client.business_name, 
-                tax_regime=client.tax_regime, 
-                tax_id_number=client.tax_id_number,
-                address=client.address, 
-                contact=client.contact, 
-                cfdi_use=client.cfdi_use, 
-                cfdi_use_name=client.cfdi_use_name, 
-                created_at=client.created_at, 
-                updated_at=client.updated_at, 
-                status=client.status, 
-                factura_sync=client.factura_sync
-            )
+            with timed("serialization"):
+                client_response = ClientResponseDTO(
+                    id=client.id, 
+                    tenant_id=client.tenant_id, 
+                    external_uid=client.external_uid,
+                    rfc=client.rfc,
+                    business_name=client.business_name, 
+                    tax_regime=client.tax_regime, 
+                    tax_id_number=client.tax_id_number,
+                    address=client.address, 
+                    contact=client.contact, 
+                    cfdi_use=client.cfdi_use, 
+                    cfdi_use_name=client.cfdi_use_name, 
+                    created_at=client.created_at, 
+                    updated_at=client.updated_at, 
+                    status=client.status, 
+                    factura_sync=client.factura_sync
+                )
              
             return SuccessResponse(
                 data=client_response, 
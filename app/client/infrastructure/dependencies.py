@@ -1,32 +1,91 @@
-from functools import lru_cache 
-from config.database import get_database 
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from config.database import get_database
 from ..domain.repositories.client_repository import ClientRepository 
 from ..domain.repositories.external_client_repository import ExternalClientRepository
 from ..infrastructure.repositories.mongodb_client_repository import MongoDBClientRepository
 from .services.factura_client_adapter import FacturaClientAdapter
 
 from ..application.use_cases.create_client_use_case import CreateClientUseCase
+from ..application.use_cases.sync_client_with_factura_use_case import SyncClientWithFacturaUseCase
+from ..application.use_cases.invoice_client_use_case import InvoiceClientUseCase
 
 from .controllers.client_controller import ClientController
+from company.domain.repositories.company_repository import CompanyRepository
+from company.domain.services.company_credentials import CompanyCredentialResolver
+from invoice.application.use_cases.issue_invoice_use_case import IssueInvoiceUseCase
+from shared.domain.repositories.lease_repository import LeaseRepository
+from shared.infrastructure.container import Container, Scope, container
+from shared.infrastructure.dependencies import lookup_batch_window
+
+def register(container: Container):
+    container.on_startup(_ensure_indexes)
+
+    container.register(
+        ClientRepository,
+        lambda c: MongoDBClientRepository(
+            c.resolve(AsyncIOMotorDatabase),
+            batch_window_seconds=lookup_batch_window(),
+            max_batch_size=settings.mongo_lookup_max_batch_size
+        ),
+        Scope.PROCESS
+    )
+    container.register(
+        ExternalClientRepository,
+        lambda c: FacturaClientAdapter(),
+        Scope.PROCESS,
+        on_shutdown=lambda adapter: adapter.close()
+    )
+
+    container.register(CreateClientUseCase, lambda c: CreateClientUseCase(c.resolve(ClientRepository)), Scope.PROCESS)
+    container.register(
+        SyncClientWithFacturaUseCase,
+        lambda c: SyncClientWithFacturaUseCase(
+            c.resolve(ClientRepository),
+            c.resolve(ExternalClientRepository),
+            c.resolve(CompanyRepository),
+            c.resolve(CompanyCredentialResolver)
+        ),
+        Scope.PROCESS
+    )
+    container.register(
+        InvoiceClientUseCase,
+        lambda c: InvoiceClientUseCase(
+            c.resolve(ClientRepository),
+            c.resolve(ExternalClientRepository),
+            c.resolve(CompanyRepository),
+            c.resolve(CompanyCredentialResolver),
+            c.resolve(IssueInvoiceUseCase),
+            c.resolve(LeaseRepository),
+            lease_ttl_seconds=settings.client_creation_lease_ttl_seconds,
+            lease_wait_seconds=settings.client_creation_lease_wait_seconds
+        ),
+        Scope.PROCESS
+    )
+
+    container.register(
+        ClientController,
+        lambda c: ClientController(create_client_use_case=c.resolve(CreateClientUseCase)),
+        Scope.PROCESS
+    )
+
+async def _ensure_indexes():
+    await MongoDBClientRepository.ensure_indexes(get_database())
 
-@lru_cache()
 def get_client_repository() -> ClientRepository: 
-    database = get_database()
-    return MongoDBClientRepository(database)
+    return container.resolve(ClientRepository)
 
-@lru_cache()
 def get_external_client_repository() -> ExternalClientRepository:
-    return FacturaClientAdapter()
+    return container.resolve(ExternalClientRepository)
 
-@lru_cache()
 def get_create_client_use_case() -> CreateClientUseCase:
-    client_repository = get_client_repository()
-    return CreateClientUseCase(client_repository)
+    return container.resolve(CreateClientUseCase)
+
+def get_sync_client_use_case() -> SyncClientWithFacturaUseCase:
+    return container.resolve(SyncClientWithFacturaUseCase)
+
+def get_invoice_client_use_case() -> InvoiceClientUseCase:
+    return container.resolve(InvoiceClientUseCase)
 
-@lru_cache()
 def get_client_controller() -> ClientController: 
-    create_client_use_case = get_create_client_use_case()
-    
-    return ClientController(
-        create_client_use_case=create_client_use_case
-    )
\ No newline at end of file
+    return container.resolve(ClientController)
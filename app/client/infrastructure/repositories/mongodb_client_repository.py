@@ -1,20 +1,47 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase 
-from typing import Optional
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, Optional, List, Tuple, Union
 import logging
 
 from ...domain.entities.client import Client 
 from ...domain.repositories.client_repository import ClientRepository
 
 from shared.exceptions import BusinessException 
+from shared.infrastructure.monitoring.server_timing import timed_call
+from shared.infrastructure.repositories.data_loader import DataLoader
 
 logger = logging.getLogger(__name__)
 
 class MongoDBClientRepository(ClientRepository): 
     
-    def __init__(self, database: AsyncIOMotorDatabase): 
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        batch_window_seconds: Optional[float] = None,
+        max_batch_size: int = 200
+    ): 
         self.database = database 
         self.collection = database["clients"]
+        self._clients_by_rfc = (
+            DataLoader(self._load_clients_by_rfc, batch_window_seconds, max_batch_size)
+            if batch_window_seconds is not None else None
+        )
+        self._clients_by_account = (
+            DataLoader(self._load_clients_by_account, batch_window_seconds, max_batch_size)
+            if batch_window_seconds is not None else None
+        )
         
+    @staticmethod
+    async def ensure_indexes(database: AsyncIOMotorDatabase):
+        # Búsqueda del receptor de una empresa en su cuenta de Factura.com
+        await database["clients"].create_index(
+            [("company_id", 1), ("rfc", 1), ("factura_account", 1)],
+            name="clients_company_rfc_account"
+        )
+
+    @timed_call("mongo")
     async def create(self, client: Client) -> Client:
 
         client_dict = client.model_dump(by_alias=True, exclude={"id"})
@@ -26,14 +53,47 @@ class MongoDBClientRepository(ClientRepository):
 
         return Client(**created_client)
 
+    @timed_call("mongo")
+    async def bulk_create(self, clients: List[Client]) -> List[Union[Client, Exception]]:
+        documents = []
+        for client in clients:
+            client_dict = client.model_dump(by_alias=True, exclude={"id"})
+            client_dict["_id"] = ObjectId()
+            documents.append(client_dict)
+
+        failed = {}
+        try:
+            await self.collection.bulk_write([InsertOne(document) for document in documents], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = BusinessException(write_error.get("errmsg", "Error de escritura"))
+            if e.details.get("writeConcernErrors"):
+                raise
+
+        results: List[Union[Client, Exception]] = []
+        for index, document in enumerate(documents):
+            if index in failed:
+                results.append(failed[index])
+            else:
+                document["_id"] = str(document["_id"])
+                results.append(Client(**document))
+
+        logger.info(f"Bulk insert de clientes: {len(documents) - len(failed)} creados, {len(failed)} fallidos")
+        return results
+
     async def get_by_id(self, client_id):
         return await super().get_by_id(client_id)
 
+    @timed_call("mongo")
     async def find_by_rfc(self, client_rfc):
         try:
-            client_doc = await self.collection.find_one({"rfc": client_rfc})
+            if self._clients_by_rfc:
+                client_doc = await self._clients_by_rfc.load(client_rfc)
+            else:
+                client_doc = await self.collection.find_one({"rfc": client_rfc})
 
             if client_doc: 
+                client_doc = dict(client_doc)
                 client_doc["_id"] = str(client_doc["_id"])
                 return Client(**client_doc)
             
@@ -41,16 +101,39 @@ class MongoDBClientRepository(ClientRepository):
         except Exception: 
             return None
 
-    async def find_by_company(self, rfc: str, company_id: str) -> Optional[Client]:
+    async def _load_clients_by_rfc(self, rfcs: List[str]) -> Dict[str, Dict[str, Any]]:
+        clients_by_rfc = {}
+        async for client_doc in self.collection.find({"rfc": {"$in": rfcs}}):
+            # Igual que find_one: se queda con el primero por RFC
+            clients_by_rfc.setdefault(client_doc["rfc"], client_doc)
+        return clients_by_rfc
+
+    async def _load_clients_by_account(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        clients_by_account = {}
+        query = {"$or": [
+            {"company_id": company_id, "rfc": rfc, "factura_account": account}
+            for company_id, rfc, account in keys
+        ]}
+        async for client_doc in self.collection.find(query):
+            key = (client_doc["company_id"], client_doc["rfc"], client_doc["factura_account"])
+            clients_by_account.setdefault(key, client_doc)
+        return clients_by_account
+
+    @timed_call("mongo")
+    async def find_by_company(self, rfc: str, company_id: str, factura_account: Optional[str] = None) -> Optional[Client]:
         
         try: 
             
-            client_data = await self.collection.find_one({
-                "rfc": rfc, 
-                "company_id": company_id
-            })
+            if factura_account is not None and self._clients_by_account:
+                client_data = await self._clients_by_account.load((company_id, rfc, factura_account))
+            else:
+                query = {"rfc": rfc, "company_id": company_id}
+                if factura_account is not None:
+                    query["factura_account"] = factura_account
+                client_data = await self.collection.find_one(query)
             
             if client_data:
+                client_data = dict(client_data)
                 client_data["_id"] = str(client_data["_id"])
                 return Client(**client_data)
             return None
@@ -1,13 +1,18 @@
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config.settings import settings
+from shared.exceptions import ServiceUnavailableException
+from shared.infrastructure.services.factura_http import build_factura_http_client
 import json
 import logging
 from datetime import datetime, timedelta, timezone
 from ...domain.repositories.external_client_repository import ExternalClientRepository
+from company.domain.services.company_credentials import FacturaCredentials
 
 logger = logging.getLogger(__name__)
 
+GENERIC_RFCS = frozenset({"XAXX010101000", "XEXX010101000"})
+
 class FacturaClientAdapter(ExternalClientRepository):  
     
     def __init__(self):
@@ -15,17 +20,14 @@ class FacturaClientAdapter(ExternalClientRepository):
         self.secret_key = settings.factura_com_secret_key
         self.base_url = settings.factura_com_api_url
         self.plugin_key = "9d4095c8f7ed5785cb14c0e3b033eeb8252416ed"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = build_factura_http_client()
         self._cache = {}
         self._cache_expiry = {}
 
-    async def create_client(self, client_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_client(self, client_data: Dict[str, Any], credentials: FacturaCredentials) -> Dict[str, Any]:
         try:
-            headers = {
-                "F-API-KEY": self.api_key,
-                "F-SECRET-KEY": self.secret_key,
-                "F-PLUGIN": self.plugin_key
-            }
+            # El receptor se crea en la cuenta de la empresa que le va a facturar
+            headers = self._account_headers(credentials)
             
             data = {}
             for key, value in client_data.items():
@@ -45,6 +47,8 @@ class FacturaClientAdapter(ExternalClientRepository):
             logger.info(f"Respuesta de Factura.com: {json.dumps(result, indent=2)}")
             return result
                 
+        except ServiceUnavailableException:
+            raise
         except httpx.HTTPError as e:
             error_msg = f"Error calling Factura.com API: {str(e)}"
             if hasattr(e, 'response') and e.response:
@@ -57,13 +61,46 @@ class FacturaClientAdapter(ExternalClientRepository):
             logger.error(f"ERROR inesperado: {str(e)}", exc_info=True)
             raise Exception(f"Unexpected error: {str(e)}")
 
-    async def get_client_by_id(self, uid: str) -> Dict[str, Any]:
+    async def find_client(self, rfc: str, business_name: Optional[str], credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
         try:
-            headers = {
-                "F-API-KEY": self.api_key,
-                "F-SECRET-KEY": self.secret_key,
-                "F-PLUGIN": self.plugin_key
-            }
+            base_url_without_v4 = self.base_url.replace('/v4', '')
+            response = await self.client.get(
+                f"{base_url_without_v4}/v1/clients/{rfc}",
+                headers=self._account_headers(credentials)
+            )
+        except ServiceUnavailableException:
+            raise
+        except httpx.TransportError as e:
+            raise ServiceUnavailableException(f"Error de conexión buscando el cliente {rfc}: {str(e)}")
+
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            # Sin poder confirmar que no existe no se vuelve a crear
+            raise ServiceUnavailableException(f"No se pudo verificar el cliente {rfc} en Factura.com: {response.text[:200]}")
+
+        result = response.json()
+        if result.get("status") != "success":
+            return None
+
+        data = result.get("Data") or []
+        wanted_rfc = rfc.strip().upper()
+        for candidate in data if isinstance(data, list) else [data]:
+            if str(candidate.get("RFC") or "").strip().upper() != wanted_rfc:
+                continue
+            # Con RFC genérico (público en general, extranjero) solo la razón social distingue al receptor
+            if wanted_rfc in GENERIC_RFCS and self._normalize(candidate.get("RazonSocial")) != self._normalize(business_name):
+                continue
+            return candidate
+        return None
+
+    @staticmethod
+    def _normalize(value: Optional[str]) -> str:
+        return " ".join(str(value or "").upper().split())
+
+    async def get_client_by_id(self, uid: str, credentials: FacturaCredentials) -> Dict[str, Any]:
+        try:
+            headers = self._account_headers(credentials)
             
             base_url_without_v4 = self.base_url.replace('/v4', '')
             response = await self.client.get(
@@ -109,6 +146,8 @@ class FacturaClientAdapter(ExternalClientRepository):
 
             return catalog_data
              
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo CFDI: {str(e)}")
             return []
@@ -140,6 +179,8 @@ class FacturaClientAdapter(ExternalClientRepository):
 
             return regimes_data
              
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo de regímenes: {str(e)}")
             
@@ -170,6 +211,8 @@ class FacturaClientAdapter(ExternalClientRepository):
 
             return countries_data
             
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo países: {str(e)}")
             return []
@@ -219,5 +262,12 @@ class FacturaClientAdapter(ExternalClientRepository):
             return False 
         return datetime.now(timezone.utc) < self._cache_expiry[cache_key]
 
+    def _account_headers(self, credentials: FacturaCredentials) -> Dict[str, str]:
+        return {
+            "F-API-KEY": credentials.api_key,
+            "F-SECRET-KEY": credentials.secret_key,
+            "F-PLUGIN": self.plugin_key
+        }
+
     async def close(self):
         await self.client.aclose()
\ No newline at end of file
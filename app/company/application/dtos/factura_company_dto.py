@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from .company_event_dto import CompanyEventDTO
 
 class FacturaCompanyDTO(BaseModel):
@@ -31,11 +31,11 @@ class FacturaCompanyDTO(BaseModel):
     curp: Optional[str] = None
     logo: Optional[str] = None
     password: Optional[str] = None
-    fiel_cer_b64: Optional[str] = None
-    fiel_key_b64: Optional[str] = None
+    fiel_cer_b64: Optional[Union[str, Dict[str, Any]]] = None
+    fiel_key_b64: Optional[Union[str, Dict[str, Any]]] = None
     fielpassword: Optional[str] = None
-    csd_cer_b64: Optional[str] = None
-    csd_key_b64: Optional[str] = None
+    csd_cer_b64: Optional[Union[str, Dict[str, Any]]] = None
+    csd_key_b64: Optional[Union[str, Dict[str, Any]]] = None
 
     model_config = {
         "populate_by_name": True,
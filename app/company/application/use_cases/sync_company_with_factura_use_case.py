@@ -1,8 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
 from ...domain.entities.company import Company
 from ...domain.repositories.company_repository import CompanyRepository
 from ...domain.repositories.external_company_repository import ExternalCompanyRepository
 from ...domain.repositories.credential_repository import CredentialRepository
+from ...domain.services.company_credentials import CompanyCredentialResolver
+from ...domain.repositories.onboarding_repository import COMPLETED, OnboardingRepository, OnboardingState
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.domain.repositories.lease_repository import LeaseRepository
+from shared.domain.services.certificate_claim_check import check_out_certificate, is_blob_reference
+from shared.exceptions import ServiceUnavailableException
 
 from ..dtos.company_event_dto import CompanyEventDTO 
 from ..dtos.factura_company_dto import FacturaCompanyDTO 
@@ -16,95 +22,240 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+STEP_ACCOUNT_REQUESTED = "account_requested"
+STEP_ACCOUNT = "account"
+STEP_SERIES = "series"
+STEP_CREDENTIALS = "credentials"
+STEP_COMPANY = "company"
+
 class SyncCompanyWithFacturaUseCase:
+    """Onboarding de una compañía como saga persistida: cada paso guarda su salida y un reintento
+    retoma desde el último paso completado en lugar de volver a crear la cuenta en Factura.com.
+    Antes de /account/create se guarda una marca; si el resultado se perdió, el reintento busca
+    la cuenta por RFC antes de volver a crearla.
+
+    account -> credentials -> series -> company
+
+    Las series se crean en la cuenta de la empresa, así que esperan a sus credenciales.
+    """
+
     def __init__(
         self, 
         company_repository: CompanyRepository,
         external_company_repository: ExternalCompanyRepository, 
-        credential_repository: CredentialRepository
-
+        credential_repository: CredentialRepository,
+        credential_resolver: CompanyCredentialResolver,
+        onboarding_repository: OnboardingRepository,
+        blob_storage: Optional[BlobStorage] = None,
+        credentials_attempts: int = 4,
+        credentials_delay_seconds: float = 2.0,
+        lease_repository: Optional[LeaseRepository] = None,
+        lease_ttl_seconds: float = 300.0
     ):
         self.company_repository = company_repository
         self.external_company_repository = external_company_repository
         self.credential_repository = credential_repository
+        self.credential_resolver = credential_resolver
+        self.onboarding_repository = onboarding_repository
+        self.blob_storage = blob_storage
+        self.credentials_attempts = credentials_attempts
+        self.credentials_delay_seconds = credentials_delay_seconds
+        self.lease_repository = lease_repository
+        self.lease_ttl_seconds = lease_ttl_seconds
 
     async def execute(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        onboarding = None
+        lease = None
         try:
             logger.info(f"Datos recibidos del evento: {json.dumps(event_data, indent=2)}")
             event_dto = CompanyEventDTO(**event_data)
-            
-            factura_dto = FacturaCompanyDTO.from_event_dto(event_dto)
-            logger.info(f"Datos para factura: {factura_dto.model_dump(exclude_none=True)}")
+            onboarding_id = self._onboarding_id(event_dto)
 
-            series_to_create = event_data.get("series", [])
-            has_new_series = len(series_to_create) > 0
-            
-            response = await self.external_company_repository.create_company(factura_dto.model_dump(exclude_none=True))
-            
-            if response.get('status') == 'create': 
-                factura_company_id = response.get('0', {}).get('acco_id')
-                factura_uid = response.get('0', {}).get('acco_uid')
-                
-                logger.info(f"¡ÉXITO! Compañía creada con ID: {factura_company_id}, UID: {factura_uid}")
+            # Dos entregas del mismo evento no deben crear la cuenta dos veces: solo avanza quien tiene el lease
+            lease = await self._claim(onboarding_id)
+            onboarding = await self.onboarding_repository.start(onboarding_id)
+            if onboarding.status == COMPLETED:
+                logger.info(f"Onboarding {onboarding.onboarding_id} ya completado, se omite")
+                return onboarding.result
+            if onboarding.steps:
+                logger.info(f"Retomando onboarding {onboarding.onboarding_id} con pasos completados: {list(onboarding.steps)}")
+
+            if STEP_ACCOUNT not in onboarding.steps:
+                factura_dto = FacturaCompanyDTO.from_event_dto(event_dto)
+                logger.info(f"Datos para factura: {factura_dto.model_dump(exclude_none=True)}")
+
+                account = None
+                if STEP_ACCOUNT_REQUESTED in onboarding.steps:
+                    # Un intento previo envió /account/create sin guardar la respuesta: la cuenta pudo quedar creada
+                    account = await self.external_company_repository.find_company(factura_dto.rfc)
+                    if account:
+                        logger.info(f"Cuenta de {factura_dto.rfc} ya creada en Factura.com, se concilia: {account}")
+
+                if account is None:
+                    await self._complete_step(onboarding, STEP_ACCOUNT_REQUESTED, {
+                        "rfc": factura_dto.rfc,
+                        "requested_at": datetime.now().isoformat()
+                    })
+
+                    form_data = self._check_out_certificates(factura_dto.model_dump(exclude_none=True))
+                    response = await self.external_company_repository.create_company(form_data)
+
+                    if response.get('status') != 'create':
+                        error_msg = response.get('message', 'Unknown error from Factura.com')
+                        logger.error(f"Error de Factura.com: {error_msg}")
+                        return {
+                            "success": False,
+                            "error": error_msg
+                        }
+                    account = response.get('0', {})
 
-                company_series = await self._process_series(
-                    factura_uid, 
-                    has_new_series, 
+                await self._complete_step(onboarding, STEP_ACCOUNT, {
+                    "factura_company_id": account.get('acco_id'),
+                    "factura_uid": account.get('acco_uid')
+                })
+
+            account = onboarding.steps[STEP_ACCOUNT]
+            factura_company_id = account["factura_company_id"]
+            factura_uid = account["factura_uid"]
+            logger.info(f"Compañía en Factura.com con ID: {factura_company_id}, UID: {factura_uid}")
+
+            series_to_create = event_data.get("series", [])
+            await self._run_steps(onboarding, {
+                STEP_CREDENTIALS: lambda: self._fetch_credentials(factura_uid)
+            })
+            await self._run_steps(onboarding, {
+                STEP_SERIES: lambda: self._process_series(
+                    factura_uid,
+                    onboarding.steps[STEP_CREDENTIALS],
+                    len(series_to_create) > 0,
                     series_to_create
                 )
-                
-                await asyncio.sleep(2) 
-                credentials = await self.external_company_repository.get_company_credentials(factura_uid)
-                
-                company_id = await self._create_company_in_database(
+            })
+
+            if STEP_COMPANY not in onboarding.steps:
+                await self._save_company(
+                    onboarding.company_id,
                     event_dto,
-                    factura_company_id, 
-                    credentials, 
-                    company_series
+                    factura_company_id,
+                    onboarding.steps[STEP_SERIES],
+                    onboarding.steps[STEP_CREDENTIALS]
                 )
+                await self._complete_step(onboarding, STEP_COMPANY, {"company_id": onboarding.company_id})
 
-                await asyncio.sleep(3)
-                credentials_response = await self.external_company_repository.get_company_credentials(factura_uid)
-
-                if credentials_response.get("status") == "success":
-                    await self._update_company_with_real_credentials(
-                        str(company_id), 
-                        credentials_response.get('data', {})
-                    )
+            result = {
+                "success": True,
+                "factura_company_id": factura_company_id,
+                "factura_uid": factura_uid,
+                "message": "Company succesfully created in both Factura.com and local database"
+            }
+            await self.onboarding_repository.finish(onboarding.onboarding_id, result)
+            return result
 
-                    logger.info(f"Credenciales REALES obtenidas y guardadas para empresa {company_id}")
-                
-                return {
-                    "success": True,
-                    "factura_company_id": factura_company_id,
-                    "factura_uid": factura_uid,
-                    "message": "Company succesfully created in both Factura.com and local database"
-                }
-            else:
-                error_msg = response.get('message', 'Unknown error from Factura.com')
-                logger.error(f"Error de Factura.com: {error_msg}")
-                return {
-                    "success": False,
-                    "error": error_msg
-                }
-                
+        except ServiceUnavailableException:
+            # El avance queda guardado: el reintento del consumer retoma desde el último paso
+            raise
         except Exception as e:
             logger.error(f"Error inesperado en use case: {str(e)}")
+            if onboarding is not None:
+                await self.onboarding_repository.record_error(onboarding.onboarding_id, str(e))
             return {"success": False, "error": str(e)}
+        finally:
+            if lease is not None:
+                await self._release(*lease)
+
+    async def _claim(self, onboarding_id: str) -> Optional[Tuple[str, str]]:
+        if self.lease_repository is None:
+            return None
+
+        key = f"company_onboarding:{onboarding_id}"
+        owner = uuid.uuid4().hex
+        if not await self.lease_repository.acquire(key, owner, self.lease_ttl_seconds):
+            # Si el dueño murió, el lease vence en a lo sumo su TTL
+            raise ServiceUnavailableException(
+                f"Onboarding {onboarding_id} en curso en otro proceso",
+                retry_after=self.lease_ttl_seconds
+            )
+        return key, owner
 
-    async def _update_company_with_real_credentials(self, company_id: str, real_credentials: Dict[str, Any]):
+    async def _release(self, key: str, owner: str):
         try:
-            logger.info(f"Credenciales recibidas: {json.dumps(real_credentials, indent=2)}")
+            await self.lease_repository.release(key, owner)
+        except Exception as e:
+            logger.error(f"No se pudo liberar el lease {key}: {str(e)}")
 
-            encrypted_credentials = await self.credential_repository.encrypt_credentials(real_credentials)
-            
+    @staticmethod
+    def _onboarding_id(event_dto: CompanyEventDTO) -> str:
+        return f"{event_dto.tenant_id}:{(event_dto.tax_id or event_dto.business_name).strip().upper()}"
+
+    async def _complete_step(self, onboarding: OnboardingState, step: str, output: Any):
+        await self.onboarding_repository.complete_step(onboarding.onboarding_id, step, output)
+        onboarding.steps[step] = output
+
+    async def _run_steps(self, onboarding: OnboardingState, steps: Dict[str, Callable[[], Awaitable[Any]]]):
+        """Ejecuta en paralelo los pasos independientes que falten; cada uno se guarda en cuanto termina."""
+        async def run(step: str, action: Callable[[], Awaitable[Any]]):
+            await self._complete_step(onboarding, step, await action())
+
+        pending = [run(step, action) for step, action in steps.items() if step not in onboarding.steps]
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def _check_out_certificates(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Las referencias se resuelven al enviar: el adaptador transmite el blob sin cargarlo antes
+        for key, value in form_data.items():
+            if is_blob_reference(value):
+                form_data[key] = check_out_certificate(value, self.blob_storage)
+        return form_data
+
+    async def _fetch_credentials(self, factura_uid: str) -> Dict[str, Any]:
+        """Factura.com tarda en aprovisionar las credenciales de una cuenta nueva; se consultan hasta que estén listas."""
+        for attempt in range(1, self.credentials_attempts + 1):
+            await asyncio.sleep(self.credentials_delay_seconds)
+            response = await self.external_company_repository.get_company_credentials(factura_uid)
+
+            if response.get("status") == "success":
+                # Se guardan cifradas: la salida del paso queda persistida en el onboarding
+                return await self.credential_repository.encrypt_credentials(response.get("data", {}))
+
+            logger.info(f"Credenciales de {factura_uid} aún no disponibles (intento {attempt}/{self.credentials_attempts})")
+
+        raise ServiceUnavailableException(
+            f"Credenciales de {factura_uid} no disponibles en Factura.com",
+            retry_after=self.credentials_delay_seconds
+        )
+
+    async def _save_company(
+        self,
+        company_id: str,
+        event_dto: CompanyEventDTO,
+        factura_company_id: str,
+        company_series: List[Dict[str, Any]],
+        credentials: Dict[str, Any]
+    ):
+        # El id se asignó al iniciar el onboarding: si el insert ya ocurrió en un intento previo no se duplica
+        if await self.company_repository.get_fields(company_id, ["_id"]) is None:
+            await self._create_company_in_database(
+                company_id,
+                event_dto,
+                factura_company_id,
+                {"data": credentials},
+                company_series
+            )
+
+        await self._update_company_with_real_credentials(company_id, credentials)
+        logger.info(f"Credenciales REALES obtenidas y guardadas para empresa {company_id}")
+
+    async def _update_company_with_real_credentials(self, company_id: str, encrypted_credentials: Dict[str, Any]):
+        try:
             update_data = {
                 "metadata.apiKey": encrypted_credentials.get('api_key'),    
                 "metadata.apiSecret": encrypted_credentials.get('secret_key'), 
-                "metadata.thpFcUid": real_credentials.get('uid', ''),
-                "metadata.razonSocial": real_credentials.get('razon_social', ''),
-                "metadata.rfc": real_credentials.get('rfc', ''),
-                "metadata.regimenFiscal": real_credentials.get('regimen_fiscal', ''),
+                "metadata.thpFcUid": encrypted_credentials.get('uid', ''),
+                "metadata.razonSocial": encrypted_credentials.get('razon_social', ''),
+                "metadata.rfc": encrypted_credentials.get('rfc', ''),
+                "metadata.regimenFiscal": encrypted_credentials.get('regimen_fiscal', ''),
                 "metadata.updatedAt": datetime.now().isoformat(),
                 #"metadata.credentialStatus": "decrypted" 
             }
@@ -118,46 +269,53 @@ class SyncCompanyWithFacturaUseCase:
             logger.error(f"Error actualizando credenciales REALES: {str(e)}")
             raise
 
-    async def _process_series(self, company_uid: str, has_new_series: bool, new_series: List[Dict[str, Any]]): 
-        try: 
-            if has_new_series: 
-                logger.info(f"Creando {len(new_series)} nuevas series en base de datos")
-                
-                mapped_series = []
-                for serie in new_series:
-                    mapped_series.append({
-                        "name": serie.get("name"),
-                        "type": serie.get("type", "factura"),
-                        "description": serie.get("description", f"Serie {serie.get('name')}"),
-                        "branch_id": serie.get("branch_id"),
-                        "initial_folio": serie.get("initial_folio", 1)
-                    })
-                
-                created_series = await self.external_company_repository.create_series(company_uid, mapped_series)
-                
-                if created_series and isinstance(created_series[0], object) and not isinstance(created_series[0], dict):
-                    return [series.model_dump() if hasattr(series, 'model_dump') else series.dict() if hasattr(series, 'dict') else series for series in created_series]
-                return created_series
-                
-            else: 
-                logger.info("No hay nuevas series, obteniendo serie por defecto de Factura.com")
-                default_series = await self.external_company_repository.get_default_series(company_uid)
-                if default_series: 
-                    if hasattr(default_series, 'model_dump'):
-                        return [default_series.model_dump()]
-                    elif hasattr(default_series, 'dict'):
-                        return [default_series.dict()]
-                    else:
-                        return [default_series]
-                else:  
-                    logger.warning("No se pudo obtener serie por defecto, retornando lista vacía")
-                    return []
-        except Exception as e: 
-            logger.error(f"Error procesando series: {str(e)}")
-            return []
+    async def _process_series(
+        self,
+        company_uid: str,
+        encrypted_credentials: Dict[str, Any],
+        has_new_series: bool,
+        new_series: List[Dict[str, Any]]
+    ):
+        """Los errores se propagan: el paso solo se guarda con un resultado real y un reintento lo vuelve a ejecutar."""
+        credentials = await self.credential_resolver.from_encrypted(encrypted_credentials, company_uid)
+
+        if has_new_series: 
+            logger.info(f"Creando {len(new_series)} nuevas series en base de datos")
+            
+            mapped_series = []
+            for serie in new_series:
+                mapped_series.append({
+                    "name": serie.get("name"),
+                    "type": serie.get("type", "factura"),
+                    "description": serie.get("description", f"Serie {serie.get('name')}"),
+                    "branch_id": serie.get("branch_id"),
+                    "initial_folio": serie.get("initial_folio", 1)
+                })
+            
+            outcomes = await self.external_company_repository.create_series(company_uid, mapped_series, credentials)
+
+            failed = [outcome for outcome in outcomes if not outcome["created"]]
+            if failed:
+                # Las ya creadas se reutilizan al reintentar el paso
+                raise Exception("Series no creadas: " + "; ".join(f"{outcome['name']}: {outcome['error']}" for outcome in failed))
+            return [outcome["series"] for outcome in outcomes]
+            
+        logger.info("No hay nuevas series, obteniendo serie por defecto de Factura.com")
+        default_series = await self.external_company_repository.get_default_series(company_uid, credentials)
+        if default_series: 
+            if hasattr(default_series, 'model_dump'):
+                return [default_series.model_dump()]
+            elif hasattr(default_series, 'dict'):
+                return [default_series.dict()]
+            else:
+                return [default_series]
+
+        logger.warning("La cuenta no tiene serie de tipo 'factura', se continúa sin series")
+        return []
 
     async def _create_company_in_database(
         self, 
+        company_id: str,
         event_dto: CompanyEventDTO,
         factura_id: str, 
         credentials: Dict[str, Any], 
@@ -169,6 +327,7 @@ class SyncCompanyWithFacturaUseCase:
                 event_dto, factura_id, credentials, company_series
             )
             company_dict = database_dto.model_dump(by_alias=True, exclude_none=True)
+            company_dict["_id"] = company_id
             
             logger.info(f"Insertando en BD...")
             created_company = await self.company_repository.create(company_dict)
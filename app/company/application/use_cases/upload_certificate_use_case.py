@@ -0,0 +1,25 @@
+import logging
+from typing import Any, Dict
+
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.domain.services.certificate_claim_check import CERTIFICATE_FIELDS, check_in_certificate
+from shared.exceptions import ValidationException
+
+logger = logging.getLogger(__name__)
+
+class UploadCertificateUseCase:
+    """Lado productor del claim-check: guarda el certificado y devuelve la referencia para el evento de empresa."""
+
+    def __init__(self, blob_storage: BlobStorage, max_bytes: int):
+        self.blob_storage = blob_storage
+        self.max_bytes = max_bytes
+
+    async def execute(self, field: str, data: bytes) -> Dict[str, Any]:
+        if field not in CERTIFICATE_FIELDS:
+            raise ValidationException(f"Campo de certificado no válido: {field}")
+        if len(data) > self.max_bytes:
+            raise ValidationException(f"El certificado excede {self.max_bytes} bytes")
+
+        reference = await check_in_certificate(data, self.blob_storage)
+        logger.info(f"Certificado {field} registrado: {reference['blob_ref']} ({reference['size']} bytes)")
+        return {"field": field, **reference}
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Awaitable, Callable, Optional, List
 
 from .source import Source 
 from .fiscal_data import FiscalData 
@@ -21,9 +21,20 @@ class Company(BaseModel):
     emails: Emails 
     configs: Configs 
     metadata: Metadata
-    series: List[Series] = Field(default=[], description="Billing series list")
+    series: Optional[List[Series]] = Field(default=None, description="Billing series list; None hasta cargarla con get_series()")
+
+    _series_loader: Optional[Callable[[], Awaitable[List[Series]]]] = PrivateAttr(default=None)
 
     class Config: 
         populate_by_name = True 
         extra = "allow"
 
+    def bind_series_loader(self, loader: Callable[[], Awaitable[List[Series]]]):
+        self._series_loader = loader
+
+    async def get_series(self) -> List[Series]:
+        """Carga las series bajo demanda desde su propia colección."""
+        if self.series is None:
+            self.series = await self._series_loader() if self._series_loader else []
+        return self.series
+
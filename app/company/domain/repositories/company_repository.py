@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod 
-from typing import Optional, List 
+from typing import Optional, List, Dict, Any
 from ..entities.company import Company 
+from ..entities.series import Series
 
 class CompanyRepository(ABC): 
     
@@ -12,6 +13,19 @@ class CompanyRepository(ABC):
     async def get_by_id(self, company_id: str) -> Optional[Company]: 
         pass 
     
+    @abstractmethod
+    async def get_fields(self, company_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        """Documento crudo con solo los campos pedidos (nombres de Mongo, p. ej. `businessName`)."""
+        pass
+
+    @abstractmethod
+    async def get_series(self, company_id: str) -> List[Series]:
+        pass
+
+    @abstractmethod
+    async def add_series(self, company_id: str, series: List[Dict[str, Any]]) -> None:
+        pass
+    
     @abstractmethod 
     async def update(self, company_id: str, company: dict) -> Company: 
         pass 
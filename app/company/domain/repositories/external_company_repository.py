@@ -1,29 +1,43 @@
 from abc import ABC, abstractmethod 
 from typing import Any, Dict, Optional, List
 
+from ..services.company_credentials import FacturaCredentials
+
 class ExternalCompanyRepository(ABC):
     
     @abstractmethod
     async def create_company(self, company_data: Dict[str, Any]) -> Dict[str, Any]: 
         pass 
     
+    @abstractmethod
+    async def find_company(self, rfc: str) -> Optional[Dict[str, Any]]:
+        """Cuenta ya creada para ese RFC ({"acco_id", "acco_uid"}) o None; concilia un /account/create sin respuesta."""
+        pass
+
     @abstractmethod
     async def get_company_credentials(self, uid: str) -> Dict[str, Any]: 
         pass
 
     @abstractmethod
-    async def get_all_series(self) -> List[Dict[str, Any]]: 
+    async def get_all_series(self, company_uid: str, credentials: FacturaCredentials) -> List[Dict[str, Any]]: 
+        """Las series se listan, buscan y crean en la cuenta de la empresa (sus llaves), nunca en la del servicio."""
         pass
 
     @abstractmethod
-    async def get_default_series(self, company_uid: str) -> Optional[Dict[str, Any]]:
+    async def get_default_series(self, company_uid: str, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
         pass 
 
     @abstractmethod
-    async def get_series_by_name(self, series_name: str) -> Optional[Dict[str, Any]]: 
+    async def get_series_by_name(self, series_name: str, company_uid: str, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]: 
         pass
     
     @abstractmethod
-    async def create_series(self, company_uid: str, series_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def create_series(
+        self,
+        company_uid: str,
+        series_data: List[Dict[str, Any]],
+        credentials: FacturaCredentials
+    ) -> List[Dict[str, Any]]:
+        """Un resultado por serie pedida: {"name", "created", "series", "error"}; un fallo parcial no oculta las ya creadas."""
         pass 
     
\ No newline at end of file
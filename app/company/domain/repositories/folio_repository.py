@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+FolioRange = Tuple[int, int]
+
+class FolioRepository(ABC):
+
+    @abstractmethod
+    async def seed(self, company_id: str, series_name: str, last_used: int) -> None:
+        """Garantiza que el contador de la serie arranque al menos en `last_used`; nunca lo hace retroceder."""
+        pass
+
+    @abstractmethod
+    async def reserve(self, company_id: str, series_name: str, count: int) -> FolioRange:
+        """Reserva de forma atómica `count` folios consecutivos y devuelve el rango (inicio, fin) inclusivo."""
+        pass
+
+    @abstractmethod
+    async def record_gaps(self, company_id: str, series_name: str, ranges: List[FolioRange], reason: str) -> None:
+        pass
@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+@dataclass
+class OnboardingState:
+    onboarding_id: str
+    company_id: str
+    status: str = IN_PROGRESS
+    steps: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+
+class OnboardingRepository(ABC):
+
+    @abstractmethod
+    async def start(self, onboarding_id: str) -> OnboardingState:
+        """Devuelve el onboarding existente o crea uno nuevo con el id de compañía ya asignado."""
+        pass
+
+    @abstractmethod
+    async def complete_step(self, onboarding_id: str, step: str, output: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def finish(self, onboarding_id: str, result: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def record_error(self, onboarding_id: str, error: str) -> None:
+        pass
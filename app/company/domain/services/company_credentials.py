@@ -0,0 +1,56 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ..entities.company import Company
+from ..repositories.credential_repository import CredentialRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FacturaCredentials:
+    """Llaves de la cuenta de Factura.com de una empresa, ya descifradas.
+
+    `account` identifica la cuenta: series y receptores solo existen en la cuenta que los creó.
+    """
+    api_key: str
+    secret_key: str
+    account: str
+
+
+class CompanyCredentialResolver:
+    """Descifra las llaves de Factura.com de cada empresa una sola vez por proceso.
+
+    La llave del cache incluye el valor cifrado, así una rotación no sigue usando las viejas.
+    """
+
+    def __init__(self, credential_repository: CredentialRepository):
+        self.credential_repository = credential_repository
+        self._credentials: Dict[str, Tuple[Tuple[str, str], FacturaCredentials]] = {}
+
+    async def for_company(self, company: Company) -> Optional[FacturaCredentials]:
+        metadata = company.metadata
+        if not metadata.api_key or not metadata.api_secret:
+            return None
+
+        encrypted = (metadata.api_key, metadata.api_secret)
+        cached = self._credentials.get(company.id)
+        if cached is not None and cached[0] == encrypted:
+            return cached[1]
+
+        credentials = await self.from_encrypted(
+            {"api_key": metadata.api_key, "secret_key": metadata.api_secret},
+            self.account_of(company)
+        )
+        self._credentials[company.id] = (encrypted, credentials)
+        return credentials
+
+    async def from_encrypted(self, encrypted_credentials: Dict[str, Any], account: str) -> FacturaCredentials:
+        decrypted = await self.credential_repository.decrypt_credentials(encrypted_credentials)
+        return FacturaCredentials(decrypted["api_key"], decrypted["secret_key"], account)
+
+    @staticmethod
+    def account_of(company: Company) -> str:
+        # El UID de la cuenta en Factura.com; las empresas previas a guardarlo se identifican por su id
+        return company.metadata.thp_fc_uid or company.id
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from ..repositories.folio_repository import FolioRepository
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[str, str]
+
+
+@dataclass
+class FolioBlock:
+    next: int
+    end: int
+
+    @property
+    def exhausted(self) -> bool:
+        return self.next > self.end
+
+
+class FolioAllocator:
+    """Asigna folios únicos por serie reservando bloques de `block_size` con un `$inc` atómico.
+
+    Cada proceso consume su bloque en memoria, así que los folios son únicos y crecientes por proceso
+    pero se intercalan entre workers. Lo que quede sin usar al apagar se registra como hueco.
+    """
+
+    def __init__(self, repository: FolioRepository, block_size: int):
+        self.repository = repository
+        self.block_size = max(1, block_size)
+        self._blocks: Dict[SeriesKey, FolioBlock] = {}
+        self._locks: Dict[SeriesKey, asyncio.Lock] = {}
+        self._seeded: set = set()
+
+    async def allocate(self, company_id: str, series_name: str, initial_folio: int = 1) -> int:
+        key = (company_id, series_name)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        async with lock:
+            block = self._blocks.get(key)
+            if block is None or block.exhausted:
+                block = self._blocks[key] = await self._reserve(company_id, series_name, initial_folio)
+
+            folio = block.next
+            block.next += 1
+            return folio
+
+    async def discard(self, company_id: str, series_name: str, folio: int, reason: str):
+        """Registra como hueco un folio asignado que no llegó a usarse en un CFDI emitido."""
+        await self.repository.record_gaps(company_id, series_name, [(folio, folio)], reason)
+
+    async def release_unused(self):
+        """Registra como huecos los folios reservados que no se usaron; se llama al apagar."""
+        pending = [(key, block) for key, block in self._blocks.items() if not block.exhausted]
+        self._blocks.clear()
+
+        for (company_id, series_name), block in pending:
+            try:
+                await self.repository.record_gaps(company_id, series_name, [(block.next, block.end)], "unused_reservation")
+                logger.info(f"Folios {block.next}-{block.end} de {company_id}/{series_name} registrados como hueco")
+            except Exception as e:
+                logger.error(f"No se pudieron registrar huecos de {company_id}/{series_name}: {str(e)}")
+
+    async def _reserve(self, company_id: str, series_name: str, initial_folio: int) -> FolioBlock:
+        key = (company_id, series_name)
+        if key not in self._seeded:
+            # El contador arranca en el folio inicial de la serie; $max lo hace idempotente
+            await self.repository.seed(company_id, series_name, initial_folio - 1)
+            self._seeded.add(key)
+
+        start, end = await self.repository.reserve(company_id, series_name, self.block_size)
+        logger.info(f"Reservado bloque de folios {start}-{end} para {company_id}/{series_name}")
+        return FolioBlock(start, end)
@@ -6,13 +6,15 @@ from ...application.use_cases.create_company_use_case import CreateCompanyUseCas
 from ...application.use_cases.get_company_by_id_use_case import GetCompanyByIdUseCase
 from ...application.use_cases.update_company_use_case import UpdateCompanyUseCase
 from ...application.use_cases.delete_company_use_case import DeleteCompanyUseCase
+from ...application.use_cases.upload_certificate_use_case import UploadCertificateUseCase
 
 from ...application.dtos.create_company_dto import CreateCompanyDTO
 from ...application.dtos.company_response import CompanyResponseDTO
 from ...application.dtos.update_company_dto import UpdateCompanyDTO
 
 from shared.responses import SuccessResponse
-from shared.exceptions import BusinessException, NotFoundException
+from shared.infrastructure.monitoring.server_timing import timed
+from shared.exceptions import BusinessException, NotFoundException, ValidationException
 
 class CompanyController: 
     def __init__(
@@ -20,12 +22,14 @@ class CompanyController:
         create_company_use_case: CreateCompanyUseCase,
         get_company_by_id_use_case: GetCompanyByIdUseCase, 
         update_company_use_case: UpdateCompanyUseCase,
-        delete_company_use_case: DeleteCompanyUseCase
+        delete_company_use_case: DeleteCompanyUseCase,
+        upload_certificate_use_case: UploadCertificateUseCase
     ): 
         self.create_company_use_case = create_company_use_case
         self.get_company_by_id_use_case = get_company_by_id_use_case
         self.update_company_use_case = update_company_use_case
         self.delete_company_use_case = delete_company_use_case
+        self.upload_certificate_use_case = upload_certificate_use_case
         
         
     async def create_company(self, company_dto: CreateCompanyDTO) -> SuccessResponse:
@@ -34,17 +38,18 @@ class CompanyController:
             
             company = await self.create_company_use_case.execute(company_dto)
             
-            company_response = CompanyResponseDTO(
-                tenant_id=company.tenant_id, 
-                business_name=company.business_name, 
-                trade_name=company.trade_name, 
-                source=company.source, 
-                contact=company.contact, 
-                fiscal_data=company.fiscal_data, 
-                emails=company.emails, 
-                configs=company.configs, 
-                metadata=company.metadata
-            )
+            with timed("serialization"):
+                company_response = CompanyResponseDTO(
+                    tenant_id=company.tenant_id, 
+                    business_name=company.business_name, 
+                    trade_name=company.trade_name, 
+                    source=company.source, 
+                    contact=company.contact, 
+                    fiscal_data=company.fiscal_data, 
+                    emails=company.emails, 
+                    configs=company.configs, 
+                    metadata=company.metadata
+                )
 
             return SuccessResponse(
                 data=company_response, 
@@ -69,17 +74,18 @@ class CompanyController:
         try: 
             company = await self.get_company_by_id_use_case.execute(company_id)
             
-            company_response = CompanyResponseDTO(
-                tenant_id=company.tenant_id, 
-                business_name=company.business_name, 
-                trade_name=company.trade_name, 
-                source=company.source, 
-                contact=company.contact, 
-                fiscal_data=company.fiscal_data, 
-                emails=company.emails, 
-                configs=company.configs, 
-                metadata=company.metadata
-            )
+            with timed("serialization"):
+                company_response = CompanyResponseDTO(
+                    tenant_id=company.tenant_id, 
+                    business_name=company.business_name, 
+                    trade_name=company.trade_name, 
+                    source=company.source, 
+                    contact=company.contact, 
+                    fiscal_data=company.fiscal_data, 
+                    emails=company.emails, 
+                    configs=company.configs, 
+                    metadata=company.metadata
+                )
 
             return SuccessResponse(
                 data=company_response, 
@@ -104,17 +110,18 @@ class CompanyController:
             company = await self.update_company_use_case.execute(company_id, company_dto)
             print(company)
 
-            company_response = CompanyResponseDTO(
-                tenant_id=company.tenant_id, 
-                business_name=company.business_name, 
-                trade_name=company.trade_name, 
-                source=company.source, 
-                contact=company.contact, 
-                fiscal_data=company.fiscal_data, 
-                emails=company.emails, 
-                configs=company.configs, 
-                metadata=company.metadata
-            )
+            with timed("serialization"):
+                company_response = CompanyResponseDTO(
+                    tenant_id=company.tenant_id, 
+                    business_name=company.business_name, 
+                    trade_name=company.trade_name, 
+                    source=company.source, 
+                    contact=company.contact, 
+                    fiscal_data=company.fiscal_data, 
+                    emails=company.emails, 
+                    configs=company.configs, 
+                    metadata=company.metadata
+                )
 
             return SuccessResponse(
                 data=company_response, 
@@ -159,4 +166,26 @@ class CompanyController:
                 detail=f"Internal Server Error: {str(e)}"
             ) 
     
-    
\ No newline at end of file
+    
+
+    async def upload_certificate(self, field: str, data: bytes) -> SuccessResponse:
+
+        try:
+            reference = await self.upload_certificate_use_case.execute(field, data)
+
+            return SuccessResponse(
+                data=reference,
+                message="Certificate stored successfully",
+                status_code=status.HTTP_201_CREATED
+            )
+
+        except ValidationException as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal Server Error: {str(e)}"
+            )
@@ -1,12 +1,20 @@
-from functools import lru_cache
-from config.database import get_database 
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from config.database import get_database
 from ..domain.repositories.company_repository import CompanyRepository 
 from ..infrastructure.repositories.mongodb_company_repository import MongoDBCompanyRepository
+from ..domain.repositories.folio_repository import FolioRepository
+from ..infrastructure.repositories.mongodb_folio_repository import MongoDBFolioRepository
+from ..domain.services.folio_allocator import FolioAllocator
+from ..domain.services.company_credentials import CompanyCredentialResolver
+from ..domain.repositories.onboarding_repository import OnboardingRepository
+from ..infrastructure.repositories.mongodb_onboarding_repository import MongoDBOnboardingRepository
 
 from ..application.use_cases.create_company_use_case import CreateCompanyUseCase 
 from ..application.use_cases.get_company_by_id_use_case import GetCompanyByIdUseCase
 from ..application.use_cases.update_company_use_case import UpdateCompanyUseCase
 from ..application.use_cases.delete_company_use_case import DeleteCompanyUseCase
+from ..application.use_cases.upload_certificate_use_case import UploadCertificateUseCase
 
 from .controllers.company_controller import CompanyController
 
@@ -15,60 +23,127 @@ from ..domain.repositories.external_company_repository import ExternalCompanyRep
 from ..domain.repositories.credential_repository import CredentialRepository
 from ..application.use_cases.sync_company_with_factura_use_case import SyncCompanyWithFacturaUseCase
 from .security.company_credential_service import CompanyCredentialService
-from shared.infrastructure.security.crypto_service import CrytoService
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.domain.repositories.encryption_service import EncryptionService
+from shared.domain.repositories.lease_repository import LeaseRepository
+from shared.infrastructure.container import Container, Scope, container
+from shared.infrastructure.dependencies import lookup_batch_window
 
 
-@lru_cache()
+def register(container: Container):
+    container.on_startup(_ensure_indexes)
+
+    container.register(
+        CompanyRepository,
+        lambda c: MongoDBCompanyRepository(
+            c.resolve(AsyncIOMotorDatabase),
+            batch_window_seconds=lookup_batch_window(),
+            max_batch_size=settings.mongo_lookup_max_batch_size
+        ),
+        Scope.PROCESS
+    )
+    container.register(
+        ExternalCompanyRepository,
+        lambda c: FacturaClientAdapter(),
+        Scope.PROCESS,
+        on_shutdown=lambda adapter: adapter.close()
+    )
+    container.register(
+        FolioRepository,
+        lambda c: MongoDBFolioRepository(c.resolve(AsyncIOMotorDatabase)),
+        Scope.PROCESS
+    )
+    container.register(
+        FolioAllocator,
+        lambda c: FolioAllocator(c.resolve(FolioRepository), settings.folio_block_size),
+        Scope.PROCESS,
+        on_shutdown=lambda allocator: allocator.release_unused()
+    )
+    container.register(
+        OnboardingRepository,
+        lambda c: MongoDBOnboardingRepository(c.resolve(AsyncIOMotorDatabase)),
+        Scope.PROCESS
+    )
+    container.register(
+        CredentialRepository,
+        lambda c: CompanyCredentialService(c.resolve(EncryptionService))
+    )
+    container.register(
+        CompanyCredentialResolver,
+        lambda c: CompanyCredentialResolver(c.resolve(CredentialRepository)),
+        Scope.PROCESS
+    )
+
+    container.register(
+        SyncCompanyWithFacturaUseCase,
+        lambda c: SyncCompanyWithFacturaUseCase(
+            c.resolve(CompanyRepository),
+            c.resolve(ExternalCompanyRepository),
+            c.resolve(CredentialRepository),
+            c.resolve(CompanyCredentialResolver),
+            c.resolve(OnboardingRepository),
+            c.resolve(BlobStorage),
+            credentials_attempts=settings.onboarding_credentials_attempts,
+            credentials_delay_seconds=settings.onboarding_credentials_delay_seconds,
+            lease_repository=c.resolve(LeaseRepository),
+            lease_ttl_seconds=settings.onboarding_lease_ttl_seconds
+        ),
+        Scope.PROCESS
+    )
+    container.register(CreateCompanyUseCase, lambda c: CreateCompanyUseCase(c.resolve(CompanyRepository)), Scope.PROCESS)
+    container.register(GetCompanyByIdUseCase, lambda c: GetCompanyByIdUseCase(c.resolve(CompanyRepository)), Scope.PROCESS)
+    container.register(UpdateCompanyUseCase, lambda c: UpdateCompanyUseCase(c.resolve(CompanyRepository)), Scope.PROCESS)
+    container.register(DeleteCompanyUseCase, lambda c: DeleteCompanyUseCase(c.resolve(CompanyRepository)), Scope.PROCESS)
+    container.register(
+        UploadCertificateUseCase,
+        lambda c: UploadCertificateUseCase(c.resolve(BlobStorage), settings.certificate_upload_max_bytes),
+        Scope.PROCESS
+    )
+
+    container.register(
+        CompanyController,
+        lambda c: CompanyController(
+            create_company_use_case=c.resolve(CreateCompanyUseCase), 
+            get_company_by_id_use_case=c.resolve(GetCompanyByIdUseCase), 
+            update_company_use_case=c.resolve(UpdateCompanyUseCase),
+            delete_company_use_case=c.resolve(DeleteCompanyUseCase),
+            upload_certificate_use_case=c.resolve(UploadCertificateUseCase)
+        ),
+        Scope.PROCESS
+    )
+
+async def _ensure_indexes():
+    await MongoDBCompanyRepository.ensure_indexes(get_database())
+
 def get_sync_company_use_case() -> SyncCompanyWithFacturaUseCase:
-    company_repository = get_company_repository()
-    external_company_repository = get_external_company_repository()
-    credential_repository = get_credential_repository()
-    return SyncCompanyWithFacturaUseCase(company_repository, external_company_repository, credential_repository)
+    return container.resolve(SyncCompanyWithFacturaUseCase)
 
-@lru_cache()
 def get_company_repository() -> CompanyRepository: 
-    database = get_database()
-    return MongoDBCompanyRepository(database)
+    return container.resolve(CompanyRepository)
 
-@lru_cache()
 def get_create_company_use_case() -> CreateCompanyUseCase: 
-    company_repository = get_company_repository()
-    return CreateCompanyUseCase(company_repository)
+    return container.resolve(CreateCompanyUseCase)
 
-@lru_cache()
 def get_get_company_by_id_use_case() -> GetCompanyByIdUseCase: 
-    company_repository = get_company_repository()
-    return GetCompanyByIdUseCase(company_repository)
+    return container.resolve(GetCompanyByIdUseCase)
 
-@lru_cache()
 def get_update_company_use_case() -> UpdateCompanyUseCase: 
-    company_repository = get_company_repository()
-    return UpdateCompanyUseCase(company_repository)
+    return container.resolve(UpdateCompanyUseCase)
 
-@lru_cache()
 def get_delete_company_use_case() -> DeleteCompanyUseCase: 
-    company_repository = get_company_repository()
-    return DeleteCompanyUseCase(company_repository)
+    return container.resolve(DeleteCompanyUseCase)
 
-@lru_cache()
 def get_external_company_repository() -> ExternalCompanyRepository:
-    return FacturaClientAdapter()
+    return container.resolve(ExternalCompanyRepository)
 
-@lru_cache()
 def get_credential_repository() -> CredentialRepository: 
-    encryption_service = CrytoService()
-    return CompanyCredentialService(encryption_service)
+    return container.resolve(CredentialRepository)
 
-@lru_cache() 
 def get_company_controller() -> CompanyController: 
-    create_company_use_case = get_create_company_use_case()
-    get_company_use_case = get_get_company_by_id_use_case()
-    update_company_use_case = get_update_company_use_case()
-    delete_company_use_case = get_delete_company_use_case()
-    
-    return CompanyController(
-        create_company_use_case=create_company_use_case, 
-        get_company_by_id_use_case=get_company_use_case, 
-        update_company_use_case=update_company_use_case,
-        delete_company_use_case = delete_company_use_case
-    )
\ No newline at end of file
+    return container.resolve(CompanyController)
+
+def get_folio_allocator() -> FolioAllocator: 
+    return container.resolve(FolioAllocator)
+
+def get_company_credential_resolver() -> CompanyCredentialResolver:
+    return container.resolve(CompanyCredentialResolver)
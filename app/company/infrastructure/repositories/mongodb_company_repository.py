@@ -1,19 +1,49 @@
 from typing import List, Optional, Dict, Union, Any
+from functools import partial
 from bson import ObjectId 
+from bson.errors import InvalidId
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase 
+from pymongo import UpdateOne
+import logging
 
 from ...domain.entities.company import Company 
+from ...domain.entities.series import Series
 from ...domain.repositories.company_repository import CompanyRepository
 
 from shared.exceptions import BusinessException
+from shared.infrastructure.monitoring.server_timing import timed_call
+from shared.infrastructure.repositories.data_loader import DataLoader
+
+logger = logging.getLogger(__name__)
+
+# Las series viven en `company_series`; los documentos legados aún pueden traerlas embebidas
+WITHOUT_SERIES = {"series": 0}
 
 class MongoDBCompanyRepository(CompanyRepository): 
     
-    def __init__(self, database: AsyncIOMotorDatabase): 
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        batch_window_seconds: Optional[float] = None,
+        max_batch_size: int = 200
+    ): 
         self.database = database 
         self.collection = database.company
+        self.series_collection = database["company_series"]
+        # Con ventana, los get_by_id concurrentes salen como un solo find con $in
+        self._companies_by_id = (
+            DataLoader(self._load_companies, batch_window_seconds, max_batch_size)
+            if batch_window_seconds is not None else None
+        )
+
+    @staticmethod
+    async def ensure_indexes(database: AsyncIOMotorDatabase):
+        series_collection = database["company_series"]
+        await series_collection.create_index([("company_id", 1), ("name", 1)], unique=True, name="company_series_name")
+        await series_collection.create_index([("company_id", 1), ("type", 1)], name="company_series_type")
 
+    @timed_call("mongo")
     async def create(self, company: Union[Company, Dict[str, Any]]) -> Company: 
         if isinstance(company, dict):
             company_dict = company.copy()
@@ -24,62 +54,119 @@ class MongoDBCompanyRepository(CompanyRepository):
         else:
             raise TypeError(f"company debe ser Company o dict, recibido: {type(company)}")
         
-        if 'series' in company_dict: 
-            for serie in company_dict['series']: 
-                if 'createdAt' not in serie: 
-                    serie['createdAt'] = datetime.now(timezone.utc).isoformat()
-                if 'updatedAt' not in serie: 
-                    serie['updatedAt'] = datetime.now(timezone.utc).isoformat()
+        if isinstance(company_dict.get("_id"), str):
+            company_dict["_id"] = ObjectId(company_dict["_id"])
+
+        series = company_dict.pop('series', None) or []
         
         result = await self.collection.insert_one(company_dict)
-        created_company = await self.collection.find_one({"_id": result.inserted_id})
-
-        if created_company and "_id" in created_company: 
-            created_company["_id"] = str(created_company["_id"])
+        if series:
+            await self.add_series(str(result.inserted_id), series)
 
-        return Company(**created_company)
+        created_company = await self.collection.find_one({"_id": result.inserted_id}, WITHOUT_SERIES)
+        return self._to_entity(created_company)
 
+    @timed_call("mongo")
     async def get_by_id(self, company_id) -> Optional[Company]:
         try: 
             object_id = ObjectId(company_id)
-            company_doc = await self.collection.find_one({"_id": object_id})
+            if self._companies_by_id:
+                company_doc = await self._companies_by_id.load(object_id)
+            else:
+                company_doc = await self.collection.find_one({"_id": object_id}, WITHOUT_SERIES)
             
             if company_doc: 
-                company_doc["_id"] = str(company_doc["_id"])
-                return Company(**company_doc)
+                # El documento puede ser compartido con otros llamadores del mismo lote
+                return self._to_entity(dict(company_doc))
             
             return None
         except Exception: 
             return None
 
+    async def _load_companies(self, object_ids: List[ObjectId]) -> Dict[ObjectId, Dict[str, Any]]:
+        company_docs = await self.collection.find({"_id": {"$in": object_ids}}, WITHOUT_SERIES).to_list(length=None)
+        return {company_doc["_id"]: company_doc for company_doc in company_docs}
+
+    @timed_call("mongo")
+    async def get_fields(self, company_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        try:
+            object_id = ObjectId(company_id)
+        except (InvalidId, TypeError):
+            return None
+
+        company_doc = await self.collection.find_one({"_id": object_id}, {field: 1 for field in fields})
+        if company_doc:
+            company_doc["_id"] = str(company_doc["_id"])
+        return company_doc
+
+    @timed_call("mongo")
+    async def get_series(self, company_id: str) -> List[Series]:
+        series_docs = await self.series_collection.find(
+            {"company_id": company_id},
+            {"_id": 0, "company_id": 0}
+        ).to_list(length=None)
+
+        if not series_docs:
+            series_docs = await self._migrate_embedded_series(company_id)
+
+        return [Series(**serie) for serie in series_docs]
+
+    @timed_call("mongo")
+    async def add_series(self, company_id: str, series: List[Dict[str, Any]]) -> None:
+        if not series:
+            return
+
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for serie in series:
+            serie_doc = {key: value for key, value in serie.items() if key != "_id"}
+            created_at = serie_doc.pop("createdAt", now)
+            serie_doc.setdefault("updatedAt", now)
+            serie_doc["company_id"] = company_id
+
+            # Upsert por (compañía, nombre): repetir la operación no duplica series
+            operations.append(UpdateOne(
+                {"company_id": company_id, "name": serie_doc.get("name")},
+                {"$set": serie_doc, "$setOnInsert": {"createdAt": created_at}},
+                upsert=True
+            ))
+
+        await self.series_collection.bulk_write(operations, ordered=False)
+
+    @timed_call("mongo")
     async def update(self, company_id: str, update_data: dict) -> Company:
 
         try: 
             object_id = ObjectId(company_id)
         
-            existing_company = await self.collection.find_one({"_id": object_id})
+            existing_company = await self.collection.find_one({"_id": object_id}, {"emails": 1})
             if not existing_company:
                 return None
             
             if 'emails' in update_data and update_data['emails']:
                 existing_emails = existing_company.get('emails', {})
                 update_data['emails'] = {**existing_emails, **update_data['emails']}
+
+            series = update_data.pop('series', None)
+            if series:
+                await self.add_series(company_id, series)
             
-            result = await self.collection.update_one(
-                {"_id": object_id}, 
-                {"$set": update_data}
-            )
+            if update_data:
+                await self.collection.update_one(
+                    {"_id": object_id}, 
+                    {"$set": update_data}
+                )
             
-            updated_company = await self.collection.find_one({"_id": object_id})
+            updated_company = await self.collection.find_one({"_id": object_id}, WITHOUT_SERIES)
             if updated_company: 
-                updated_company["_id"] = str(updated_company["_id"])
-                return Company(**updated_company)
+                return self._to_entity(updated_company)
             return None
             
             
         except Exception as e: 
             raise BusinessException(f"Error updating company: {str(e)}")
 
+    @timed_call("mongo")
     async def delete(self, company_id):
 
         try: 
@@ -88,8 +175,33 @@ class MongoDBCompanyRepository(CompanyRepository):
             result = await self.collection.delete_one({
                 "_id" : object_id
             })
+            await self.series_collection.delete_many({"company_id": company_id})
             
             return result.deleted_count > 0 
         
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    async def _migrate_embedded_series(self, company_id: str) -> List[Dict[str, Any]]:
+        """Mueve las series embebidas de un documento legado a `company_series` la primera vez que se leen."""
+        try:
+            object_id = ObjectId(company_id)
+        except (InvalidId, TypeError):
+            return []
+
+        company_doc = await self.collection.find_one({"_id": object_id}, {"series": 1})
+        legacy_series = (company_doc or {}).get("series") or []
+        if not legacy_series:
+            return []
+
+        await self.add_series(company_id, legacy_series)
+        await self.collection.update_one({"_id": object_id}, {"$unset": {"series": ""}})
+        logger.info(f"Migradas {len(legacy_series)} series embebidas de la empresa {company_id}")
+        return legacy_series
+
+    def _to_entity(self, company_doc: Dict[str, Any]) -> Company:
+        company_doc["_id"] = str(company_doc["_id"])
+        company_doc.pop("series", None)
+        company = Company(**company_doc)
+        company.bind_series_loader(partial(self.get_series, company_doc["_id"]))
+        return company
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from typing import List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from ...domain.repositories.folio_repository import FolioRange, FolioRepository
+from shared.infrastructure.monitoring.server_timing import timed_call
+
+class MongoDBFolioRepository(FolioRepository):
+    """Un contador por serie en `folio_counters` (`last_folio` = último folio reservado) y huecos en `folio_gaps`."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.counters = database["folio_counters"]
+        self.gaps = database["folio_gaps"]
+
+    @timed_call("mongo")
+    async def seed(self, company_id: str, series_name: str, last_used: int) -> None:
+        await self.counters.update_one(
+            {"_id": self._key(company_id, series_name)},
+            {
+                "$max": {"last_folio": last_used},
+                "$setOnInsert": {"company_id": company_id, "series": series_name}
+            },
+            upsert=True
+        )
+
+    @timed_call("mongo")
+    async def reserve(self, company_id: str, series_name: str, count: int) -> FolioRange:
+        counter = await self.counters.find_one_and_update(
+            {"_id": self._key(company_id, series_name)},
+            {
+                "$inc": {"last_folio": count},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+                "$setOnInsert": {"company_id": company_id, "series": series_name}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        end = counter["last_folio"]
+        return end - count + 1, end
+
+    @timed_call("mongo")
+    async def record_gaps(self, company_id: str, series_name: str, ranges: List[FolioRange], reason: str) -> None:
+        if not ranges:
+            return
+
+        now = datetime.now(timezone.utc)
+        await self.gaps.insert_many([
+            {
+                "company_id": company_id,
+                "series": series_name,
+                "start": start,
+                "end": end,
+                "reason": reason,
+                "created_at": now
+            }
+            for start, end in ranges
+        ])
+
+    @staticmethod
+    def _key(company_id: str, series_name: str) -> str:
+        return f"{company_id}:{series_name}"
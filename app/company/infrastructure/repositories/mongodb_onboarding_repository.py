@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from ...domain.repositories.onboarding_repository import COMPLETED, IN_PROGRESS, OnboardingRepository, OnboardingState
+from shared.infrastructure.monitoring.server_timing import timed_call
+
+class MongoDBOnboardingRepository(OnboardingRepository):
+    """Un documento por onboarding en `company_onboarding`; `steps.<paso>` guarda la salida de cada paso completado."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database["company_onboarding"]
+
+    @timed_call("mongo")
+    async def start(self, onboarding_id: str) -> OnboardingState:
+        now = datetime.now(timezone.utc)
+        document = await self.collection.find_one_and_update(
+            {"_id": onboarding_id},
+            {
+                "$setOnInsert": {
+                    "company_id": str(ObjectId()),
+                    "status": IN_PROGRESS,
+                    "steps": {},
+                    "created_at": now
+                },
+                "$set": {"updated_at": now},
+                "$inc": {"attempts": 1}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        return OnboardingState(
+            onboarding_id=onboarding_id,
+            company_id=document["company_id"],
+            status=document.get("status", IN_PROGRESS),
+            steps={step: value.get("output") for step, value in (document.get("steps") or {}).items()},
+            result=document.get("result")
+        )
+
+    @timed_call("mongo")
+    async def complete_step(self, onboarding_id: str, step: str, output: Any) -> None:
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"_id": onboarding_id},
+            {"$set": {f"steps.{step}": {"output": output, "completed_at": now}, "updated_at": now}}
+        )
+
+    @timed_call("mongo")
+    async def finish(self, onboarding_id: str, result: Dict[str, Any]) -> None:
+        await self.collection.update_one(
+            {"_id": onboarding_id},
+            {
+                "$set": {"status": COMPLETED, "result": result, "updated_at": datetime.now(timezone.utc)},
+                "$unset": {"last_error": ""}
+            }
+        )
+
+    @timed_call("mongo")
+    async def record_error(self, onboarding_id: str, error: str) -> None:
+        await self.collection.update_one(
+            {"_id": onboarding_id},
+            {"$set": {"last_error": error, "updated_at": datetime.now(timezone.utc)}}
+        )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status 
+from fastapi import APIRouter, Depends, File, Form, UploadFile, status 
 
 from ..controllers.company_controller import CompanyController 
 from ...application.dtos.create_company_dto import CreateCompanyDTO 
@@ -7,6 +7,7 @@ from ...application.dtos.update_company_dto import UpdateCompanyDTO
 
 from ..dependencies import get_company_controller 
 
+from config.settings import settings
 from shared.responses import SuccessResponse 
 
 router = APIRouter(prefix="/api/v1/invoicing/companies", tags=["companies"])
@@ -21,6 +22,22 @@ router = APIRouter(prefix="/api/v1/invoicing/companies", tags=["companies"])
 async def create_company(company_dto: CreateCompanyDTO, controller: CompanyController = Depends(get_company_controller)):
     return await controller.create_company(company_dto)
 
+@router.post(
+    "/certificates", 
+    response_model=SuccessResponse, 
+    status_code=status.HTTP_201_CREATED, 
+    summary="Upload certificate", 
+    description="Store a FIEL/CSD certificate and return the blob reference to send in the company event"
+)
+async def upload_certificate(
+    field: str = Form(..., description="fiel_cer, fiel_key, csd_cer o csd_key"),
+    file: UploadFile = File(...),
+    controller: CompanyController = Depends(get_company_controller)
+):
+    # Se lee un byte de más para detectar archivos sobre el límite sin cargarlos completos
+    data = await file.read(settings.certificate_upload_max_bytes + 1)
+    return await controller.upload_certificate(field, data)
+
 @router.get(
     "/{company_id}", 
     response_model=SuccessResponse[CompanyResponseDTO], 
@@ -1,6 +1,8 @@
 import httpx
 from typing import Dict, Any, List
 from config.settings import settings
+from shared.exceptions import ServiceUnavailableException
+from shared.infrastructure.services.factura_http import build_factura_http_client
 import json
 import base64
 import logging 
@@ -13,7 +15,7 @@ class FacturaClient:
         self.secret_key = settings.factura_com_secret_key
         self.base_url = settings.factura_com_api_url
         self.plugin_key = "9d4095c8f7ed5785cb14c0e3b033eeb8252416ed"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = build_factura_http_client()
 
     async def create_company(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
@@ -43,6 +45,8 @@ class FacturaClient:
             
             return result
                 
+        except ServiceUnavailableException:
+            raise
         except httpx.HTTPError as e:
             error_msg = f"Error calling Factura.com API: {str(e)}"
             if hasattr(e, 'response') and e.response:
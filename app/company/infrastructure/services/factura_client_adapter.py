@@ -1,15 +1,27 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Optional, List, Tuple, Union
 import httpx
 import json
+import base64
+import binascii
 import logging
 import asyncio 
+import uuid
 
 from config.settings import settings
+from shared.infrastructure.services.factura_http import build_factura_http_client
+from .series_cache import SeriesCache, SeriesIndex
 from ...domain.repositories.external_company_repository import ExternalCompanyRepository
 from ...domain.entities.series import Series
+from ...domain.services.company_credentials import FacturaCredentials
+from shared.domain.services.certificate_claim_check import CertificateSource
+from shared.exceptions import ServiceUnavailableException, ValidationException
 
 logger = logging.getLogger(__name__)
 
+CERTIFICATE_FIELDS = ("fiel_cer_b64", "fiel_key_b64", "csd_cer_b64", "csd_key_b64")
+
+CertificatePart = Union[bytes, CertificateSource]
+
 class FacturaClientAdapter(ExternalCompanyRepository):  
     
     def __init__(self):
@@ -17,7 +29,11 @@ class FacturaClientAdapter(ExternalCompanyRepository):
         self.secret_key = settings.factura_com_secret_key
         self.base_url = settings.factura_com_api_url
         self.plugin_key = "9d4095c8f7ed5785cb14c0e3b033eeb8252416ed"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = build_factura_http_client()
+        self.series_cache = SeriesCache(
+            settings.factura_series_cache_ttl_seconds,
+            max_accounts=settings.factura_series_cache_max_accounts
+        )
 
     async def create_company(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
@@ -27,21 +43,30 @@ class FacturaClientAdapter(ExternalCompanyRepository):
                 "F-PLUGIN": self.plugin_key
             }
             
-            data = {}
-            for key, value in form_data.items():
-                data[key] = str(value) if value is not None else ''
+            data, files = await self._build_company_form(form_data)
             
-            logger.info(f"Enviando datos a Factura.com: {json.dumps({k: v[:100] + '...' if k.endswith('_b64') and v and len(v) > 100 else v for k, v in data.items()}, indent=2)}")
+            logger.info(f"Enviando datos a Factura.com: {json.dumps(self._form_preview(data, files), indent=2)}")
             
-            response = await self.client.post(
-                f"{self.base_url}/account/create",
-                data=data, 
-                headers=headers
-            )
+            if files:
+                # Multipart armado a mano: los certificados del blob store se transmiten por partes
+                boundary = uuid.uuid4().hex
+                response = await self.client.post(
+                    f"{self.base_url}/account/create",
+                    content=self._multipart_body(boundary, data, files),
+                    headers={**headers, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+                )
+            else:
+                response = await self.client.post(
+                    f"{self.base_url}/account/create",
+                    data=data, 
+                    headers=headers
+                )
             
             response.raise_for_status()
             return response.json()
                 
+        except ServiceUnavailableException:
+            raise
         except httpx.HTTPError as e:
             error_msg = f"Error calling Factura.com API: {str(e)}"
             if hasattr(e, 'response') and e.response:
@@ -53,6 +78,107 @@ class FacturaClientAdapter(ExternalCompanyRepository):
             logger.error(f"ERROR inesperado: {str(e)}")
             raise Exception(f"Unexpected error: {str(e)}")
 
+    async def find_company(self, rfc: str) -> Optional[Dict[str, Any]]:
+        """Busca entre las cuentas creadas con las llaves del servicio la de ese RFC."""
+        headers = {
+            "F-API-KEY": self.api_key,
+            "F-SECRET-KEY": self.secret_key,
+            "F-PLUGIN": self.plugin_key
+        }
+
+        try:
+            response = await self.client.get(f"{self.base_url}/account/list", params={"rfc": rfc}, headers=headers)
+        except ServiceUnavailableException:
+            raise
+        except httpx.TransportError as e:
+            raise ServiceUnavailableException(f"Error de conexión buscando la cuenta {rfc}: {str(e)}")
+
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            # Sin poder confirmar que no existe no se vuelve a crear
+            raise ServiceUnavailableException(f"No se pudo verificar la cuenta {rfc} en Factura.com: {response.text[:200]}")
+
+        wanted = rfc.strip().upper()
+        for account in response.json().get("data", []):
+            if str(account.get("rfc") or account.get("RFC") or "").strip().upper() == wanted:
+                return {
+                    "acco_id": account.get("acco_id") or account.get("id"),
+                    "acco_uid": account.get("acco_uid") or account.get("uid")
+                }
+        return None
+
+    async def _build_company_form(self, form_data: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, Tuple[str, CertificatePart]]]:
+        data = {}
+        files = {}
+
+        for key, value in form_data.items():
+            if key in CERTIFICATE_FIELDS and value:
+                if settings.factura_certificate_upload_mode == "multipart":
+                    field_name = key[:-len("_b64")]
+                    extension = field_name.rsplit("_", 1)[-1]
+                    content = value if isinstance(value, CertificateSource) else self._certificate_bytes(key, value)
+                    files[field_name] = (f"{field_name}.{extension}", content)
+                elif isinstance(value, CertificateSource):
+                    # El formulario exige el base64 completo: aquí el blob sí se lee entero (ya verificado)
+                    data[key] = base64.b64encode(await value.read()).decode()
+                elif isinstance(value, str):
+                    data[key] = value
+                else:
+                    data[key] = base64.b64encode(value).decode()
+                continue
+
+            data[key] = str(value) if value is not None else ''
+
+        return data, files
+
+    @staticmethod
+    async def _multipart_body(boundary: str, data: Dict[str, str], files: Dict[str, Tuple[str, CertificatePart]]) -> AsyncIterator[bytes]:
+        for name, value in data.items():
+            yield (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+            ).encode() + value.encode() + b"\r\n"
+
+        for name, (filename, content) in files.items():
+            yield (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            if isinstance(content, CertificateSource):
+                # Si el sha256 no coincide el stream falla antes del cierre y la petición se aborta incompleta
+                async for chunk in content.chunks():
+                    yield chunk
+            else:
+                yield content
+            yield b"\r\n"
+
+        yield f"--{boundary}--\r\n".encode()
+
+    @staticmethod
+    def _certificate_bytes(key: str, value: Union[str, bytes, bytearray, memoryview]) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, (bytearray, memoryview)):
+            return bytes(value)
+
+        try:
+            return binascii.a2b_base64(value)
+        except binascii.Error as e:
+            raise ValidationException(f"Certificado {key} no es base64 válido: {str(e)}")
+
+    @staticmethod
+    def _form_preview(data: Dict[str, str], files: Dict[str, Tuple[str, CertificatePart]]) -> Dict[str, str]:
+        preview = {
+            key: f"{value[:100]}... ({len(value)} chars)" if len(value) > 100 else value
+            for key, value in data.items()
+        }
+        for field_name, (_, content) in files.items():
+            if isinstance(content, CertificateSource):
+                preview[field_name] = f"<blob {content.ref}>"
+            else:
+                preview[field_name] = f"<archivo {len(content)} bytes>"
+        return preview
+
     async def get_company_credentials(self, uid: str) -> Dict[str, Any]:
         try:
             logger.info(f"Obteniendo credenciales reales para UID: {uid}")
@@ -81,16 +207,24 @@ class FacturaClientAdapter(ExternalCompanyRepository):
             logger.error(error_msg)
             raise Exception(error_msg)
 
-    async def get_all_series(self) -> List[Dict[str, Any]]:
+    async def get_all_series(self, company_uid: str, credentials: FacturaCredentials) -> List[Dict[str, Any]]:
+        index = await self._series_index(company_uid, credentials)
+        return list(index.series)
+
+    async def _series_index(self, company_uid: str, credentials: FacturaCredentials, refresh: bool = False) -> SeriesIndex:
+        return await self.series_cache.get(
+            (credentials.account, company_uid),
+            lambda: self._fetch_series(credentials),
+            refresh=refresh
+        )
+
+    async def _fetch_series(self, credentials: FacturaCredentials) -> List[Dict[str, Any]]:
+        # Las series viven en la cuenta de la empresa: se listan con sus llaves, no con las del servicio
         try: 
-            headers = {
-                "F-API-KEY": self.api_key, 
-                "F-SECRET-KEY": self.secret_key, 
-                "F-PLUGIN": self.plugin_key
-            }
+            headers = self._account_headers(credentials)
 
             url = f"{self.base_url}/series"
-            logger.info("Obteniendo todas las series")
+            logger.info(f"Obteniendo todas las series de la cuenta {credentials.account}")
 
             response = await self.client.get(
                 url=url, 
@@ -106,7 +240,10 @@ class FacturaClientAdapter(ExternalCompanyRepository):
                 return series_data.get("data", [])
             else: 
                 logger.warning("No se pudieron obtener las series")
+                return []
 
+        except ServiceUnavailableException:
+            raise
         except httpx.HTTPError as e: 
             msg = f"Error obteniendo series de Factura.com: {str(e)}"
             if hasattr(e, 'response') and e.response: 
@@ -117,15 +254,14 @@ class FacturaClientAdapter(ExternalCompanyRepository):
             logger.error(f"Error inesperado obteniendo series: {str(e)}")
             raise
 
-    async def get_series_by_name(self, series_name: str) -> Optional[Dict[str, Any]]:
+    async def get_series_by_name(self, series_name: str, company_uid: str, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
         
         try: 
-            all_series = await self.get_all_series()
-            
-            for serie in all_series: 
-                if serie.get("SerieName") == series_name:
-                    logger.info(f"Serie encontrada por nombre '{series_name}': {serie}")
-                    return serie 
+            index = await self._series_index(company_uid, credentials)
+            serie = index.by_name.get(series_name)
+            if serie: 
+                logger.info(f"Serie encontrada por nombre '{series_name}': {serie}")
+                return serie 
                 
             logger.warning(f"No se encontró serie con nombre '{series_name}'")
             return None
@@ -134,111 +270,156 @@ class FacturaClientAdapter(ExternalCompanyRepository):
             logger.error(f"Error buscando serie por nombre: {str(e)}")
             raise
 
-    async def get_default_series(self, company_uid: str) -> Optional[Dict[str, Any]]:
+    async def get_default_series(self, company_uid: str, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
         
         try: 
             
-            all_series = await self.get_all_series()           
+            index = await self._series_index(company_uid, credentials)
+            serie = index.first_of_type("factura")
 
-            for serie in all_series:
-                if serie.get("SerieType") == "factura":
-                    logger.info(f"Serie por defecto encontrada: {serie}")
-                    return Series(
-                        serie_id = str(serie.get("SerieID")),
-                        name = serie.get("SerieName"),
-                        type = serie.get("SerieType"),
-                        description =  serie.get("SerieDescription"),
-                        status = serie.get("SerieStatus"),
-                        branch_id = None
-                    )
+            if serie and serie.get("SerieID"):
+                logger.info(f"Serie por defecto encontrada: {serie}")
+                return Series(
+                    serie_id = str(serie.get("SerieID")),
+                    name = serie.get("SerieName"),
+                    type = serie.get("SerieType"),
+                    description =  serie.get("SerieDescription"),
+                    status = serie.get("SerieStatus"),
+                    branch_id = None
+                )
 
             logger.warning("No se encontró serie de tipo 'factura' en las series por defecto")
             return None
-        
-        except  httpx.HTTPError as e: 
-            error = f"Error obteniendo series de Factura.com: {str(e)}"
-            if hasattr(e, 'response') and e.response:
-                error += f" - Response: {e.response.text}"
-            logger.error(error)
-            raise Exception(error)
             
         except Exception as e: 
             logger.error(f"Error inesperado obteniendo series: {str(e)}")
             raise
 
-    async def create_series(self, company_uid: str, series_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def create_series(
+        self,
+        company_uid: str,
+        series_data: List[Dict[str, Any]],
+        credentials: FacturaCredentials
+    ) -> List[Dict[str, Any]]:
         try:
             
-            headers = {
-                "F-API-KEY": self.api_key, 
-                "F-SECRET-KEY": self.secret_key, 
-                "F-PLUGIN": self.plugin_key, 
-                "Content-Type": "application/json"
+            headers = {**self._account_headers(credentials), "Content-Type": "application/json"}
+
+            names = [serie.get("name") for serie in series_data]
+
+            # La cuenta es de la empresa: una serie ya listada solo pudo crearla un intento previo de este onboarding
+            existing = await self._series_index(company_uid, credentials, refresh=True)
+            pending = [serie for serie in series_data if serie.get("name") not in existing.by_name]
+            if len(pending) < len(series_data):
+                logger.info(f"Series ya existentes en Factura.com, se reutilizan: {[n for n in names if n in existing.by_name]}")
+
+            # Las series se crean en paralelo (el bulkhead de series acota la concurrencia)
+            results = await asyncio.gather(
+                *(self._post_series(serie, headers) for serie in pending),
+                return_exceptions=True
+            )
+            self.series_cache.invalidate((credentials.account, company_uid))
+
+            if len(pending) == len(series_data) and results and all(isinstance(r, ServiceUnavailableException) for r in results):
+                # Nada quedó creado: se conserva el Retry-After para el reintento
+                raise results[0]
+
+            errors = {
+                serie.get("name"): str(result)
+                for serie, result in zip(pending, results)
+                if isinstance(result, BaseException)
             }
 
-            created_series = []
+            created = [name for name in names if name not in errors]
+            index = await self._reconcile_series(company_uid, credentials, created) if created else existing
+
+            outcomes = []
             for serie in series_data:
-                payload = {
-                    "letra": serie.get("name"),
-                    "tipoDocumento": serie.get("type", "factura"),
-                    "folio": serie.get("initial_folio", 1)
-                }
+                series_name = serie.get("name")
+                serie_info = index.by_name.get(series_name)
 
-                payload = {k: v for k, v in payload.items() if v is not None}
+                if series_name in errors or not serie_info or not serie_info.get("SerieID"):
+                    error = errors.get(series_name, "La serie no aparece en Factura.com tras crearla")
+                    logger.error(f"No se pudo crear la serie {series_name}: {error}")
+                    outcomes.append({"name": series_name, "created": False, "series": None, "error": error})
+                    continue
 
-                logger.info(f"Creando serie en Factura.com: {payload}")
+                outcomes.append({
+                    "name": series_name,
+                    "created": True,
+                    "series": {
+                        "serie_id": str(serie_info.get("SerieID")),
+                        "name": serie_info.get("SerieName"),
+                        "type": serie_info.get("SerieType"),
+                        "description": serie_info.get("SerieDescription", ""),
+                        "status": serie_info.get("SerieStatus", "Activa"),
+                        "branch_id": serie.get("branch_id"),
+                        "folio": serie.get("initial_folio", 1),
+                    },
+                    "error": None
+                })
 
-                response = await self.client.post(
-                    f"{self.base_url}/series/create", 
-                    json=payload, 
-                    headers=headers
-                )
-                
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"Respuesta de creación de serie: {result}")
-
-                if result.get("response") == "success": 
-                    
-                    await asyncio.sleep(1)
-
-                    series_name = serie.get("name")
-                    serie_info = await self.get_series_by_name(series_name)
-                    
-                    if serie_info: 
-                        created_series.append({
-                            "serie_id": str(serie_info.get("SerieID")),
-                            "name": serie_info.get("SerieName"),
-                            "type": serie_info.get("SerieType"),
-                            "description": serie_info.get("SerieDescription", ""),
-                            "status": serie_info.get("SerieStatus", "Activa"),
-                            "branch_id": serie.get("branch_id"),
-                            "folio": serie.get("initial_folio", 1),
-                        }) 
-                    else: 
-                        logger.error(f"No se pudo obtener la información completa de la serie")
-                        created_series.append({
-                            "serie_id": "unknown",
-                            "name": series_name,
-                            "type": serie.get("type", "factura"),
-                            "description": serie.get("description", f"Serie {series_name}"),
-                            "status": "Activa",
-                            "branch_id": serie.get("branch_id"),
-                            "folio": serie.get("initial_folio", 1)
-                        })
-                    
-                else: 
-                    error_msg = result.get('message', 'Unknown error from Factura.com')
-                    logger.error(f"Error creando la serie: {error_msg}") 
-                    raise Exception(f"Error creando serie: {error_msg}")
-
-                return created_series
+            return outcomes
             
         except Exception as e:
             logger.error(f"Error creando series: {str(e)}")
             raise
+
+    async def _post_series(self, serie: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        payload = {
+            "letra": serie.get("name"),
+            "tipoDocumento": serie.get("type", "factura"),
+            "folio": serie.get("initial_folio", 1)
+        }
+
+        payload = {k: v for k, v in payload.items() if v is not None}
+
+        logger.info(f"Creando serie en Factura.com: {payload}")
+
+        response = await self.client.post(
+            f"{self.base_url}/series/create", 
+            json=payload, 
+            headers=headers
+        )
         
+        response.raise_for_status()
+        
+        result = response.json()
+        logger.info(f"Respuesta de creación de serie: {result}")
+
+        if result.get("response") != "success": 
+            error_msg = result.get('message', 'Unknown error from Factura.com')
+            logger.error(f"Error creando la serie: {error_msg}") 
+            raise Exception(f"Error creando serie: {error_msg}")
+
+        return result
+
+    async def _reconcile_series(self, company_uid: str, credentials: FacturaCredentials, names: List[str]) -> SeriesIndex:
+        """Una sola consulta del listado resuelve los IDs de todas las series nuevas.
+
+        Factura.com puede tardar en listar una serie recién creada; solo se vuelve a consultar si falta alguna.
+        """
+        delay = settings.factura_series_reconcile_delay_seconds
+        index = None
+        for attempt in range(settings.factura_series_reconcile_attempts):
+            index = await self._series_index(company_uid, credentials, refresh=True)
+            missing = [name for name in names if name not in index.by_name]
+            if not missing:
+                return index
+
+            if attempt + 1 < settings.factura_series_reconcile_attempts:
+                logger.info(f"Series aún no listadas en Factura.com: {missing}, reintentando en {delay}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        return index
+
+    def _account_headers(self, credentials: FacturaCredentials) -> Dict[str, str]:
+        return {
+            "F-API-KEY": credentials.api_key,
+            "F-SECRET-KEY": credentials.secret_key,
+            "F-PLUGIN": self.plugin_key
+        }
 
     async def close(self):
         await self.client.aclose()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+SeriesLoader = Callable[[], Awaitable[List[Dict[str, Any]]]]
+SeriesKey = Tuple[str, str]
+
+
+class SeriesIndex:
+    """Series de una cuenta de Factura.com indexadas por nombre y por tipo."""
+
+    def __init__(self, series: List[Dict[str, Any]]):
+        self.series = series
+        self.fetched_at = time.monotonic()
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_type: Dict[str, List[Dict[str, Any]]] = {}
+
+        for serie in series:
+            name = serie.get("SerieName")
+            if name is not None:
+                self.by_name[name] = serie
+            self.by_type.setdefault(serie.get("SerieType"), []).append(serie)
+
+    def first_of_type(self, serie_type: str) -> Optional[Dict[str, Any]]:
+        matches = self.by_type.get(serie_type)
+        return matches[0] if matches else None
+
+
+class SeriesCache:
+    """Cache del listado de series por cuenta de Factura.com; las cargas concurrentes de una cuenta comparten una sola llamada.
+
+    Cada empresa tiene su propia cuenta, así que la llave es (cuenta, empresa): un nombre de serie solo se
+    reutiliza dentro de la cuenta que lo creó. Se conservan a lo sumo `max_accounts` listados, descartando
+    los menos usados.
+    """
+
+    def __init__(self, ttl_seconds: float, max_accounts: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_accounts = max(1, max_accounts)
+        self._indexes: "OrderedDict[SeriesKey, SeriesIndex]" = OrderedDict()
+        self._locks: Dict[SeriesKey, asyncio.Lock] = {}
+
+    async def get(self, key: SeriesKey, loader: SeriesLoader, refresh: bool = False) -> SeriesIndex:
+        if not refresh:
+            index = self._fresh(key)
+            if index is not None:
+                return index
+
+        requested_at = time.monotonic()
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        async with lock:
+            index = self._indexes.get(key)
+            # Otra corrutina pudo recargar mientras se esperaba el lock
+            if index is not None and index.fetched_at >= requested_at:
+                return index
+            if not refresh and self._fresh(key) is not None:
+                return index
+
+            index = SeriesIndex(await loader())
+            self._store(key, index)
+            return index
+
+    def invalidate(self, key: SeriesKey):
+        self._indexes.pop(key, None)
+
+    def _fresh(self, key: SeriesKey) -> Optional[SeriesIndex]:
+        index = self._indexes.get(key)
+        if index is None or time.monotonic() - index.fetched_at > self.ttl_seconds:
+            return None
+        self._indexes.move_to_end(key)
+        return index
+
+    def _store(self, key: SeriesKey, index: SeriesIndex):
+        self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_accounts:
+            evicted, _ = self._indexes.popitem(last=False)
+            lock = self._locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del self._locks[evicted]
@@ -21,19 +21,124 @@ class Settings(BaseSettings):
     rabbitmq_username: str = "guest"
     rabbitmq_password: str = "guest"
     rabbitmq_vhost: str = "/"
+
+    amqp_compression_threshold_bytes: int = 16 * 1024
+    amqp_compression_encoding: str = "zstd"
+    amqp_max_message_bytes: int = 16 * 1024 * 1024
     
     company_created_queue: str = "company_created"
     company_created_routing_key: str = "company_created"
+    company_created_prefetch: int = 4
+    company_created_concurrency: int = 2
+    company_created_handler_timeout_seconds: float = 180.0
 
     client_created_queue: str = "client_created"
     client_created_routing_key: str = "client_created"
+    # Con fair scheduling el prefetch es la ventana que ve el scheduler: debe ser mucho mayor que la
+    # concurrencia para que los mensajes de otros tenants lleguen aunque un tenant grande llene la cola
+    client_created_prefetch: int = 500
+    client_created_concurrency: int = 10
+    client_created_handler_timeout_seconds: float = 60.0
+    client_created_batch_size: int = 1
+    client_created_batch_window_ms: int = 200
+    client_created_fair_scheduling: bool = True
+    client_created_tenant_concurrency: int = 4
+    fair_scheduler_quantum: int = 1
 
     invoice_request_queue: str = "invoice_request"
     invoice_request_routing_key: str = "invoice_request"
-    
+    invoice_request_prefetch: int = 64
+    invoice_request_concurrency: int = 32
+    invoice_request_handler_timeout_seconds: float = 90.0
+
+    invoice_request_stream_enabled: bool = False
+    invoice_request_stream_queue: str = "invoice_request_stream"
+    invoice_request_stream_group: str = "invoice_processor"
+    invoice_request_stream_max_age: str = "7D"
+    stream_default_offset: str = "first"
+    stream_offset_commit_every: int = 100
+
+    consumer_retry_max_attempts: int = 3
+    consumer_retry_backoff_seconds: float = 5.0
+    consumer_retry_max_backoff_seconds: float = 300.0
+
+    consumer_control_queue: str = "consumer_control"
+    consumer_control_routing_key: str = "consumer_control"
+
+    admin_api_token: Optional[str] = None
+    profiler_output_dir: str = "/tmp/profiles"
+    profiler_max_duration_seconds: int = 120
+
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_seconds: float = 0.5
+    loop_slow_callback_threshold_seconds: float = 0.1
+    consumer_metrics_port: int = 9100
+    prometheus_multiproc_dir: str = "/tmp/prometheus_multiproc"
+
+    consumer_workers: int = 0
+    consumer_restart_backoff_seconds: float = 1.0
+    consumer_restart_max_backoff_seconds: float = 30.0
+    consumer_shutdown_timeout_seconds: float = 30.0
+    server_timing_enabled: bool = True
+
+    blob_storage_backend: str = "gridfs"
+    blob_storage_path: str = "/tmp/third_party_blobs"
+    blob_gridfs_bucket: str = "certificates"
+    certificate_upload_max_bytes: int = 256 * 1024
+
     factura_com_api_key: str
     factura_com_secret_key: str
     factura_com_api_url: str = "https://sandbox.factura.com/api/v4"
+    # "multipart" envía los certificados como archivos; activarlo solo tras validarlo contra Factura.com
+    factura_certificate_upload_mode: str = "form"
+
+    factura_limiter_enabled: bool = True
+    factura_limiter_initial: int = 8
+    factura_limiter_min: int = 1
+    factura_limiter_max: int = 64
+    factura_limiter_latency_threshold_seconds: float = 2.0
+    factura_limiter_backoff_ratio: float = 0.7
+    adaptive_prefetch_min_interval_seconds: float = 10.0
+
+    factura_breakers_enabled: bool = True
+    factura_breaker_failure_threshold: int = 5
+    factura_breaker_reset_timeout_seconds: float = 30.0
+    factura_bulkhead_max_wait_seconds: float = 5.0
+    factura_bulkheads: dict = {"catalog": 4, "account": 4, "series": 4, "clients": 8, "cfdi": 32}
+    factura_endpoint_timeouts: dict = {"catalog": 10.0, "account": 30.0, "series": 15.0, "clients": 20.0, "cfdi": 45.0}
+
+    factura_hedging_enabled: bool = False
+    factura_hedging_groups: list = ["catalog", "account", "series", "clients"]
+    factura_hedging_percentile: float = 0.95
+    factura_hedging_budget_ratio: float = 0.05
+    factura_hedging_min_delay_seconds: float = 0.05
+    factura_hedging_window: int = 200
+    factura_hedging_min_samples: int = 20
+
+    factura_series_cache_ttl_seconds: float = 300.0
+    factura_series_cache_max_accounts: int = 1024
+    factura_series_reconcile_attempts: int = 3
+    factura_series_reconcile_delay_seconds: float = 0.5
+
+    folio_block_size: int = 50
+
+    invoice_issuance_concurrency: int = 32
+    # Duración de la reserva de un intento de timbrado; cubre el timeout de Factura.com
+    invoice_issuance_claim_seconds: float = 90.0
+    invoice_issued_routing_key: str = "invoice_issued"
+    invoice_failed_routing_key: str = "invoice_failed"
+
+    onboarding_credentials_attempts: int = 4
+    onboarding_credentials_delay_seconds: float = 2.0
+    # Mayor que el timeout del handler de company_created para que el lease no venza a mitad de la saga
+    onboarding_lease_ttl_seconds: float = 300.0
+
+    client_creation_lease_ttl_seconds: float = 60.0
+    client_creation_lease_wait_seconds: float = 30.0
+
+    mongo_lookup_batching_enabled: bool = True
+    mongo_lookup_batch_window_ms: float = 0
+    mongo_lookup_max_batch_size: int = 200
 
     encryption_key: str
 
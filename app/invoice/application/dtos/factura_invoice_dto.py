@@ -0,0 +1,86 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from ...domain.entities.invoice import Invoice
+
+DEFAULT_PRODUCT_KEY = "84111506"
+DEFAULT_UNIT_KEY = "E48"
+DEFAULT_VAT_RATE = 0.16
+
+# Los asigna el motor (receptor resuelto, serie y folio reservados); la solicitud no los puede sobrescribir
+ENGINE_ASSIGNED_FIELDS = frozenset({"Receptor", "Serie", "Folio"})
+
+class FacturaInvoiceDTO(BaseModel):
+
+    receptor: Dict[str, str] = Field(..., alias="Receptor")
+    tipo_documento: str = Field(default="factura", alias="TipoDocumento")
+    conceptos: List[Dict[str, Any]] = Field(..., alias="Conceptos")
+    uso_cfdi: Optional[str] = Field(None, alias="UsoCFDI")
+    serie: str = Field(..., alias="Serie")
+    folio: int = Field(..., alias="Folio")
+    forma_pago: str = Field(default="03", alias="FormaPago")
+    metodo_pago: str = Field(default="PUE", alias="MetodoPago")
+    moneda: str = Field(default="MXN", alias="Moneda")
+    tipo_cambio: Optional[float] = Field(None, alias="TipoCambio")
+    enviar_correo: bool = Field(default=False, alias="EnviarCorreo")
+    comentarios: Optional[str] = Field(None, alias="Comentarios")
+
+    model_config = {
+        "populate_by_name": True,
+        "extra": "allow"
+    }
+
+    @classmethod
+    def from_invoice(cls, invoice: Invoice) -> 'FacturaInvoiceDTO':
+        details = invoice.details
+
+        factura_data = {
+            "receptor": {"UID": invoice.client_uid},
+            "tipo_documento": details.get("document_type", "factura"),
+            "conceptos": [cls._concept(item) for item in details.get("items", [])],
+            "uso_cfdi": details.get("cfdi_use"),
+            "serie": invoice.series_id,
+            "folio": invoice.folio,
+            "forma_pago": details.get("payment_form", "03"),
+            "metodo_pago": details.get("payment_method", "PUE"),
+            "moneda": details.get("currency", "MXN"),
+            "tipo_cambio": details.get("exchange_rate"),
+            "enviar_correo": details.get("send_email", False),
+            "comentarios": details.get("comments")
+        }
+
+        # Campos nativos de Factura.com (p. ej. "CondicionesDePago") pasan tal cual, salvo los que asigna el motor
+        factura_data.update({
+            key: value for key, value in details.items()
+            if key[:1].isupper() and key not in ENGINE_ASSIGNED_FIELDS
+        })
+        return cls(**factura_data)
+
+    @staticmethod
+    def _concept(item: Dict[str, Any]) -> Dict[str, Any]:
+        if any(key[:1].isupper() for key in item):
+            # El concepto ya viene en el formato de Factura.com
+            return item
+
+        quantity = item.get("quantity", 1)
+        unit_price = item.get("unit_price", 0)
+        base = round(quantity * unit_price, 2)
+        vat_rate = item.get("vat_rate", DEFAULT_VAT_RATE)
+
+        return {
+            "ClaveProdServ": item.get("product_key", DEFAULT_PRODUCT_KEY),
+            "ClaveUnidad": item.get("unit_key", DEFAULT_UNIT_KEY),
+            "Unidad": item.get("unit", "Unidad de servicio"),
+            "Cantidad": quantity,
+            "ValorUnitario": unit_price,
+            "Descripcion": item.get("description", ""),
+            "Impuestos": {
+                "Traslados": [{
+                    "Base": base,
+                    "Impuesto": "002",
+                    "TipoFactor": "Tasa",
+                    "TasaOCuota": f"{vat_rate:.6f}",
+                    "Importe": round(base * vat_rate, 2)
+                }]
+            }
+        }
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from ..dtos.factura_invoice_dto import FacturaInvoiceDTO
+from ...domain.entities.invoice import FAILED, ISSUED, PENDING, Invoice
+from ...domain.repositories.invoice_repository import InvoiceRepository
+from ...domain.repositories.external_invoice_repository import ExternalInvoiceRepository
+
+from company.domain.entities.company import Company
+from company.domain.entities.series import Series
+from company.domain.services.company_credentials import CompanyCredentialResolver
+from company.domain.services.folio_allocator import FolioAllocator
+from shared.domain.repositories.event_publisher import EventPublisher
+from shared.exceptions import ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+INVALID_SERIE_IDS = frozenset({"unknown", "none", "null"})
+
+class IssueInvoiceUseCase:
+    """Emite CFDIs: asigna serie y folio, guarda la factura pendiente antes de timbrar y publica el resultado.
+
+    `request_id` hace idempotente la emisión: un reintento reutiliza la factura pendiente (misma serie y folio)
+    y una ya resuelta devuelve lo guardado sin volver a timbrar. Si Factura.com no está disponible la factura
+    queda pendiente y la excepción llega al consumidor para reintentar; antes de volver a timbrar una factura
+    con intentos previos se busca en Factura.com por serie y folio para no emitir un CFDI duplicado. Cada intento
+    se reserva de forma atómica en la factura, así entregas simultáneas de la misma solicitud no timbran dos veces.
+    """
+
+    def __init__(
+        self,
+        invoice_repository: InvoiceRepository,
+        external_invoice_repository: ExternalInvoiceRepository,
+        folio_allocator: FolioAllocator,
+        credential_resolver: CompanyCredentialResolver,
+        publisher: Optional[EventPublisher] = None,
+        max_concurrency: int = 32,
+        claim_seconds: float = 90.0,
+        issued_routing_key: str = "invoice_issued",
+        failed_routing_key: str = "invoice_failed"
+    ):
+        self.invoice_repository = invoice_repository
+        self.external_invoice_repository = external_invoice_repository
+        self.folio_allocator = folio_allocator
+        self.credential_resolver = credential_resolver
+        self.publisher = publisher
+        self.claim_seconds = claim_seconds
+        self.issued_routing_key = issued_routing_key
+        self.failed_routing_key = failed_routing_key
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def execute(
+        self,
+        company: Company,
+        client_uid: str,
+        invoice_details: Dict[str, Any],
+        request_id: str
+    ) -> Dict[str, Any]:
+        credentials = await self.credential_resolver.for_company(company)
+        if credentials is None:
+            return {
+                "success": False,
+                "error": f"La empresa {company.id} no tiene credenciales de Factura.com"
+            }
+
+        invoice = await self.invoice_repository.get_by_request_id(request_id)
+        if invoice is None:
+            invoice = await self._reserve(company, client_uid, invoice_details, request_id)
+            if invoice is None:
+                return {
+                    "success": False,
+                    "error": f"La empresa {company.id} no tiene una serie para facturar"
+                }
+
+        if invoice.status != PENDING:
+            logger.info(f"Solicitud {request_id} ya procesada: factura {invoice.id} {invoice.status}")
+            return self._result(invoice)
+
+        async with self._semaphore:
+            # Reserva atómica del intento: dos entregas de la misma solicitud nunca timbran a la vez
+            previous_attempts = await self.invoice_repository.claim_attempt(invoice.id, self.claim_seconds)
+            if previous_attempts is None:
+                current = await self.invoice_repository.get_by_request_id(request_id)
+                if current is not None and current.status != PENDING:
+                    return self._result(current)
+                raise ServiceUnavailableException(
+                    f"La factura {invoice.id} tiene un intento de timbrado en curso",
+                    retry_after=int(self.claim_seconds)
+                )
+
+            try:
+                if previous_attempts > 0:
+                    # Un intento previo pudo timbrar antes de fallar (timeout, 5xx o caída del proceso)
+                    stamped = await self.external_invoice_repository.find_cfdi(invoice.series, invoice.folio, credentials)
+                    if stamped is not None:
+                        logger.info(f"Factura {invoice.id} ({invoice.series}-{invoice.folio}) ya estaba timbrada, se concilia")
+                        return await self._issued(invoice, stamped)
+
+                cfdi_payload = FacturaInvoiceDTO.from_invoice(invoice).model_dump(by_alias=True, exclude_none=True)
+                try:
+                    response = await self.external_invoice_repository.create_cfdi(cfdi_payload, credentials)
+                except ServiceUnavailableException:
+                    logger.warning(f"Factura {invoice.id} ({invoice.series}-{invoice.folio}) queda pendiente: Factura.com no disponible")
+                    raise
+                except Exception as e:
+                    # No se sabe si se timbró: queda pendiente y el reintento concilia antes de volver a timbrar
+                    raise ServiceUnavailableException(f"Resultado incierto al timbrar la factura {invoice.id}: {str(e)}")
+            except ServiceUnavailableException:
+                await self._release(invoice)
+                raise
+
+        if response.get("response") == "success":
+            return await self._issued(invoice, response)
+
+        # Solo un rechazo explícito de Factura.com es definitivo
+        invoice.error = str(response.get("message") or "Error desconocido de Factura.com")
+        invoice.status = FAILED
+        await self.invoice_repository.mark_failed(invoice.id, invoice.error)
+        await self.folio_allocator.discard(invoice.company_id, invoice.series, invoice.folio, "issuance_failed")
+        logger.error(f"Factura.com rechazó la factura {invoice.id} ({invoice.series}-{invoice.folio}): {invoice.error}")
+        await self._publish(self.failed_routing_key, invoice)
+        return self._result(invoice)
+
+    async def _issued(self, invoice: Invoice, response: Dict[str, Any]) -> Dict[str, Any]:
+        invoice.factura_uid = response.get("uid") or response.get("UID")
+        invoice.uuid = response.get("UUID") or (response.get("SAT") or {}).get("UUID")
+        invoice.status = ISSUED
+        try:
+            await self.invoice_repository.mark_issued(invoice.id, invoice.factura_uid, invoice.uuid, response)
+        except Exception as e:
+            # El CFDI ya existe: el reintento lo encuentra en Factura.com y vuelve a intentar registrarlo
+            raise ServiceUnavailableException(f"CFDI {invoice.uuid} timbrado pero no registrado: {str(e)}")
+
+        logger.info(f"CFDI emitido {invoice.series}-{invoice.folio} para {invoice.company_id}: {invoice.uuid}")
+        await self._publish(self.issued_routing_key, invoice)
+        return self._result(invoice)
+
+    async def _release(self, invoice: Invoice):
+        try:
+            await self.invoice_repository.release_claim(invoice.id)
+        except Exception as e:
+            # Si no se libera, el siguiente intento espera a que venza la reserva
+            logger.warning(f"No se pudo liberar el intento de la factura {invoice.id}: {str(e)}")
+
+    async def _reserve(
+        self,
+        company: Company,
+        client_uid: str,
+        invoice_details: Dict[str, Any],
+        request_id: str
+    ) -> Optional[Invoice]:
+        series = await self._resolve_series(company, invoice_details.get("series"))
+        if series is None:
+            return None
+
+        folio = await self.folio_allocator.allocate(company.id, series.name, series.folio)
+        invoice = await self.invoice_repository.create_pending(Invoice(
+            request_id=request_id,
+            company_id=company.id,
+            client_uid=client_uid,
+            series=series.name,
+            series_id=series.serie_id,
+            folio=folio,
+            details=invoice_details
+        ))
+
+        if (invoice.series, invoice.folio) != (series.name, folio):
+            # Otra entrega de la misma solicitud se guardó primero
+            await self.folio_allocator.discard(company.id, series.name, folio, "duplicate_request")
+        return invoice
+
+    async def _resolve_series(self, company: Company, series_name: Optional[str]) -> Optional[Series]:
+        # Sin cache propio: la empresa se lee por solicitud y carga sus series una vez, así una serie nueva se usa de inmediato
+        series = [serie for serie in await company.get_series() if self._is_issuable(serie)]
+
+        if series_name:
+            return next((serie for serie in series if serie.name == series_name), None)
+
+        default = next((serie for serie in series if serie.type == "factura"), None)
+        return default or (series[0] if series else None)
+
+    @staticmethod
+    def _is_issuable(serie: Series) -> bool:
+        """Descarta series sin ID real en Factura.com (registros legados guardaron "unknown" o "None")."""
+        return bool(serie.serie_id) and serie.serie_id.strip().lower() not in INVALID_SERIE_IDS
+
+    async def _publish(self, routing_key: str, invoice: Invoice):
+        if self.publisher is None:
+            return
+        try:
+            await self.publisher.publish(routing_key, {
+                "request_id": invoice.request_id,
+                "invoice_id": invoice.id,
+                "company_id": invoice.company_id,
+                "client_uid": invoice.client_uid,
+                "series": invoice.series,
+                "folio": invoice.folio,
+                "status": invoice.status,
+                "factura_uid": invoice.factura_uid,
+                "uuid": invoice.uuid,
+                "error": invoice.error
+            })
+        except Exception as e:
+            # La factura ya quedó guardada: el resultado se puede consultar aunque no se publique
+            logger.error(f"No se pudo publicar {routing_key} de la factura {invoice.id}: {str(e)}")
+
+    @staticmethod
+    def _result(invoice: Invoice) -> Dict[str, Any]:
+        return {
+            "success": invoice.status == ISSUED,
+            "invoice_id": invoice.id,
+            "factura_uid": invoice.factura_uid,
+            "uuid": invoice.uuid,
+            "series": invoice.series,
+            "folio": invoice.folio,
+            "status": invoice.status,
+            "error": invoice.error
+        }
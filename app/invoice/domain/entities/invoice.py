@@ -0,0 +1,36 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+PENDING = "pending"
+ISSUED = "issued"
+FAILED = "failed"
+
+class Invoice(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    request_id: str = Field(..., description="Llave de idempotencia de la solicitud de facturación")
+    company_id: str
+    client_uid: str = Field(..., description="UID del receptor en Factura.com")
+
+    series: str = Field(..., description="Nombre de la serie")
+    series_id: str = Field(..., description="ID de la serie en Factura.com")
+    folio: int
+
+    status: str = PENDING
+    details: Dict[str, Any] = Field(default_factory=dict, description="Detalles de la factura tal como llegaron en la solicitud")
+
+    factura_uid: Optional[str] = None
+    uuid: Optional[str] = Field(None, description="Folio fiscal asignado por el SAT")
+    error: Optional[str] = None
+    attempts: int = 0
+    claimed_until: Optional[datetime] = Field(None, description="Fin del intento de timbrado en curso")
+
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    issued_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+            arbitrary_types_allowed=True,
+            populate_by_name=True,
+            json_encoders={datetime: lambda v: v.isoformat()},
+        )
@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from company.domain.services.company_credentials import FacturaCredentials
+
+class ExternalInvoiceRepository(ABC):
+
+    @abstractmethod
+    async def create_cfdi(self, cfdi_data: Dict[str, Any], credentials: FacturaCredentials) -> Dict[str, Any]:
+        """Timbra un CFDI 4.0 con la cuenta del emisor y devuelve la respuesta de Factura.com (`response` == "success" si se emitió)."""
+        pass
+
+    @abstractmethod
+    async def find_cfdi(self, series: str, folio: int, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
+        """Busca en la cuenta del emisor un CFDI ya timbrado con esa serie y folio."""
+        pass
@@ -0,0 +1,35 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from ..entities.invoice import Invoice
+
+class InvoiceRepository(ABC):
+
+    @abstractmethod
+    async def create_pending(self, invoice: Invoice) -> Invoice:
+        """Inserta la factura pendiente; si ya existe una con el mismo `request_id` devuelve la guardada."""
+        pass
+
+    @abstractmethod
+    async def get_by_request_id(self, request_id: str) -> Optional[Invoice]:
+        pass
+
+    @abstractmethod
+    async def claim_attempt(self, invoice_id: str, lease_seconds: float) -> Optional[int]:
+        """Reserva el siguiente intento de timbrado de una factura pendiente y devuelve los intentos previos.
+
+        Devuelve None si otro worker tiene un intento en curso o la factura ya no está pendiente.
+        """
+        pass
+
+    @abstractmethod
+    async def release_claim(self, invoice_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_issued(self, invoice_id: str, factura_uid: Optional[str], uuid: Optional[str], response: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_failed(self, invoice_id: str, error: str) -> None:
+        pass
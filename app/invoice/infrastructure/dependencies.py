@@ -0,0 +1,53 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from config.database import get_database
+from ..domain.repositories.invoice_repository import InvoiceRepository
+from ..domain.repositories.external_invoice_repository import ExternalInvoiceRepository
+from ..infrastructure.repositories.mongodb_invoice_repository import MongoDBInvoiceRepository
+from .services.factura_invoice_adapter import FacturaInvoiceAdapter
+
+from ..application.use_cases.issue_invoice_use_case import IssueInvoiceUseCase
+
+from company.domain.services.folio_allocator import FolioAllocator
+from company.domain.services.company_credentials import CompanyCredentialResolver
+from shared.domain.repositories.event_publisher import EventPublisher
+from shared.infrastructure.container import Container, Scope, container
+
+def register(container: Container):
+    container.on_startup(_ensure_indexes)
+
+    container.register(
+        InvoiceRepository,
+        lambda c: MongoDBInvoiceRepository(c.resolve(AsyncIOMotorDatabase)),
+        Scope.PROCESS
+    )
+    container.register(
+        ExternalInvoiceRepository,
+        lambda c: FacturaInvoiceAdapter(),
+        Scope.PROCESS,
+        on_shutdown=lambda adapter: adapter.close()
+    )
+    container.register(
+        IssueInvoiceUseCase,
+        lambda c: IssueInvoiceUseCase(
+            c.resolve(InvoiceRepository),
+            c.resolve(ExternalInvoiceRepository),
+            c.resolve(FolioAllocator),
+            c.resolve(CompanyCredentialResolver),
+            c.resolve(EventPublisher),
+            max_concurrency=settings.invoice_issuance_concurrency,
+            claim_seconds=settings.invoice_issuance_claim_seconds,
+            issued_routing_key=settings.invoice_issued_routing_key,
+            failed_routing_key=settings.invoice_failed_routing_key
+        ),
+        Scope.PROCESS
+    )
+
+async def _ensure_indexes():
+    await MongoDBInvoiceRepository.ensure_indexes(get_database())
+
+def get_invoice_repository() -> InvoiceRepository:
+    return container.resolve(InvoiceRepository)
+
+def get_issue_invoice_use_case() -> IssueInvoiceUseCase:
+    return container.resolve(IssueInvoiceUseCase)
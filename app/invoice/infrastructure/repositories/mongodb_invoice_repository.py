@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from ...domain.entities.invoice import FAILED, ISSUED, PENDING, Invoice
+from ...domain.repositories.invoice_repository import InvoiceRepository
+from shared.infrastructure.monitoring.server_timing import timed_call
+
+class MongoDBInvoiceRepository(InvoiceRepository):
+    """Facturas en `invoices`; `request_id` único hace idempotente la emisión y (empresa, serie, folio) único evita folios repetidos."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database["invoices"]
+
+    @staticmethod
+    async def ensure_indexes(database: AsyncIOMotorDatabase):
+        collection = database["invoices"]
+        await collection.create_index("request_id", unique=True, name="invoices_request_id")
+        await collection.create_index(
+            [("company_id", ASCENDING), ("series", ASCENDING), ("folio", ASCENDING)],
+            unique=True,
+            name="invoices_company_series_folio"
+        )
+        await collection.create_index(
+            [("company_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+            name="invoices_company_status_created"
+        )
+        await collection.create_index("factura_uid", sparse=True, name="invoices_factura_uid")
+
+    @timed_call("mongo")
+    async def create_pending(self, invoice: Invoice) -> Invoice:
+        now = datetime.now(timezone.utc)
+        document = invoice.model_dump(by_alias=True, exclude={"id"})
+        document["_id"] = ObjectId()
+        document["created_at"] = now
+        document["updated_at"] = now
+
+        try:
+            await self.collection.insert_one(document)
+        except DuplicateKeyError:
+            existing = await self.get_by_request_id(invoice.request_id)
+            if existing is None:
+                # El choque fue por (empresa, serie, folio): no es la misma solicitud
+                raise
+            return existing
+
+        return self._to_entity(document)
+
+    @timed_call("mongo")
+    async def get_by_request_id(self, request_id: str) -> Optional[Invoice]:
+        document = await self.collection.find_one({"request_id": request_id})
+        return self._to_entity(document) if document else None
+
+    @timed_call("mongo")
+    async def claim_attempt(self, invoice_id: str, lease_seconds: float) -> Optional[int]:
+        now = datetime.now(timezone.utc)
+        document = await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(invoice_id),
+                "status": PENDING,
+                "$or": [{"claimed_until": None}, {"claimed_until": {"$lte": now}}]
+            },
+            {
+                "$inc": {"attempts": 1},
+                "$set": {"claimed_until": now + timedelta(seconds=lease_seconds), "updated_at": now}
+            },
+            projection={"attempts": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        return None if document is None else document.get("attempts", 0)
+
+    @timed_call("mongo")
+    async def release_claim(self, invoice_id: str) -> None:
+        await self.collection.update_one({"_id": ObjectId(invoice_id)}, {"$unset": {"claimed_until": ""}})
+
+    @timed_call("mongo")
+    async def mark_issued(self, invoice_id: str, factura_uid: Optional[str], uuid: Optional[str], response: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"_id": ObjectId(invoice_id)},
+            {
+                "$set": {
+                    "status": ISSUED,
+                    "factura_uid": factura_uid,
+                    "uuid": uuid,
+                    "factura_response": response,
+                    "error": None,
+                    "issued_at": now,
+                    "updated_at": now
+                },
+                "$unset": {"claimed_until": ""}
+            }
+        )
+
+    @timed_call("mongo")
+    async def mark_failed(self, invoice_id: str, error: str) -> None:
+        await self.collection.update_one(
+            {"_id": ObjectId(invoice_id)},
+            {
+                "$set": {"status": FAILED, "error": error, "updated_at": datetime.now(timezone.utc)},
+                "$unset": {"claimed_until": ""}
+            }
+        )
+
+    @staticmethod
+    def _to_entity(document: Dict[str, Any]) -> Invoice:
+        document = dict(document)
+        document["_id"] = str(document["_id"])
+        return Invoice(**document)
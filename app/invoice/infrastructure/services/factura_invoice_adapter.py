@@ -0,0 +1,100 @@
+import httpx
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from shared.exceptions import ServiceUnavailableException
+from shared.infrastructure.services.factura_http import build_factura_http_client
+from ...domain.repositories.external_invoice_repository import ExternalInvoiceRepository, FacturaCredentials
+
+logger = logging.getLogger(__name__)
+
+class FacturaInvoiceAdapter(ExternalInvoiceRepository):
+    """Timbrado de CFDI 4.0 sobre el cliente HTTP compartido (pool de conexiones, breaker y bulkhead del grupo `cfdi`)."""
+
+    def __init__(self):
+        self.base_url = settings.factura_com_api_url
+        self.plugin_key = "9d4095c8f7ed5785cb14c0e3b033eeb8252416ed"
+        self.client = build_factura_http_client()
+
+    async def create_cfdi(self, cfdi_data: Dict[str, Any], credentials: FacturaCredentials) -> Dict[str, Any]:
+        headers = self._headers(credentials)
+
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/cfdi40/create",
+                json=cfdi_data,
+                headers=headers
+            )
+        except ServiceUnavailableException:
+            raise
+        except httpx.TransportError as e:
+            # No se sabe si se timbró: el reintento reutiliza la misma serie y folio
+            raise ServiceUnavailableException(f"Error de conexión timbrando CFDI: {str(e)}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ServiceUnavailableException(
+                f"Factura.com respondió {response.status_code} al timbrar CFDI",
+                retry_after=self._retry_after(response)
+            )
+
+        try:
+            result = response.json()
+        except ValueError:
+            if 400 <= response.status_code < 500:
+                return {"response": "error", "message": response.text}
+            # Un 2xx ilegible no dice si se timbró: se trata como incierto para conciliar en el reintento
+            raise ServiceUnavailableException(f"Respuesta no válida de Factura.com al timbrar: {response.text[:200]}")
+
+        if response.status_code >= 400 and "response" not in result:
+            result = {"response": "error", "message": result.get("message") or response.text}
+
+        logger.info(f"Respuesta de timbrado de Factura.com: {json.dumps(result)}")
+        return result
+
+    async def find_cfdi(self, series: str, folio: int, credentials: FacturaCredentials) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.client.get(
+                f"{self.base_url}/cfdi/list",
+                params={"serie": series, "folio": folio},
+                headers=self._headers(credentials)
+            )
+        except ServiceUnavailableException:
+            raise
+        except httpx.TransportError as e:
+            raise ServiceUnavailableException(f"Error de conexión buscando CFDI {series}-{folio}: {str(e)}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ServiceUnavailableException(
+                f"Factura.com respondió {response.status_code} al buscar CFDI {series}-{folio}",
+                retry_after=self._retry_after(response)
+            )
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            # Sin poder confirmar que no existe no se vuelve a timbrar
+            raise ServiceUnavailableException(f"No se pudo verificar el CFDI {series}-{folio}: {response.text[:200]}")
+
+        for cfdi in response.json().get("data", []):
+            if str(cfdi.get("Folio")) == str(folio) and cfdi.get("Serie") == series:
+                return cfdi
+        return None
+
+    def _headers(self, credentials: FacturaCredentials) -> Dict[str, str]:
+        # Cada empresa timbra con su propia cuenta: el emisor del CFDI es el RFC de esas llaves
+        return {
+            "F-API-KEY": credentials.api_key,
+            "F-SECRET-KEY": credentials.secret_key,
+            "F-PLUGIN": self.plugin_key
+        }
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> float:
+        try:
+            return max(0.0, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            return 0.0
+
+    async def close(self):
+        await self.client.aclose()
@@ -3,18 +3,28 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager 
 
 from config.settings import settings 
-from config.database import connect_to_mongo, close_mongo_connection 
+from shared.infrastructure.bootstrap import build_container
 
 from company.infrastructure.routers.company_router import router as company_router 
 from client.infrastructure.routers.client_router import router as client_router
 from shared.infrastructure.routers.catalog_router import router as catalog_router
+from shared.infrastructure.routers.admin_router import router as admin_router
+from shared.infrastructure.routers.metrics_router import router as metrics_router
+from shared.infrastructure.monitoring.loop_monitor import LoopLagMonitor
+from shared.infrastructure.monitoring.server_timing import server_timing_middleware
 
 @asynccontextmanager 
 async def lifespan(app: FastAPI): 
     
-    await connect_to_mongo()
+    loop_monitor = LoopLagMonitor("api")
+    loop_monitor.start()
+
+    container = build_container()
+    await container.startup()
     yield
-    await close_mongo_connection()
+    await container.shutdown()
+
+    await loop_monitor.stop()
 
 app = FastAPI(
     title=settings.app_name, 
@@ -32,9 +42,13 @@ app.add_middleware(
     allow_origins=settings.allowed_origins, 
     allow_credentials=True, 
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"], 
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["Server-Timing"]
 )
 
+if settings.server_timing_enabled:
+    app.middleware("http")(server_timing_middleware)
+
 @app.get("/", tags=["health"])
 async def health_check(): 
     return {
@@ -46,4 +60,6 @@ async def health_check():
 app.include_router(company_router) 
 app.include_router(client_router)
 app.include_router(catalog_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
 
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+class BlobStorage(ABC):
+
+    @abstractmethod
+    async def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        pass
+
+    @abstractmethod
+    async def get(self, ref: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def stream(self, ref: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        pass
+
+    @abstractmethod
+    async def exists(self, ref: str) -> bool:
+        pass
@@ -0,0 +1,12 @@
+from abc import ABC, abstractmethod
+
+class LeaseRepository(ABC):
+
+    @abstractmethod
+    async def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Toma el lease si está libre, vencido o ya es de `owner`; devuelve False si otro lo tiene."""
+        pass
+
+    @abstractmethod
+    async def release(self, key: str, owner: str) -> None:
+        pass
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Union
+
+StreamPosition = Union[int, datetime, str]
+
+class StreamOffsetRepository(ABC):
+
+    @abstractmethod
+    async def get_position(self, stream: str, group: str) -> Optional[StreamPosition]:
+        """Posición desde la que debe reanudar el grupo: offset siguiente, timestamp de replay o None."""
+        pass
+
+    @abstractmethod
+    async def commit(self, stream: str, group: str, offset: int) -> None:
+        pass
+
+    @abstractmethod
+    async def reset_to(self, stream: str, group: str, position: StreamPosition) -> None:
+        pass
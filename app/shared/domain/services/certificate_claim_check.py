@@ -0,0 +1,63 @@
+import base64
+import binascii
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.exceptions import ValidationException
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_FIELDS = ("fiel_cer", "fiel_key", "csd_cer", "csd_key")
+
+@dataclass
+class CertificateSource:
+    """Certificado guardado en el blob store; se lee (y se verifica su sha256) hasta que se envía."""
+    ref: str
+    size: Optional[int]
+    storage: BlobStorage
+
+    def chunks(self) -> AsyncIterator[bytes]:
+        return self.storage.stream(self.ref)
+
+    async def read(self) -> bytes:
+        return await self.storage.get(self.ref)
+
+def is_blob_reference(value: Any) -> bool:
+    return isinstance(value, dict) and bool(value.get("blob_ref"))
+
+async def check_in_certificate(data: bytes, storage: BlobStorage) -> Dict[str, Any]:
+    """Sube un certificado al blob store y devuelve la referencia que viaja en el evento."""
+    if not data:
+        raise ValidationException("El certificado está vacío")
+
+    ref = await storage.put(data)
+    return {"blob_ref": ref, "size": len(data)}
+
+async def check_in_certificates(certificates: Dict[str, Any], storage: BlobStorage) -> Dict[str, Any]:
+    """Sube los certificados en base64 al blob store y los reemplaza por referencias."""
+    checked_in = dict(certificates)
+
+    for field in CERTIFICATE_FIELDS:
+        value = certificates.get(field)
+        if not value or is_blob_reference(value):
+            continue
+
+        try:
+            data = base64.b64decode(value, validate=False)
+        except (binascii.Error, ValueError) as e:
+            raise ValidationException(f"Certificado {field} no es base64 válido: {str(e)}")
+
+        checked_in[field] = await check_in_certificate(data, storage)
+
+    return checked_in
+
+def check_out_certificate(value: Any, storage: Optional[BlobStorage]) -> Any:
+    if not is_blob_reference(value):
+        return value
+
+    if storage is None:
+        raise ValidationException(f"El evento trae la referencia {value['blob_ref']} pero no hay blob storage configurado")
+
+    return CertificateSource(value["blob_ref"], value.get("size"), storage)
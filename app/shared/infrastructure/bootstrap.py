@@ -0,0 +1,16 @@
+from .container import Container, container
+from . import dependencies as shared_dependencies
+from company.infrastructure import dependencies as company_dependencies
+from client.infrastructure import dependencies as client_dependencies
+from invoice.infrastructure import dependencies as invoice_dependencies
+
+_MODULES = (shared_dependencies, company_dependencies, invoice_dependencies, client_dependencies)
+_registered = False
+
+def build_container() -> Container:
+    global _registered
+    if not _registered:
+        for module in _MODULES:
+            module.register(container)
+        _registered = True
+    return container
@@ -0,0 +1,155 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Scope(str, Enum):
+    SINGLETON = "singleton"  # una instancia por contenedor, sin recursos atados al proceso
+    PROCESS = "process"      # una instancia por proceso (sockets, pools); se reconstruye si cambia el pid
+    EVENT = "event"          # una instancia por evento/request dentro de container.event_scope()
+
+
+@dataclass
+class Provider:
+    key: Any
+    factory: Callable[["Container"], Any]
+    scope: Scope
+    on_shutdown: Optional[Callable[[Any], Awaitable[None]]] = None
+
+
+_event_instances: ContextVar[Optional[Dict[Any, Any]]] = ContextVar("container_event_instances", default=None)
+
+
+class Container:
+    """Contenedor de dependencias con ciclo de vida explícito.
+
+    Los proveedores se registran en cada `dependencies.py` y se instancian de forma
+    ansiosa en `startup()`, después de los hooks de arranque (p. ej. conexión a MongoDB),
+    de modo que ningún singleton captura una base de datos aún no conectada.
+    """
+
+    def __init__(self):
+        self._providers: Dict[Any, Provider] = {}
+        self._instances: Dict[Any, Any] = {}
+        self._creation_order: List[Any] = []
+        self._startup_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._pid = os.getpid()
+        self.started = False
+
+    def register(
+        self,
+        key: Any,
+        factory: Callable[["Container"], Any],
+        scope: Scope = Scope.SINGLETON,
+        on_shutdown: Optional[Callable[[Any], Awaitable[None]]] = None
+    ):
+        self._providers[key] = Provider(key, factory, scope, on_shutdown)
+
+    def on_startup(self, hook: Callable[[], Awaitable[None]]):
+        self._startup_hooks.append(hook)
+
+    def on_shutdown(self, hook: Callable[[], Awaitable[None]]):
+        self._shutdown_hooks.append(hook)
+
+    def is_registered(self, key: Any) -> bool:
+        return key in self._providers
+
+    def resolve(self, key: Any) -> Any:
+        provider = self._providers.get(key)
+        if provider is None:
+            raise LookupError(f"Dependencia no registrada: {self._name(key)}")
+
+        if provider.scope == Scope.EVENT:
+            return self._resolve_event(provider)
+
+        self._check_process()
+        if key in self._instances:
+            return self._instances[key]
+
+        if not self.started:
+            raise RuntimeError(f"El contenedor no ha arrancado; no se puede resolver {self._name(key)}")
+
+        instance = provider.factory(self)
+        self._instances[key] = instance
+        self._creation_order.append(key)
+        return instance
+
+    @asynccontextmanager
+    async def event_scope(self):
+        token = _event_instances.set({})
+        try:
+            yield self
+        finally:
+            _event_instances.reset(token)
+
+    async def startup(self):
+        if self.started:
+            return
+
+        for hook in self._startup_hooks:
+            await hook()
+        self.started = True
+
+        for key, provider in self._providers.items():
+            if provider.scope != Scope.EVENT:
+                self.resolve(key)
+
+        logger.info(f"Contenedor iniciado: {len(self._instances)} dependencias cableadas")
+
+    async def shutdown(self):
+        if not self.started:
+            return
+
+        for key in reversed(self._creation_order):
+            provider = self._providers[key]
+            if provider.on_shutdown and key in self._instances:
+                try:
+                    await provider.on_shutdown(self._instances[key])
+                except Exception as e:
+                    logger.warning(f"Error cerrando {self._name(key)}: {str(e)}")
+
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                await hook()
+            except Exception as e:
+                logger.warning(f"Error en hook de apagado: {str(e)}")
+
+        self._instances.clear()
+        self._creation_order.clear()
+        self.started = False
+        logger.info("Contenedor detenido")
+
+    def _resolve_event(self, provider: Provider) -> Any:
+        instances = _event_instances.get()
+        if instances is None:
+            raise RuntimeError(f"{self._name(provider.key)} requiere un event_scope activo")
+
+        if provider.key not in instances:
+            instances[provider.key] = provider.factory(self)
+        return instances[provider.key]
+
+    def _check_process(self):
+        pid = os.getpid()
+        if pid == self._pid:
+            return
+
+        # Tras un fork los pools heredados no son utilizables en el proceso hijo
+        self._pid = pid
+        for key, provider in self._providers.items():
+            if provider.scope == Scope.PROCESS:
+                self._instances.pop(key, None)
+        self._creation_order = [key for key in self._creation_order if key in self._instances]
+
+    @staticmethod
+    def _name(key: Any) -> str:
+        return getattr(key, "__name__", str(key))
+
+
+container = Container()
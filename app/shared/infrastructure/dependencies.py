@@ -1,6 +1,74 @@
-from functools import lru_cache
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from .container import Container, Scope, container
+from .security.crypto_service import CrytoService
 from .services.factura_catalog_service import FacturaCatalogService
+from .repositories.mongodb_stream_offset_repository import MongoDBStreamOffsetRepository
+from .repositories.mongodb_lease_repository import MongoDBLeaseRepository
+from .messaging.rabbitmq_publisher import RabbitMQPublisher
+from .storage.gridfs_blob_storage import GridFSBlobStorage
+from .storage.local_blob_storage import LocalBlobStorage
+from ..domain.repositories.blob_storage import BlobStorage
+from ..domain.repositories.encryption_service import EncryptionService
+from ..domain.repositories.stream_offset_repository import StreamOffsetRepository
+from ..domain.repositories.lease_repository import LeaseRepository
+from ..domain.repositories.event_publisher import EventPublisher
+
+def register(container: Container):
+    container.on_startup(connect_to_mongo)
+    container.on_startup(_ensure_indexes)
+    container.on_shutdown(close_mongo_connection)
+
+    container.register(AsyncIOMotorDatabase, _build_database, Scope.PROCESS)
+    container.register(
+        FacturaCatalogService,
+        lambda c: FacturaCatalogService(),
+        Scope.PROCESS,
+        on_shutdown=lambda service: service.close()
+    )
+    container.register(BlobStorage, _build_blob_storage, Scope.PROCESS)
+    container.register(EncryptionService, lambda c: CrytoService())
+    container.register(
+        StreamOffsetRepository,
+        lambda c: MongoDBStreamOffsetRepository(c.resolve(AsyncIOMotorDatabase)),
+        Scope.PROCESS
+    )
+    container.register(
+        LeaseRepository,
+        lambda c: MongoDBLeaseRepository(c.resolve(AsyncIOMotorDatabase)),
+        Scope.PROCESS
+    )
+    container.register(
+        EventPublisher,
+        lambda c: RabbitMQPublisher(),
+        Scope.PROCESS,
+        on_shutdown=lambda publisher: publisher.close()
+    )
+
+async def _ensure_indexes():
+    await MongoDBLeaseRepository.ensure_indexes(get_database())
+
+def _build_database(container: Container) -> AsyncIOMotorDatabase:
+    database = get_database()
+    if database is None:
+        raise RuntimeError("MongoDB no está conectado")
+    return database
+
+def _build_blob_storage(container: Container) -> BlobStorage:
+    if settings.blob_storage_backend == "local":
+        return LocalBlobStorage(settings.blob_storage_path)
+    return GridFSBlobStorage(container.resolve(AsyncIOMotorDatabase), bucket_name=settings.blob_gridfs_bucket)
+
+def lookup_batch_window() -> Optional[float]:
+    """Ventana de los DataLoader de los repositorios en segundos; None desactiva el agrupado."""
+    if not settings.mongo_lookup_batching_enabled:
+        return None
+    return settings.mongo_lookup_batch_window_ms / 1000
 
-@lru_cache()
 def get_factura_catalog_service() -> FacturaCatalogService:
-    return FacturaCatalogService()
\ No newline at end of file
+    return container.resolve(FacturaCatalogService)
+
+def get_blob_storage() -> BlobStorage:
+    return container.resolve(BlobStorage)
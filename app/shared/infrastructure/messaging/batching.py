@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from shared.infrastructure.container import container
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+class MicroBatcher:
+    """Agrupa eventos hasta `batch_size` o `window_seconds` y entrega a cada emisor su propio resultado.
+
+    `submit` espera el resultado del elemento dentro del lote, así que el consumer sigue
+    haciendo ack/reintento por mensaje igual que en el modo unitario.
+    """
+
+    def __init__(self, handler: BatchHandler, batch_size: int, window_seconds: float, timeout: Optional[float] = None):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.timeout = timeout
+        self._items: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((event_data, future))
+
+        if len(self._items) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self.flush)
+
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._items = self._items, []
+        if not items:
+            return
+
+        task = asyncio.create_task(self._run(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        logger.info(f"Procesando lote de {len(items)} eventos")
+        try:
+            async with container.event_scope():
+                batch = self.handler([event_data for event_data, _ in items])
+                results = await asyncio.wait_for(batch, timeout=self.timeout) if self.timeout else await batch
+
+            if len(results) != len(items):
+                raise RuntimeError(f"El handler de lote devolvió {len(results)} resultados para {len(items)} eventos")
+
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,87 @@
+import logging
+import zlib
+from typing import Optional, Tuple
+
+from shared.exceptions import ValidationException
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+IDENTITY_ENCODINGS = (None, "", "identity")
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+def encode_body(body: bytes, encoding: str) -> Tuple[bytes, Optional[str]]:
+    if encoding == "zstd" and not zstd_available():
+        logger.warning("zstandard no está instalado, se usa gzip para comprimir")
+        encoding = "gzip"
+
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush(), "gzip"
+
+    raise ValidationException(f"Content-encoding no soportado: {encoding}")
+
+def decode_body(body: bytes, encoding: Optional[str], max_size: int) -> bytes:
+    if encoding in IDENTITY_ENCODINGS:
+        if len(body) > max_size:
+            raise ValidationException(f"Mensaje excede el tamaño máximo ({len(body)} > {max_size} bytes)")
+        return body
+
+    if encoding == "gzip":
+        return _gunzip(body, max_size)
+
+    if encoding == "zstd":
+        if not zstd_available():
+            raise ValidationException("Mensaje comprimido con zstd pero zstandard no está instalado")
+        return _unzstd(body, max_size)
+
+    raise ValidationException(f"Content-encoding no soportado: {encoding}")
+
+def _gunzip(body: bytes, max_size: int) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    output = bytearray()
+    data = memoryview(body)
+
+    try:
+        for offset in range(0, len(data), CHUNK_SIZE):
+            pending = data[offset:offset + CHUNK_SIZE]
+            while pending:
+                output += decompressor.decompress(pending, max_size + 1 - len(output))
+                _check_size(len(output), max_size)
+                pending = decompressor.unconsumed_tail
+
+        output += decompressor.flush()
+    except zlib.error as e:
+        raise ValidationException(f"Cuerpo gzip inválido: {str(e)}")
+
+    _check_size(len(output), max_size)
+    return bytes(output)
+
+def _unzstd(body: bytes, max_size: int) -> bytes:
+    output = bytearray()
+
+    try:
+        with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+            while True:
+                chunk = reader.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                output += chunk
+                _check_size(len(output), max_size)
+    except zstandard.ZstdError as e:
+        raise ValidationException(f"Cuerpo zstd inválido: {str(e)}")
+
+    return bytes(output)
+
+def _check_size(size: int, max_size: int):
+    if size > max_size:
+        raise ValidationException(f"Mensaje descomprimido excede el tamaño máximo de {max_size} bytes")
@@ -1,32 +1,35 @@
 import asyncio
 import logging
+import signal
+from prometheus_client import start_http_server
 from .rabbitmq_consumer import RabbitMQConsumer
-from .event_handlers.company_event_handler import handle_company_created_event
-from .event_handlers.client_event_handler import handle_client_created_event
-from .event_handlers.invoice_event_handler import handle_invoice_request_event
+from .routes import build_routes
+from shared.infrastructure.monitoring.loop_monitor import LoopLagMonitor
+from shared.infrastructure.bootstrap import build_container
 from config.settings import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def main():
+async def main(serve_metrics: bool = True, worker_index: int = 0):
+    loop_monitor = LoopLagMonitor("consumer")
+    container = build_container()
+
     try:
+        if serve_metrics:
+            start_http_server(settings.consumer_metrics_port)
+        loop_monitor.start()
+
+        await container.startup()
+
         consumer = RabbitMQConsumer()
-        
-        consumer.register_handler(
-            settings.company_created_routing_key,
-            handle_company_created_event
-        )
-        
-        consumer.register_handler(
-            settings.client_created_routing_key, 
-            handle_client_created_event
-        )
 
-        consumer.register_handler(
-            settings.invoice_request_routing_key, 
-            handle_invoice_request_event
-        )
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, consumer.request_stop)
+        
+        for route in build_routes(include_streams=worker_index == 0):
+            consumer.register_route(route)
         
         await consumer.consume()
         
@@ -34,6 +37,9 @@ async def main():
         logger.info("Consumer detenido por el usuario")
     except Exception as e:
         logger.error(f"Error inesperado: {str(e)}")
+    finally:
+        await container.shutdown()
+        await loop_monitor.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Dict
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_worker(worker_index: int):
+    from .consumer_main import main
+
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [worker-{worker_index}] %(levelname)s %(name)s: %(message)s", force=True)
+    asyncio.run(main(serve_metrics=False, worker_index=worker_index))
+
+class ConsumerSupervisor:
+    """Levanta N procesos consumidores y los reinicia si terminan inesperadamente.
+
+    Cada worker crea su propia conexión AMQP, cliente Motor y pool HTTP (contexto spawn).
+    Las métricas se agregan con el modo multiproceso de prometheus_client.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.failures: Dict[int, int] = {}
+        self.started_at: Dict[int, float] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.stopping = False
+
+    def run(self):
+        self._prepare_metrics_dir()
+        self._serve_metrics()
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        for worker_index in range(self.workers):
+            self._start_worker(worker_index)
+
+        logger.info(f"Supervisor iniciado con {self.workers} workers")
+
+        while not self.stopping:
+            sentinels = [process.sentinel for process in self.processes.values() if process.is_alive()]
+            wait(sentinels, timeout=1.0)
+
+            for worker_index, process in list(self.processes.items()):
+                if self.stopping:
+                    break
+                if not process.is_alive() and worker_index not in self.restart_at:
+                    self._schedule_restart(worker_index, process)
+
+            now = time.monotonic()
+            for worker_index, restart_at in list(self.restart_at.items()):
+                if not self.stopping and now >= restart_at:
+                    del self.restart_at[worker_index]
+                    self._start_worker(worker_index)
+
+        self._shutdown()
+
+    def _start_worker(self, worker_index: int):
+        process = self.context.Process(
+            target=run_worker,
+            args=(worker_index,),
+            name=f"consumer-worker-{worker_index}",
+            daemon=False
+        )
+        process.start()
+
+        self.processes[worker_index] = process
+        self.started_at[worker_index] = time.monotonic()
+        logger.info(f"Worker {worker_index} iniciado (pid {process.pid})")
+
+    def _schedule_restart(self, worker_index: int, process: multiprocessing.Process):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(process.pid)
+        uptime = time.monotonic() - self.started_at.get(worker_index, time.monotonic())
+
+        if uptime > settings.consumer_restart_max_backoff_seconds:
+            self.failures[worker_index] = 0
+        self.failures[worker_index] = self.failures.get(worker_index, 0) + 1
+
+        backoff = min(
+            settings.consumer_restart_backoff_seconds * (2 ** (self.failures[worker_index] - 1)),
+            settings.consumer_restart_max_backoff_seconds
+        )
+        self.restart_at[worker_index] = time.monotonic() + backoff
+
+        logger.error(
+            f"Worker {worker_index} (pid {process.pid}) terminó con código {process.exitcode} "
+            f"tras {uptime:.0f}s, reiniciando en {backoff:.1f}s"
+        )
+
+    def _request_stop(self, signum, frame):
+        if not self.stopping:
+            logger.info(f"Señal {signal.Signals(signum).name} recibida, deteniendo workers...")
+        self.stopping = True
+
+    def _shutdown(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + settings.consumer_shutdown_timeout_seconds + 5
+        for worker_index, process in self.processes.items():
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+
+            if process.is_alive():
+                logger.warning(f"Worker {worker_index} no terminó a tiempo, forzando cierre")
+                process.kill()
+                process.join()
+
+        logger.info("Supervisor detenido")
+
+    def _prepare_metrics_dir(self):
+        metrics_dir = settings.prometheus_multiproc_dir
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    def _serve_metrics(self):
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(settings.consumer_metrics_port, registry=registry)
+        logger.info(f"Métricas agregadas en el puerto {settings.consumer_metrics_port}")
+
+def main():
+    workers = settings.consumer_workers or os.cpu_count() or 1
+    ConsumerSupervisor(workers).run()
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,30 @@
 import logging
+from typing import List
 from client.application.use_cases.sync_client_with_factura_use_case import SyncClientWithFacturaUseCase
-from client.infrastructure.repositories.mongodb_client_repository import MongoDBClientRepository
-from client.infrastructure.dependencies import get_external_client_repository
-from company.infrastructure.dependencies import get_company_repository
-from config.database import get_database
+from shared.exceptions import ServiceUnavailableException
+from shared.infrastructure.container import container
 
 logger = logging.getLogger(__name__)
 
 async def handle_client_created_event(event_data: dict):
     try:
-        database = get_database()
-        client_repository = MongoDBClientRepository(database)
-        external_client_repository = get_external_client_repository()
-        company_repository = get_company_repository()
-
-        use_case = SyncClientWithFacturaUseCase(client_repository, external_client_repository, company_repository)
+        use_case = container.resolve(SyncClientWithFacturaUseCase)
         result = await use_case.execute(event_data)
         return result
         
+    except ServiceUnavailableException:
+        raise
     except Exception as e:
         logger.error(f"Error handling client event: {str(e)}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+async def handle_client_created_batch(events: List[dict]) -> List[dict]:
+    try:
+        use_case = container.resolve(SyncClientWithFacturaUseCase)
+        return await use_case.execute_batch(events)
+
+    except ServiceUnavailableException:
+        raise
+    except Exception as e:
+        logger.error(f"Error handling client batch: {str(e)}")
+        return [{"success": False, "error": str(e)} for _ in events]
\ No newline at end of file
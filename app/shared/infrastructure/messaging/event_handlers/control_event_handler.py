@@ -0,0 +1,32 @@
+import logging
+from config.settings import settings
+from shared.infrastructure.monitoring.profiler import SamplingProfiler, write_collapsed_profile
+
+logger = logging.getLogger(__name__)
+
+async def handle_consumer_control_event(event_data: dict):
+    try:
+        command = event_data.get("command")
+
+        if command == "profile":
+            mode = event_data.get("mode", "wall")
+            duration = min(float(event_data.get("duration", 10)), settings.profiler_max_duration_seconds)
+            interval = float(event_data.get("interval_ms", 5)) / 1000
+
+            profiler = SamplingProfiler(mode=mode, interval=interval)
+            collapsed = await profiler.profile(duration)
+            path = write_collapsed_profile(collapsed, mode)
+
+            return {
+                "success": True,
+                "command": command,
+                "path": path,
+                "samples": profiler.total_samples,
+                "profile": collapsed if event_data.get("include_profile") else None
+            }
+
+        return {"success": False, "error": f"Comando de control desconocido: {command}"}
+
+    except Exception as e:
+        logger.error(f"Error handling control command: {str(e)}")
+        return {"success": False, "error": str(e)}
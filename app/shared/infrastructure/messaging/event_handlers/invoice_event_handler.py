@@ -1,21 +1,23 @@
-import logging 
+import logging
 from client.application.use_cases.invoice_client_use_case import InvoiceClientUseCase
-from client.infrastructure.dependencies import get_external_client_repository, get_client_repository
-from company.infrastructure.dependencies import get_company_repository
-from config.database import get_database
+from shared.exceptions import ServiceUnavailableException
+from shared.infrastructure.container import container
+from ..message_context import current_message_id
 
 logger = logging.getLogger(__name__)
 
 async def handle_invoice_request_event(event_data: dict):
     try:
-        database = get_database()
-        client_repository = get_client_repository()
-        external_client_repository = get_external_client_repository()
-        company_repository = get_company_repository()
-        
-        use_case = InvoiceClientUseCase(client_repository, external_client_repository, company_repository)
+        if not event_data.get("request_id") and current_message_id.get():
+            # Sin llave explícita se usa el message_id, que los reintentos conservan
+            event_data = {**event_data, "request_id": current_message_id.get()}
+
+        use_case = container.resolve(InvoiceClientUseCase)
         result = await use_case.execute(event_data)
         return result
-    except Exception as e: 
+        
+    except ServiceUnavailableException:
+        raise
+    except Exception as e:
         logger.error(f"Error handling invoice request: {str(e)}")
         return {"success": False, "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,5 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# message_id AMQP del mensaje que procesa el handler actual; se conserva en los reintentos
+current_message_id: ContextVar[Optional[str]] = ContextVar("current_message_id", default=None)
@@ -0,0 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Sequence
+
+
+def partition_value(event_data: Dict[str, Any], fields: Sequence[str]) -> Optional[str]:
+    values = [event_data.get(field) for field in fields]
+    if all(value in (None, "") for value in values):
+        return None
+    return "|".join("" if value is None else str(value).strip().upper() for value in values)
+
+
+class PartitionedExecutor:
+    """Serializa el trabajo con la misma llave y paraleliza entre llaves distintas.
+
+    Cada llave tiene su propio lock (atiende en orden de llegada) que se descarta cuando nadie
+    lo usa, así dos llaves distintas nunca comparten cola. Solo ordena dentro del proceso.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def lane(self, key: Optional[str]):
+        if key is None:
+            # Sin llave no hay nada que ordenar
+            yield
+            return
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if self._users[key] == 0:
+                del self._users[key]
+                del self._locks[key]
@@ -2,21 +2,83 @@ import aio_pika
 import json
 import asyncio
 import logging
+import math
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import Dict, Optional, Tuple
 from config.settings import settings
-from config.database import connect_to_mongo, get_database
+from shared.exceptions import ConflictException, ServiceUnavailableException
+from shared.infrastructure.container import container
+from shared.infrastructure.services.factura_http import get_factura_limiter
+from .compression import decode_body
+from .message_context import current_message_id
+from .routing import RouteDefinition
+from .stream_offsets import StreamOffsetTracker
+from .batching import MicroBatcher
+from .scheduling import TenantFairScheduler
+from .partitioning import PartitionedExecutor, partition_value
+from shared.domain.repositories.stream_offset_repository import StreamOffsetRepository
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RETRY_COUNT_HEADER = "x-retry-count"
+
+# Errores transitorios: en streams no se descartan, se relee desde el offset
+STREAM_RETRYABLE_ERRORS = (ServiceUnavailableException, asyncio.TimeoutError)
+
 class RabbitMQConsumer:
     def __init__(self):
         self.connection = None
         self.channel = None
-        self.event_handlers = {}
+        self.routes: Dict[str, RouteDefinition] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._offset_trackers: Dict[str, StreamOffsetTracker] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._schedulers: Dict[str, TenantFairScheduler] = {}
+        self._partitions: Dict[str, PartitionedExecutor] = {}
+        self._rewinds: Dict[str, asyncio.Task] = {}
+        self._stream_failures: Dict[str, Tuple[int, int]] = {}
+        self.consumers: Dict[str, Tuple[aio_pika.abc.AbstractQueue, str]] = {}
+        self._channels: Dict[str, aio_pika.abc.AbstractChannel] = {}
+        self._prefetch: Dict[str, int] = {}
+        self._target_limit: Optional[int] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._last_prefetch_update = 0.0
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stop_event = asyncio.Event()
 
-    def register_handler(self, routing_key: str, handler_func):
-        self.event_handlers[routing_key] = handler_func
-        logger.info(f"Handler registrado para: {routing_key}")
+    def request_stop(self):
+        if not self._stop_event.is_set():
+            logger.info("Solicitud de apagado recibida, dejando de consumir...")
+            self._stop_event.set()
+
+    def register_route(self, route: RouteDefinition):
+        self.routes[route.name] = route
+        if route.is_fair:
+            # El tenant se conoce hasta decodificar; la admisión la hace el scheduler en _run_handler
+            self._schedulers[route.name] = TenantFairScheduler(
+                route.concurrency,
+                per_tenant_limit=route.tenant_concurrency,
+                quantum=route.fair_quantum
+            )
+        else:
+            self._semaphores[route.name] = asyncio.Semaphore(route.concurrency)
+
+        if route.is_partitioned:
+            self._partitions[route.name] = PartitionedExecutor()
+
+        if route.is_batched:
+            self._batchers[route.name] = MicroBatcher(
+                route.batch_handler,
+                batch_size=route.batch_size,
+                window_seconds=route.batch_window_ms / 1000,
+                timeout=route.handler_timeout
+            )
+        logger.info(f"Ruta registrada: {route.routing_key} -> {route.queue_name} ({route.queue_type}, prefetch={route.prefetch}, concurrency={route.concurrency})")
 
     async def connect(self):
         max_retries = 5
@@ -25,9 +87,6 @@ class RabbitMQConsumer:
         for attempt in range(max_retries):
             try:
                 logger.info(f"Conectando a servicios... (Intento {attempt + 1}/{max_retries})")
-                
-                await connect_to_mongo()
-                logger.info("MongoDB conectado")
 
                 connection_url = settings.rabbitmq_connection_url
                 
@@ -55,7 +114,6 @@ class RabbitMQConsumer:
                 logger.info("RabbitMQ/CloudAMQP conectado")
                 
                 self.channel = await self.connection.channel()
-                await self.channel.set_qos(prefetch_count=1)
                 return
 
             except Exception as e:
@@ -65,80 +123,282 @@ class RabbitMQConsumer:
                 else:
                     raise
 
-    async def setup_queue(self, queue_name: str, routing_key: str):
+    async def declare_route(self, route: RouteDefinition) -> aio_pika.abc.AbstractQueue:
+        logger.info(f"Configurando cola: {route.queue_name} para routing key: {route.routing_key}")
+
+        prefetch = route.prefetch
+        if route.adaptive_prefetch and settings.factura_limiter_enabled:
+            prefetch = route.prefetch_for_limit(get_factura_limiter().current_limit)
+
+        channel = await self.connection.channel()
+        await channel.set_qos(prefetch_count=prefetch)
+        self._channels[route.name] = channel
+        self._prefetch[route.name] = prefetch
+
         try:
-            logger.info(f"Configurando cola: {queue_name} para routing key: {routing_key}")
+            if route.dead_letter:
+                await channel.declare_queue(route.dlq_name, durable=True)
 
-            exchange = await self.channel.get_exchange("amq.topic")
-            
-            queue = await self.channel.declare_queue(
-                queue_name,
+            if route.retry.enabled and not route.is_stream:
+                for delay in route.retry.delay_tiers():
+                    await channel.declare_queue(
+                        route.retry_queue_name(delay),
+                        durable=True,
+                        arguments=route.retry_queue_arguments(delay)
+                    )
+
+            queue = await channel.declare_queue(
+                route.queue_name,
                 durable=True,
-                arguments={
-                    "x-dead-letter-exchange": "",
-                    "x-dead-letter-routing-key": f"{queue_name}_dlq",
-                    "x-message-ttl": 8640000
-                }
+                arguments=route.queue_arguments()
             )
-            
-            await self.channel.declare_queue(f"{queue_name}_dlq", durable=True)
-            
-            await queue.bind("amq.topic", routing_key=routing_key)
-            logger.info(f"Cola {queue_name} configurada para {routing_key}")
-            return queue
-            
-        except Exception as e:
-            logger.error(f"Error configurando cola {queue_name}: {str(e)}")
-            raise
+        except aio_pika.exceptions.ChannelPreconditionFailed as e:
+            raise ConflictException(
+                f"La cola {route.queue_name} ya existe en el broker con argumentos distintos "
+                f"a la ruta declarada {route.queue_arguments()}: {str(e)}"
+            )
+
+        await queue.bind(route.exchange, routing_key=route.routing_key)
+        logger.info(f"Cola {route.queue_name} configurada para {route.routing_key}")
+        return queue
+
+    async def on_message(self, route: RouteDefinition, message: aio_pika.IncomingMessage):
+        if self._stop_event.is_set():
+            # En streams no hay reencolado: basta con no confirmar el offset
+            if not route.is_stream:
+                await message.nack(requeue=True)
+            return
 
-    async def on_message(self, message: aio_pika.IncomingMessage):
+        if route.name in self._rewinds:
+            # El consumidor se está reposicionando: este mensaje se volverá a leer desde el offset pendiente
+            await message.ack()
+            return
+
+        tracker = self._offset_trackers.get(route.name)
+        offset = (message.headers or {}).get("x-stream-offset") if tracker else None
+        if offset is not None:
+            tracker.begin(offset)
+
+        self.in_flight += 1
+        self._idle.clear()
+        settled = True
         try:
-            async with message.process():
-                routing_key = message.routing_key
-                logger.info(f"Mensaje recibido - Routing Key: {routing_key}")
-                
-                raw_body = message.body.decode()
-                cleaned_body = self._clean_json_string(raw_body)
-                event_data = json.loads(cleaned_body)
-                
-                handler = self.event_handlers.get(routing_key)
-                if handler:
-                    logger.info(f"Ejecutando handler para: {routing_key}")
-                    result = await handler(event_data)
-                    
-                    if result.get("success"):
-                        logger.info(f"Evento procesado: {routing_key}")
-                    else:
-                        logger.error(f"Error en handler: {result.get('error')}")
-                else:
-                    logger.warning(f"No hay handler para: {routing_key}")
-                    logger.warning(f"Handlers disponibles: {list(self.event_handlers.keys())}")
-                        
+            settled = await self._process_message(route, message)
         except Exception as e:
             logger.error(f"Error procesando mensaje: {str(e)}")
+        finally:
+            if offset is not None and settled:
+                failure = self._stream_failures.get(route.name)
+                if failure is not None and failure[0] == offset:
+                    # El mensaje que provocó la relectura ya terminó: el backoff vuelve a empezar
+                    del self._stream_failures[route.name]
+                try:
+                    await tracker.complete(offset)
+                except Exception as e:
+                    logger.error(f"Error confirmando offset {offset} de {route.name}: {str(e)}")
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.set()
+
+    async def _process_message(self, route: RouteDefinition, message: aio_pika.IncomingMessage) -> bool:
+        """Procesa el mensaje; devuelve False si en un stream debe releerse y su offset no se confirma."""
+        logger.info(f"Mensaje recibido - Routing Key: {route.routing_key}")
+
+        try:
+            raw_body = decode_body(
+                message.body,
+                message.content_encoding,
+                settings.amqp_max_message_bytes
+            ).decode()
+            event_data = json.loads(self._clean_json_string(raw_body))
+        except Exception as e:
+            logger.error(f"Mensaje inválido en {route.queue_name}, descartando: {str(e)}")
+            await self._discard(message, route)
+            return True
+
+        token = current_message_id.set(message.message_id)
+        try:
+            result = await self._run_handler(route, event_data)
+        except Exception as e:
+            logger.error(f"Handler de {route.routing_key} falló ({type(e).__name__}): {str(e)}")
+            if route.is_stream:
+                return await self._retry_stream(route, message, e)
+            await self._retry_or_dead_letter(route, message, e)
+            return True
+        finally:
+            current_message_id.reset(token)
+
+        if message.reply_to:
+            await self._reply(message, result)
+
+        if result.get("success"):
+            logger.info(f"Evento procesado: {route.routing_key}")
+        else:
+            logger.error(f"Error en handler: {result.get('error')}")
+
+        await message.ack()
+        return True
+
+    async def _run_handler(self, route: RouteDefinition, event_data: dict) -> dict:
+        partitions = self._partitions.get(route.name)
+        lane = partitions.lane(partition_value(event_data, route.partition_key)) if partitions else nullcontext()
+
+        # El lock de la llave se toma antes que la capacidad de la ruta (semáforo o scheduler) para no ocupar
+        # un slot esperando a la misma llave; como es por llave, mientras espera solo bloquea mensajes de esa llave
+        async with lane:
+            async with self._slot(route, event_data):
+                batcher = self._batchers.get(route.name)
+                if batcher:
+                    return await batcher.submit(event_data)
+                return await self._invoke_handler(route, event_data)
+
+    def _slot(self, route: RouteDefinition, event_data: dict):
+        scheduler = self._schedulers.get(route.name)
+        if scheduler:
+            return scheduler.slot(str(event_data.get(route.fair_key) or ""))
+        return self._semaphores.get(route.name) or nullcontext()
+
+    async def _invoke_handler(self, route: RouteDefinition, event_data: dict) -> dict:
+        async with container.event_scope():
+            if route.handler_timeout:
+                return await asyncio.wait_for(route.handler(event_data), timeout=route.handler_timeout)
+            return await route.handler(event_data)
+
+    async def _retry_or_dead_letter(
+        self,
+        route: RouteDefinition,
+        message: aio_pika.IncomingMessage,
+        error: Optional[Exception] = None
+    ):
+        headers = dict(message.headers or {})
+        attempt = int(headers.get(RETRY_COUNT_HEADER, 0)) + 1
+
+        if not route.retry.enabled or attempt >= route.retry.max_attempts:
+            logger.error(f"Mensaje de {route.queue_name} agotó {attempt} intentos, descartando")
+            await self._discard(message, route)
+            return
+
+        # Si Factura.com pidió esperar (circuito abierto), no reintentar antes de tiempo
+        delay = route.retry.tier_for(max(route.retry.delay_for(attempt), math.ceil(getattr(error, "retry_after", 0))))
+        headers[RETRY_COUNT_HEADER] = attempt
+        try:
+            await self.channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    content_encoding=message.content_encoding,
+                    correlation_id=message.correlation_id,
+                    reply_to=message.reply_to,
+                    message_id=message.message_id,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                ),
+                routing_key=route.retry_queue_name(delay)
+            )
+        except Exception as e:
+            logger.error(f"No se pudo programar el reintento de {route.queue_name}: {str(e)}")
+            await message.nack(requeue=True)
+            return
+
+        await message.ack()
+        logger.warning(f"Reintento {attempt}/{route.retry.max_attempts - 1} de {route.queue_name} en {delay}s")
+
+    async def _retry_stream(self, route: RouteDefinition, message: aio_pika.IncomingMessage, error: Exception) -> bool:
+        """En un stream no hay cola de reintento: ante un error transitorio se deja de avanzar y se relee desde el offset.
+
+        Los mensajes posteriores que ya terminaron se vuelven a entregar; los handlers de streams son idempotentes.
+        """
+        tracker = self._offset_trackers.get(route.name)
+        offset = (message.headers or {}).get("x-stream-offset")
+        if tracker is None or offset is None or not isinstance(error, STREAM_RETRYABLE_ERRORS):
+            await self._discard(message, route)
+            return True
+
+        tracker.fail(offset)
+        # En streams el ack solo devuelve crédito al consumidor; el offset no se confirma
+        await message.ack()
+
+        if route.name not in self._rewinds:
+            failed_offset, attempt = self._stream_failures.get(route.name, (offset, 0))
+            attempt = attempt + 1 if failed_offset == offset else 1
+            self._stream_failures[route.name] = (offset, attempt)
+
+            delay = max(route.retry.delay_for(attempt), getattr(error, "retry_after", 0))
+            logger.warning(f"Error transitorio en {route.name} (offset {offset}, intento {attempt}): se relee en {delay}s")
+            self._rewinds[route.name] = asyncio.create_task(self._rewind_stream(route, delay))
+        return False
+
+    async def _rewind_stream(self, route: RouteDefinition, delay: float):
+        tracker = self._offset_trackers[route.name]
+        try:
+            queue, consumer_tag = self.consumers[route.name]
+            await queue.cancel(consumer_tag)
+            await asyncio.sleep(delay)
+            await tracker.wait_settled()
+            if self._stop_event.is_set():
+                return
+
+            position = tracker.resume_position()
+            consumer_tag = await queue.consume(
+                partial(self.on_message, route),
+                arguments={"x-stream-offset": position}
+            )
+            self.consumers[route.name] = (queue, consumer_tag)
+            logger.info(f"{route.name} reanuda desde el offset {position}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Sin consumidor el grupo no avanza: se detiene el proceso para que al reiniciar lea desde el último offset
+            logger.error(f"No se pudo reposicionar {route.name}: {str(e)}")
+            self.request_stop()
+        finally:
+            self._rewinds.pop(route.name, None)
+
+    async def _discard(self, message: aio_pika.IncomingMessage, route: RouteDefinition):
+        if route.is_stream:
+            # El stream conserva el mensaje; se puede reprocesar con stream_replay
+            offset = (message.headers or {}).get("x-stream-offset")
+            logger.error(f"Mensaje descartado en {route.name} (offset {offset})")
+            await message.ack()
+        else:
+            await message.reject(requeue=False)
+
+    async def _consume_arguments(self, route: RouteDefinition) -> Optional[dict]:
+        if not route.is_stream:
+            return None
+
+        tracker = StreamOffsetTracker(
+            container.resolve(StreamOffsetRepository),
+            stream=route.queue_name,
+            group=route.consumer_group,
+            commit_every=settings.stream_offset_commit_every,
+            default_position=settings.stream_default_offset
+        )
+        self._offset_trackers[route.name] = tracker
+        return {"x-stream-offset": await tracker.start_position()}
 
     async def consume(self):
         try:
             await self.connect()
-            
-            for routing_key in self.event_handlers.keys():
-                if routing_key == settings.company_created_routing_key:
-                    queue_name = settings.company_created_queue
-                elif routing_key == settings.client_created_routing_key:
-                    queue_name = settings.client_created_queue
-                elif routing_key == settings.invoice_request_routing_key:
-                    queue_name = settings.invoice_request_queue
-                else:
-                    queue_name = f"{routing_key.replace('.', '_')}_queue"
-                
-                queue = await self.setup_queue(queue_name, routing_key)
-                await queue.consume(self.on_message)
-                logger.info(f"Escuchando: {routing_key} -> Cola: {queue_name}")
+
+            queues = [(route, await self.declare_route(route)) for route in self.routes.values()]
+
+            for route, queue in queues:
+                consumer_tag = await queue.consume(
+                    partial(self.on_message, route),
+                    arguments=await self._consume_arguments(route)
+                )
+                self.consumers[route.name] = (queue, consumer_tag)
+                logger.info(f"Escuchando: {route.routing_key} -> Cola: {route.name} (prefetch={self._prefetch[route.name]})")
+
+            if settings.factura_limiter_enabled and any(route.adaptive_prefetch for route in self.routes.values()):
+                get_factura_limiter().subscribe(self._on_concurrency_limit)
 
             logger.info("Consumer iniciado exitosamente")
             logger.info(f"Conexión: {'CloudAMQP' if settings.is_cloudamqp else 'RabbitMQ Local'}")
 
-            await asyncio.Future()
+            await self._stop_event.wait()
+            await self.drain()
             
         except Exception as e:
             logger.error(f"Error fatal: {str(e)}")
@@ -146,6 +406,86 @@ class RabbitMQConsumer:
             if self.connection:
                 await self.connection.close()
 
+    def _on_concurrency_limit(self, limit: int):
+        self._target_limit = limit
+        if self._stop_event.is_set() or self._prefetch_task is not None:
+            return
+
+        # Cambiar el prefetch exige re-suscribirse: se agrupan los cambios en una ventana mínima
+        elapsed = time.monotonic() - self._last_prefetch_update
+        delay = max(0.0, settings.adaptive_prefetch_min_interval_seconds - elapsed)
+        self._prefetch_task = asyncio.create_task(self._apply_adaptive_prefetch(delay))
+
+    async def _apply_adaptive_prefetch(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._prefetch_task = None
+        self._last_prefetch_update = time.monotonic()
+
+        for route in self.routes.values():
+            if not route.adaptive_prefetch or route.name not in self.consumers:
+                continue
+
+            prefetch = route.prefetch_for_limit(self._target_limit)
+            if prefetch == self._prefetch[route.name] or self._stop_event.is_set():
+                continue
+
+            # basic.qos solo aplica a consumidores nuevos; los mensajes sin ack siguen en el canal
+            queue, consumer_tag = self.consumers[route.name]
+            try:
+                await queue.cancel(consumer_tag)
+                await self._channels[route.name].set_qos(prefetch_count=prefetch)
+                consumer_tag = await queue.consume(partial(self.on_message, route))
+                self.consumers[route.name] = (queue, consumer_tag)
+                self._prefetch[route.name] = prefetch
+                logger.info(f"Prefetch de {route.name} ajustado a {prefetch} (límite Factura.com {self._target_limit})")
+            except Exception as e:
+                logger.error(f"Error ajustando prefetch de {route.name}: {str(e)}")
+
+    async def drain(self):
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+        for rewind in list(self._rewinds.values()):
+            rewind.cancel()
+
+        for queue, consumer_tag in self.consumers.values():
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as e:
+                logger.warning(f"Error cancelando consumo de {queue.name}: {str(e)}")
+
+        for batcher in self._batchers.values():
+            batcher.flush()
+
+        if self.in_flight:
+            logger.info(f"Esperando {self.in_flight} mensajes en proceso (máximo {settings.consumer_shutdown_timeout_seconds}s)...")
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=settings.consumer_shutdown_timeout_seconds)
+            logger.info("Mensajes en proceso completados")
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.in_flight} mensajes no terminaron a tiempo; el broker los reentregará sin ack")
+
+        for name, tracker in self._offset_trackers.items():
+            try:
+                await tracker.flush()
+            except Exception as e:
+                logger.error(f"Error confirmando offsets de {name}: {str(e)}")
+
+    async def _reply(self, message: aio_pika.IncomingMessage, result: dict):
+        try:
+            await self.channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(result, default=str).encode(),
+                    content_type="application/json",
+                    correlation_id=message.correlation_id
+                ),
+                routing_key=message.reply_to
+            )
+        except Exception as e:
+            logger.error(f"Error enviando respuesta a {message.reply_to}: {str(e)}")
+
     def _clean_json_string(self, json_string: str) -> str:
         import re
         cleaned = re.sub(r'("[\w+/=]+)\n([\w+/=]+")', r'\1\2', json_string)
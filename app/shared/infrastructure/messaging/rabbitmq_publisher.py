@@ -0,0 +1,69 @@
+import aio_pika
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from shared.domain.repositories.event_publisher import EventPublisher
+from .compression import encode_body
+
+logger = logging.getLogger(__name__)
+
+class RabbitMQPublisher(EventPublisher):
+    def __init__(self, channel: Optional[aio_pika.abc.AbstractChannel] = None):
+        self.connection = None
+        self.channel = channel
+
+    async def connect(self):
+        if self.channel:
+            return
+
+        if settings.is_cloudamqp:
+            self.connection = await aio_pika.connect_robust(
+                settings.rabbitmq_connection_url,
+                timeout=30,
+                client_properties={"connection_name": "third_party_publisher"}
+            )
+        else:
+            self.connection = await aio_pika.connect_robust(
+                host=settings.rabbitmq_host,
+                port=settings.rabbitmq_port,
+                login=settings.rabbitmq_username,
+                password=settings.rabbitmq_password,
+                virtualhost=settings.rabbitmq_vhost
+            )
+
+        self.channel = await self.connection.channel()
+        logger.info("Publisher de RabbitMQ conectado")
+
+    async def publish(
+        self,
+        routing_key: str,
+        payload: Dict[str, Any],
+        exchange_name: str = "amq.topic",
+        headers: Optional[Dict[str, Any]] = None
+    ):
+        await self.connect()
+
+        body = json.dumps(payload, default=str).encode()
+        content_encoding = None
+
+        if len(body) >= settings.amqp_compression_threshold_bytes:
+            original_size = len(body)
+            body, content_encoding = encode_body(body, settings.amqp_compression_encoding)
+            logger.info(f"Mensaje {routing_key} comprimido con {content_encoding}: {original_size} -> {len(body)} bytes")
+
+        message = aio_pika.Message(
+            body=body,
+            content_type="application/json",
+            content_encoding=content_encoding,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            headers=headers or {}
+        )
+
+        exchange = await self.channel.get_exchange(exchange_name)
+        await exchange.publish(message, routing_key=routing_key)
+
+    async def close(self):
+        if self.connection:
+            await self.connection.close()
@@ -0,0 +1,88 @@
+from typing import List
+from config.settings import settings
+from .routing import RetryPolicy, RouteDefinition
+from .event_handlers.company_event_handler import handle_company_created_event
+from .event_handlers.client_event_handler import handle_client_created_event, handle_client_created_batch
+from .event_handlers.invoice_event_handler import handle_invoice_request_event
+from .event_handlers.control_event_handler import handle_consumer_control_event
+
+def build_routes(include_streams: bool = True) -> List[RouteDefinition]:
+    retry_policy = RetryPolicy(
+        max_attempts=settings.consumer_retry_max_attempts,
+        backoff_seconds=settings.consumer_retry_backoff_seconds,
+        max_backoff_seconds=settings.consumer_retry_max_backoff_seconds
+    )
+
+    # Micro-batching excluye fair scheduling y partición en client_created
+    client_batching = settings.client_created_batch_size > 1
+
+    routes = [
+        RouteDefinition(
+            routing_key=settings.company_created_routing_key,
+            queue_name=settings.company_created_queue,
+            handler=handle_company_created_event,
+            prefetch=settings.company_created_prefetch,
+            concurrency=settings.company_created_concurrency,
+            handler_timeout=settings.company_created_handler_timeout_seconds,
+            retry=retry_policy,
+            partition_key=("tenant_id", "rfc"),
+            adaptive_prefetch=True
+        ),
+        RouteDefinition(
+            routing_key=settings.client_created_routing_key,
+            queue_name=settings.client_created_queue,
+            handler=handle_client_created_event,
+            prefetch=settings.client_created_prefetch,
+            concurrency=settings.client_created_concurrency,
+            handler_timeout=settings.client_created_handler_timeout_seconds,
+            retry=retry_policy,
+            batch_handler=handle_client_created_batch,
+            batch_size=settings.client_created_batch_size,
+            batch_window_ms=settings.client_created_batch_window_ms,
+            fair_key="tenant_id" if settings.client_created_fair_scheduling and not client_batching else None,
+            tenant_concurrency=settings.client_created_tenant_concurrency,
+            fair_quantum=settings.fair_scheduler_quantum,
+            partition_key=None if client_batching else ("company_id", "rfc"),
+            adaptive_prefetch=True
+        ),
+        RouteDefinition(
+            routing_key=settings.consumer_control_routing_key,
+            queue_name=settings.consumer_control_queue,
+            handler=handle_consumer_control_event,
+            handler_timeout=settings.profiler_max_duration_seconds + 30
+        )
+    ]
+
+    if settings.invoice_request_stream_enabled:
+        # Un stream entrega todo a cada consumidor: solo un worker por grupo debe leerlo
+        if include_streams:
+            routes.append(RouteDefinition(
+                routing_key=settings.invoice_request_routing_key,
+                queue_name=settings.invoice_request_stream_queue,
+                handler=handle_invoice_request_event,
+                queue_type="stream",
+                prefetch=settings.invoice_request_prefetch,
+                concurrency=settings.invoice_request_concurrency,
+                handler_timeout=settings.invoice_request_handler_timeout_seconds,
+                # Sin colas de reintento: un error transitorio detiene el grupo y relee desde el offset con este backoff
+                retry=retry_policy,
+                dead_letter=False,
+                message_ttl_ms=None,
+                consumer_group=settings.invoice_request_stream_group,
+                max_age=settings.invoice_request_stream_max_age
+            ))
+    else:
+        # Sin partición: la creación del cliente ya es única por (empresa, RFC) con single-flight y lease,
+        # y la emisión se coordina por request_id en la propia factura
+        routes.append(RouteDefinition(
+            routing_key=settings.invoice_request_routing_key,
+            queue_name=settings.invoice_request_queue,
+            handler=handle_invoice_request_event,
+            prefetch=settings.invoice_request_prefetch,
+            concurrency=settings.invoice_request_concurrency,
+            handler_timeout=settings.invoice_request_handler_timeout_seconds,
+            retry=retry_policy,
+            adaptive_prefetch=True
+        ))
+
+    return routes
@@ -0,0 +1,149 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from shared.exceptions import ValidationException
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+BatchEventHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+QUEUE_TYPES = ("classic", "quorum", "stream")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Reintentos ante excepciones o timeouts del handler; los fallos de negocio (success=False) no se reintentan.
+
+    Un timeout puede cortar al handler después de crear algo en Factura.com: los handlers que crean
+    concilian antes de volver a crear (find_company, find_cfdi, find_client).
+    """
+
+    max_attempts: int = 1
+    backoff_seconds: float = 5.0
+    backoff_multiplier: float = 2.0
+    max_backoff_seconds: float = 300.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_attempts > 1
+
+    def delay_for(self, attempt: int) -> float:
+        delay = self.backoff_seconds * (self.backoff_multiplier ** max(attempt - 1, 0))
+        return min(delay, self.max_backoff_seconds)
+
+    def delay_tiers(self) -> List[float]:
+        """Escalera de esperas de backoff_seconds a max_backoff_seconds; cada una tiene su propia cola de reintento."""
+        tiers = []
+        delay = self.backoff_seconds
+        while delay < self.max_backoff_seconds and self.backoff_multiplier > 1:
+            tiers.append(delay)
+            delay *= self.backoff_multiplier
+        tiers.append(self.max_backoff_seconds)
+        return tiers
+
+    def tier_for(self, delay: float) -> float:
+        """Menor escalón que cubre `delay`; por encima del máximo se usa el último."""
+        tiers = self.delay_tiers()
+        return next((tier for tier in tiers if tier >= delay), tiers[-1])
+
+
+@dataclass
+class RouteDefinition:
+    routing_key: str
+    queue_name: str
+    handler: EventHandler
+    queue_type: str = "classic"
+    prefetch: int = 1
+    concurrency: int = 1
+    handler_timeout: Optional[float] = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    dead_letter: bool = True
+    message_ttl_ms: Optional[int] = 8640000
+    exchange: str = "amq.topic"
+    consumer_group: Optional[str] = None
+    max_age: Optional[str] = None
+    batch_handler: Optional[BatchEventHandler] = None
+    batch_size: int = 1
+    batch_window_ms: int = 0
+    fair_key: Optional[str] = None
+    tenant_concurrency: int = 1
+    fair_quantum: int = 1
+    partition_key: Optional[Tuple[str, ...]] = None
+    adaptive_prefetch: bool = False
+
+    def __post_init__(self):
+        if self.queue_type not in QUEUE_TYPES:
+            raise ValidationException(f"Tipo de cola no soportado para {self.queue_name}: {self.queue_type}")
+        if self.concurrency < 1 or self.prefetch < 1:
+            raise ValidationException(f"prefetch y concurrency deben ser mayores a 0 en {self.queue_name}")
+        if self.is_batched and self.is_fair:
+            raise ValidationException(f"{self.queue_name}: micro-batching y fair scheduling son excluyentes")
+        if self.is_batched and self.is_partitioned:
+            raise ValidationException(f"{self.queue_name}: micro-batching y partición por llave son excluyentes")
+        if self.is_batched:
+            # Cada mensaje del lote ocupa un slot mientras espera su resultado
+            self.concurrency = max(self.concurrency, self.batch_size)
+        if self.prefetch < self.concurrency:
+            self.prefetch = self.concurrency
+        if self.queue_type == "stream" and (self.dead_letter or self.message_ttl_ms):
+            raise ValidationException(f"Las colas stream no soportan DLQ ni TTL por mensaje: {self.queue_name}")
+        if self.queue_type == "stream" and self.adaptive_prefetch:
+            raise ValidationException(f"Las rutas stream no soportan prefetch adaptativo: {self.queue_name}")
+        if self.queue_type == "stream" and not self.consumer_group:
+            raise ValidationException(f"Las rutas stream requieren consumer_group para rastrear offsets: {self.queue_name}")
+
+    @property
+    def name(self) -> str:
+        if self.consumer_group:
+            return f"{self.queue_name}:{self.consumer_group}"
+        return self.queue_name
+
+    @property
+    def is_batched(self) -> bool:
+        return self.batch_handler is not None and self.batch_size > 1
+
+    @property
+    def is_fair(self) -> bool:
+        return self.fair_key is not None
+
+    @property
+    def is_partitioned(self) -> bool:
+        return bool(self.partition_key)
+
+    @property
+    def is_stream(self) -> bool:
+        return self.queue_type == "stream"
+
+    def prefetch_for_limit(self, limit: int) -> int:
+        """Prefetch proporcional al límite de concurrencia externo, conservando la holgura configurada."""
+        window = math.ceil(limit * self.prefetch / self.concurrency)
+        return max(1, self.batch_size, min(self.prefetch, window))
+
+    @property
+    def dlq_name(self) -> str:
+        return f"{self.queue_name}_dlq"
+
+    def retry_queue_name(self, delay: float) -> str:
+        return f"{self.queue_name}_retry_{int(delay * 1000)}ms"
+
+    def queue_arguments(self) -> Dict[str, Any]:
+        arguments: Dict[str, Any] = {}
+        if self.queue_type != "classic":
+            arguments["x-queue-type"] = self.queue_type
+        if self.dead_letter:
+            arguments["x-dead-letter-exchange"] = ""
+            arguments["x-dead-letter-routing-key"] = self.dlq_name
+        if self.message_ttl_ms:
+            arguments["x-message-ttl"] = self.message_ttl_ms
+        if self.max_age:
+            arguments["x-max-age"] = self.max_age
+        return arguments
+
+    def retry_queue_arguments(self, delay: float) -> Dict[str, Any]:
+        # RabbitMQ solo expira mensajes en la cabeza de la cola: un TTL fijo por cola mantiene el orden de expiración.
+        # Al expirar vuelven a la cola principal por el exchange por defecto
+        return {
+            "x-message-ttl": int(delay * 1000),
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": self.queue_name
+        }
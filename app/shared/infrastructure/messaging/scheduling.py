@@ -0,0 +1,114 @@
+import asyncio
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+
+class TenantFairScheduler:
+    """Admite trabajo por tenant con deficit round-robin y un tope de concurrencia por tenant.
+
+    Los mensajes del prefetch esperan en una cola por tenant; cada vez que se libera un slot
+    se atiende al siguiente tenant con turno. El tope solo se aplica mientras otro tenant tenga
+    trabajo esperando: si todos los que esperan están en su tope, el slot libre se concede igual,
+    así una importación grande usa toda la capacidad cuando no compite con nadie.
+    """
+
+    def __init__(self, concurrency: int, per_tenant_limit: int, quantum: int = 1):
+        self.concurrency = concurrency
+        self.per_tenant_limit = max(1, per_tenant_limit)
+        self.quantum = max(1, quantum)
+        self.running = 0
+        self._buckets: Dict[str, Deque[asyncio.Future]] = defaultdict(deque)
+        self._running_by_tenant: Dict[str, int] = defaultdict(int)
+        self._deficit: Dict[str, int] = {}
+        self._active: Deque[str] = deque()
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str]):
+        tenant = tenant or ""
+        await self._acquire(tenant)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def queued(self, tenant: Optional[str] = None) -> int:
+        if tenant is not None:
+            return len(self._buckets.get(tenant, ()))
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    async def _acquire(self, tenant: str):
+        future = asyncio.get_running_loop().create_future()
+        if tenant not in self._deficit:
+            self._deficit[tenant] = 0
+            self._active.append(tenant)
+        self._buckets[tenant].append(future)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El slot ya se había concedido: devolverlo
+                self._release(tenant)
+            else:
+                self._discard(tenant, future)
+            raise
+
+    def _release(self, tenant: str):
+        self.running -= 1
+        self._running_by_tenant[tenant] -= 1
+        if self._running_by_tenant[tenant] <= 0:
+            self._running_by_tenant.pop(tenant, None)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.concurrency:
+            tenant = self._next_tenant()
+            if tenant is None:
+                return
+
+            future = self._buckets[tenant].popleft()
+            self.running += 1
+            self._running_by_tenant[tenant] += 1
+            future.set_result(None)
+
+    def _next_tenant(self) -> Optional[str]:
+        tenant = self._pick(respect_cap=True)
+        if tenant is None:
+            # Todos los tenants con trabajo en cola están en su tope: la capacidad libre no se desperdicia
+            tenant = self._pick(respect_cap=False)
+        return tenant
+
+    def _pick(self, respect_cap: bool) -> Optional[str]:
+        capped = 0
+        while self._active and capped < len(self._active):
+            tenant = self._active[0]
+            bucket = self._buckets.get(tenant)
+
+            if not bucket:
+                self._active.popleft()
+                self._deficit.pop(tenant, None)
+                self._buckets.pop(tenant, None)
+                continue
+
+            if respect_cap and self._running_by_tenant[tenant] >= self.per_tenant_limit:
+                self._active.rotate(-1)
+                capped += 1
+                continue
+
+            if self._deficit[tenant] < 1:
+                self._deficit[tenant] += self.quantum
+
+            self._deficit[tenant] -= 1
+            if self._deficit[tenant] < 1:
+                # Turno agotado: pasa al final de la ronda
+                self._active.rotate(-1)
+            return tenant
+
+        return None
+
+    def _discard(self, tenant: str, future: asyncio.Future):
+        bucket = self._buckets.get(tenant)
+        if bucket and future in bucket:
+            bucket.remove(future)
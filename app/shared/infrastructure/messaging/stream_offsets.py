@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+from shared.domain.repositories.stream_offset_repository import StreamOffsetRepository, StreamPosition
+
+logger = logging.getLogger(__name__)
+
+
+class StreamOffsetTracker:
+    """Calcula el offset confirmable de un grupo cuando los mensajes terminan fuera de orden.
+
+    Solo se confirma hasta el último offset tras el cual no queda ningún mensaje en proceso,
+    de modo que un reinicio nunca se salta un mensaje que no terminó. Un mensaje marcado con `fail`
+    sigue bloqueando la confirmación hasta que se vuelva a leer y termine.
+    """
+
+    def __init__(
+        self,
+        repository: StreamOffsetRepository,
+        stream: str,
+        group: str,
+        commit_every: int = 100,
+        default_position: StreamPosition = "next"
+    ):
+        self.repository = repository
+        self.stream = stream
+        self.group = group
+        self.commit_every = commit_every
+        self.default_position = default_position
+        self._pending: Set[int] = set()
+        self._failed: Set[int] = set()
+        self._settled = asyncio.Event()
+        self._settled.set()
+        self._highest_completed: Optional[int] = None
+        self._committed: Optional[int] = None
+        self._since_commit = 0
+
+    async def start_position(self) -> StreamPosition:
+        position = await self.repository.get_position(self.stream, self.group)
+        if position is None:
+            position = self.default_position
+
+        logger.info(f"Grupo {self.group} reanuda {self.stream} desde {position}")
+        return position
+
+    def begin(self, offset: int):
+        self._pending.add(offset)
+        self._failed.discard(offset)
+        self._settled.clear()
+
+    def fail(self, offset: int):
+        """El mensaje se volverá a leer: ya no está en proceso pero no se confirma nada a partir de él."""
+        self._failed.add(offset)
+        self._update_settled()
+
+    async def wait_settled(self):
+        """Espera a que no quede ningún mensaje en proceso (los fallidos no cuentan)."""
+        await self._settled.wait()
+
+    def resume_position(self) -> StreamPosition:
+        """Offset desde el que releer: el primer mensaje sin terminar o el siguiente al último terminado."""
+        if self._pending:
+            return min(self._pending)
+        if self._highest_completed is not None:
+            return self._highest_completed + 1
+        return self.default_position
+
+    async def complete(self, offset: int):
+        self._pending.discard(offset)
+        self._failed.discard(offset)
+        self._update_settled()
+        if self._highest_completed is None or offset > self._highest_completed:
+            self._highest_completed = offset
+
+        self._since_commit += 1
+        if self._since_commit >= self.commit_every:
+            await self.flush()
+
+    async def flush(self):
+        offset = self._committable()
+        if offset is None or offset == self._committed:
+            return
+
+        await self.repository.commit(self.stream, self.group, offset)
+        self._committed = offset
+        self._since_commit = 0
+        logger.debug(f"Offset {offset} confirmado para {self.group} en {self.stream}")
+
+    def _update_settled(self):
+        if self._pending <= self._failed:
+            self._settled.set()
+
+    def _committable(self) -> Optional[int]:
+        if self._highest_completed is None:
+            return None
+        if self._pending:
+            return min(self._highest_completed, min(self._pending) - 1)
+        return self._highest_completed
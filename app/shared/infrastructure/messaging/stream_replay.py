@@ -0,0 +1,64 @@
+"""Reposiciona un grupo de consumo de un stream para reprocesar mensajes.
+
+Detén el consumer del grupo antes de ejecutarlo; al arrancar de nuevo leerá desde la nueva posición.
+
+    python -m shared.infrastructure.messaging.stream_replay --from 2026-10-01T00:00:00+00:00
+    python -m shared.infrastructure.messaging.stream_replay --group invoice_processor --offset 15230
+    python -m shared.infrastructure.messaging.stream_replay --first
+
+Sin `--group` se reposiciona el grupo configurado (`invoice_request_stream_group`).
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from config.settings import settings
+from shared.domain.repositories.stream_offset_repository import StreamOffsetRepository, StreamPosition
+from shared.exceptions import ValidationException
+from shared.infrastructure.bootstrap import build_container
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def parse_position(args: argparse.Namespace) -> StreamPosition:
+    if args.first:
+        return "first"
+    if args.offset is not None:
+        if args.offset < 0:
+            raise ValidationException("El offset debe ser mayor o igual a 0")
+        return args.offset
+
+    try:
+        timestamp = datetime.fromisoformat(args.from_timestamp)
+    except ValueError:
+        raise ValidationException(f"Timestamp inválido: {args.from_timestamp}")
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+async def replay(stream: str, group: str, position: StreamPosition):
+    container = build_container()
+    await container.startup()
+    try:
+        repository = container.resolve(StreamOffsetRepository)
+        await repository.reset_to(stream, group, position)
+    finally:
+        await container.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Reposiciona un grupo de consumo de un stream")
+    parser.add_argument("--stream", default=settings.invoice_request_stream_queue)
+    parser.add_argument("--group", default=settings.invoice_request_stream_group)
+
+    position = parser.add_mutually_exclusive_group(required=True)
+    position.add_argument("--from", dest="from_timestamp", help="Timestamp ISO 8601 (UTC si no trae zona)")
+    position.add_argument("--offset", type=int)
+    position.add_argument("--first", action="store_true")
+
+    args = parser.parse_args()
+    asyncio.run(replay(args.stream, args.group, parse_position(args)))
+
+if __name__ == "__main__":
+    main()
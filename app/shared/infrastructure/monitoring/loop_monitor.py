@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from config.settings import settings
+from .metrics import event_loop_lag_seconds, event_loop_slow_callbacks_total
+
+logger = logging.getLogger(__name__)
+
+STACK_LIMIT = 25
+
+class LoopLagMonitor:
+    """Mide el retraso del event loop y reporta el stack de la corrutina que lo bloquea.
+
+    Una tarea del loop duerme `interval` segundos y registra la diferencia contra el
+    tiempo real. Un hilo watchdog detecta cuando esa tarea deja de avanzar por más del
+    umbral y captura el stack del hilo del loop mientras sigue bloqueado.
+    """
+
+    def __init__(
+        self,
+        component: str,
+        interval: float = settings.loop_monitor_interval_seconds,
+        threshold: float = settings.loop_slow_callback_threshold_seconds
+    ):
+        self.component = component
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._reported_heartbeat: Optional[float] = None
+
+    def start(self):
+        if not settings.loop_monitor_enabled:
+            logger.info("Monitor de event loop deshabilitado")
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+
+        self._task = self._loop.create_task(self._measure(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Monitor de event loop iniciado ({self.component}, umbral {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        self._stop_event.set()
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        if self._watchdog:
+            self._watchdog.join(timeout=self.interval + self.threshold)
+
+    async def _measure(self):
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - started - self.interval)
+
+            event_loop_lag_seconds.labels(self.component).observe(lag)
+            self._heartbeat = time.monotonic()
+
+            if lag > self.threshold:
+                logger.warning(f"Event loop bloqueado {lag * 1000:.1f}ms ({self.component})")
+
+    def _watch(self):
+        check_every = max(self.threshold / 2, 0.01)
+
+        while not self._stop_event.wait(check_every):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+
+            if stalled_for > self.threshold and self._reported_heartbeat != heartbeat:
+                self._reported_heartbeat = heartbeat
+                event_loop_slow_callbacks_total.labels(self.component).inc()
+                self._report_blocking_stack(stalled_for)
+
+    def _report_blocking_stack(self, stalled_for: float):
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_name() if task else "<callback>"
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+
+        logger.warning(
+            f"Callback lento en event loop ({self.component}): bloqueado {stalled_for * 1000:.0f}ms "
+            f"en tarea {task_name}\n{stack}"
+        )
@@ -0,0 +1,35 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Retraso observado del event loop respecto al intervalo de muestreo",
+    ["component"],
+    buckets=LOOP_LAG_BUCKETS
+)
+
+event_loop_slow_callbacks_total = Counter(
+    "event_loop_slow_callbacks_total",
+    "Callbacks que bloquearon el event loop por encima del umbral",
+    ["component"]
+)
+
+factura_concurrency_limit = Gauge(
+    "factura_concurrency_limit",
+    "Límite de concurrencia adaptativo actual hacia Factura.com",
+    multiprocess_mode="liveall"
+)
+
+factura_circuit_state = Gauge(
+    "factura_circuit_state",
+    "Estado del circuit breaker por grupo de endpoints (0 cerrado, 1 semiabierto, 2 abierto)",
+    ["group"],
+    multiprocess_mode="liveall"
+)
+
+factura_hedged_requests_total = Counter(
+    "factura_hedged_requests_total",
+    "Peticiones a Factura.com que superaron el percentil de hedging, por resultado",
+    ["group", "outcome"]
+)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from config.settings import settings
+from shared.exceptions import ConflictException, ValidationException
+
+logger = logging.getLogger(__name__)
+
+_profiling_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """Perfilador por muestreo del event loop; genera collapsed stacks atribuidos por tarea asyncio.
+
+    wall: un hilo lee el stack del hilo del loop (incluye esperas de I/O).
+    cpu: SIGPROF interrumpe el hilo principal solo mientras el proceso consume CPU.
+    """
+
+    MODES = ("wall", "cpu")
+
+    def __init__(self, mode: str = "wall", interval: float = 0.005):
+        if mode not in self.MODES:
+            raise ValidationException(f"Modo de perfilado no soportado: {mode}")
+        if interval <= 0:
+            raise ValidationException("El intervalo de muestreo debe ser mayor a 0")
+
+        self.mode = mode
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._sampler_thread: Optional[threading.Thread] = None
+        self._previous_handler = None
+
+    async def profile(self, duration: float) -> str:
+        if not _profiling_lock.acquire(blocking=False):
+            raise ConflictException("Ya hay un perfilado en curso en este proceso")
+
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._thread_id = threading.get_ident()
+
+            logger.info(f"Iniciando perfilado {self.mode} por {duration}s (intervalo {self.interval * 1000:.1f}ms)")
+            self._start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                self._stop()
+
+            logger.info(f"Perfilado {self.mode} terminado: {self.total_samples} muestras")
+            return self.collapsed()
+        finally:
+            _profiling_lock.release()
+
+    @property
+    def total_samples(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _start(self):
+        if self.mode == "cpu":
+            if threading.current_thread() is not threading.main_thread():
+                raise ValidationException("El perfilado de CPU requiere que el loop corra en el hilo principal")
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_sigprof)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop_event.clear()
+            self._sampler_thread = threading.Thread(
+                target=self._sample_wall,
+                name="wall-profiler",
+                daemon=True
+            )
+            self._sampler_thread.start()
+
+    def _stop(self):
+        if self.mode == "cpu":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        else:
+            self._stop_event.set()
+            if self._sampler_thread:
+                self._sampler_thread.join()
+
+    def _sample_wall(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._record(frame)
+
+    def _on_sigprof(self, signum, frame):
+        if frame is not None:
+            self._record(frame)
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_qualname} ({self._short_path(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+
+        stack.append(self._task_label())
+        stack.reverse()
+        self.samples[";".join(stack).replace("\n", " ")] += 1
+
+    def _task_label(self) -> str:
+        task = asyncio.current_task(self._loop) if self._loop else None
+        if task is None:
+            return "task:<loop>"
+
+        coro = task.get_coro()
+        coro_name = getattr(coro, "__qualname__", type(coro).__name__)
+        return f"task:{task.get_name()}[{coro_name}]"
+
+    @staticmethod
+    def _short_path(filename: str) -> str:
+        if "site-packages" in filename:
+            return filename.split("site-packages" + os.sep, 1)[-1]
+
+        cwd = os.getcwd() + os.sep
+        if filename.startswith(cwd):
+            return filename[len(cwd):]
+        return filename
+
+
+def write_collapsed_profile(collapsed: str, mode: str) -> str:
+    os.makedirs(settings.profiler_output_dir, exist_ok=True)
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(settings.profiler_output_dir, f"profile-{mode}-{os.getpid()}-{timestamp}.collapsed")
+    with open(path, "w") as profile_file:
+        profile_file.write(collapsed)
+
+    logger.info(f"Perfil guardado en {path}")
+    return path
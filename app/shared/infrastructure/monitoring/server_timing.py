@@ -0,0 +1,97 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+
+import httpx
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("third_party.access")
+
+class RequestTimings:
+
+    def __init__(self):
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, category: str, seconds: float):
+        self.durations[category] += seconds
+        self.counts[category] += 1
+
+    def header(self, total: float) -> str:
+        metrics = [
+            f'{category};dur={seconds * 1000:.1f};desc="{self.counts[category]} ops"'
+            for category, seconds in self.durations.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            category: {"dur_ms": round(seconds * 1000, 1), "count": self.counts[category]}
+            for category, seconds in self.durations.items()
+        }
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def record_timing(category: str, seconds: float):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(category, seconds)
+
+@contextmanager
+def timed(category: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(category, time.perf_counter() - started)
+
+def timed_call(category: str):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timed(category):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def httpx_timing_hooks(category: str) -> Dict[str, list]:
+    async def on_request(request: httpx.Request):
+        request.extensions["timing_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response):
+        started = response.request.extensions.get("timing_started")
+        if started is not None:
+            record_timing(category, time.perf_counter() - started)
+
+    return {"request": [on_request], "response": [on_response]}
+
+async def server_timing_middleware(request: Request, call_next):
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    started = time.perf_counter()
+    status_code = 500
+
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = timings.header(time.perf_counter() - started)
+        return response
+    finally:
+        _current_timings.reset(token)
+        route = request.scope.get("route")
+
+        access_logger.info(json.dumps({
+            "method": request.method,
+            "path": request.url.path,
+            "route": getattr(route, "path", request.url.path),
+            "status": status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "timings": timings.as_dict()
+        }))
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class DataLoader:
+    """Agrupa las búsquedas por llave que llegan en la misma ventana y las resuelve con una sola consulta.
+
+    Con `window_seconds=0` la ventana es un tick del loop: se juntan las llamadas hechas antes de ceder el control.
+    No guarda resultados entre ventanas, así que nunca devuelve datos más viejos que una consulta directa.
+    """
+
+    def __init__(self, batch_function: BatchFunction, window_seconds: float = 0.0, max_batch_size: int = 200):
+        self.batch_function = batch_function
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._handle: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                if self.window_seconds > 0:
+                    self._handle = loop.call_later(self.window_seconds, self._dispatch)
+                else:
+                    self._handle = loop.call_soon(self._dispatch)
+
+        # shield: si un llamador se cancela, los demás que comparten la llave siguen esperando
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]):
+        try:
+            results = await self.batch_function(list(batch))
+        except Exception as e:
+            logger.error(f"Error en carga por lote de {len(batch)} llaves: {str(e)}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
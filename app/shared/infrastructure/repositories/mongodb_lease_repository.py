@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from ...domain.repositories.lease_repository import LeaseRepository
+from shared.infrastructure.monitoring.server_timing import timed_call
+
+class MongoDBLeaseRepository(LeaseRepository):
+    """Leases con vencimiento en `leases`; el índice TTL limpia los que quedaron huérfanos por un proceso caído."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database["leases"]
+
+    @staticmethod
+    async def ensure_indexes(database: AsyncIOMotorDatabase):
+        await database["leases"].create_index("expires_at", expireAfterSeconds=0, name="leases_ttl")
+
+    @timed_call("mongo")
+    async def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            # Si el lease vigente es de otro, el filtro no coincide y el upsert choca con el _id existente
+            await self.collection.update_one(
+                {"_id": key, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds), "acquired_at": now}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @timed_call("mongo")
+    async def release(self, key: str, owner: str) -> None:
+        await self.collection.delete_one({"_id": key, "owner": owner})
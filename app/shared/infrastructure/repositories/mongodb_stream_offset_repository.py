@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ...domain.repositories.stream_offset_repository import StreamOffsetRepository, StreamPosition
+from shared.infrastructure.monitoring.server_timing import timed_call
+
+logger = logging.getLogger(__name__)
+
+class MongoDBStreamOffsetRepository(StreamOffsetRepository):
+    """Offsets confirmados por (stream, grupo); un documento por grupo en `stream_offsets`."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database["stream_offsets"]
+
+    @timed_call("mongo")
+    async def get_position(self, stream: str, group: str) -> Optional[StreamPosition]:
+        document = await self.collection.find_one({"_id": self._key(stream, group)})
+        if not document:
+            return None
+
+        if document.get("replay_from") is not None:
+            return document["replay_from"]
+        if document.get("offset") is not None:
+            return document["offset"] + 1
+        return None
+
+    @timed_call("mongo")
+    async def commit(self, stream: str, group: str, offset: int) -> None:
+        # $max evita retroceder si dos commits llegan fuera de orden
+        await self.collection.update_one(
+            {"_id": self._key(stream, group)},
+            {
+                "$max": {"offset": offset},
+                "$set": {"stream": stream, "group": group, "updated_at": datetime.now(timezone.utc)},
+                "$unset": {"replay_from": ""}
+            },
+            upsert=True
+        )
+
+    @timed_call("mongo")
+    async def reset_to(self, stream: str, group: str, position: StreamPosition) -> None:
+        if isinstance(position, int):
+            update = {"$set": {"offset": position - 1}, "$unset": {"replay_from": ""}}
+        else:
+            update = {"$set": {"replay_from": position}, "$unset": {"offset": ""}}
+
+        update["$set"].update({"stream": stream, "group": group, "updated_at": datetime.now(timezone.utc)})
+        await self.collection.update_one({"_id": self._key(stream, group)}, update, upsert=True)
+        logger.info(f"Grupo {group} de {stream} reposicionado en {position}")
+
+    @staticmethod
+    def _key(stream: str, group: str) -> str:
+        return f"{stream}:{group}"
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, List
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class AIMDLimiter:
+    """Límite de concurrencia adaptativo: suma ~1 por ventana sana y multiplica por `backoff_ratio` ante sobrecarga.
+
+    Una respuesta es sana si no es 429/5xx/timeout y su latencia no supera `latency_threshold`.
+    El límite solo crece cuando se está usando, para no inflarlo en reposo.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_threshold: float,
+        backoff_ratio: float = 0.7
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._listeners: List[Callable[[int], None]] = []
+        self._last_decrease = 0.0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def subscribe(self, listener: Callable[[int], None]):
+        self._listeners.append(listener)
+        listener(self.current_limit)
+
+    async def acquire(self):
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def release(self, latency: float, overloaded: bool):
+        utilized = self.in_flight >= self.current_limit / 2
+        self.in_flight -= 1
+        previous = self.current_limit
+
+        if overloaded:
+            self._decrease()
+        elif latency <= self.latency_threshold and utilized:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+        self._wake()
+        if self.current_limit != previous:
+            self._notify()
+
+    def _decrease(self):
+        # Una sola reducción por ventana: las respuestas de la misma ráfaga llegan juntas
+        now = time.monotonic()
+        if now - self._last_decrease < self.latency_threshold:
+            return
+
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+        logger.warning(f"Límite de concurrencia {self.name} reducido a {self.current_limit}")
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.current_limit:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _notify(self):
+        for listener in self._listeners:
+            try:
+                listener(self.current_limit)
+            except Exception as e:
+                logger.error(f"Error notificando límite {self.name}: {str(e)}")
+
+
+class AdaptiveLimitTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que pasa cada petición por un AIMDLimiter compartido."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AIMDLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire()
+        start = time.perf_counter()
+        overloaded = False
+        try:
+            response = await self.transport.handle_async_request(request)
+            overloaded = response.status_code == 429 or response.status_code >= 500
+            return response
+        except httpx.TimeoutException:
+            overloaded = True
+            raise
+        finally:
+            self.limiter.release(time.perf_counter() - start, overloaded)
+
+    async def aclose(self):
+        await self.transport.aclose()
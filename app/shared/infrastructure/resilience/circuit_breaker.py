@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from shared.exceptions import ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(ServiceUnavailableException):
+    pass
+
+
+class BulkheadFullError(ServiceUnavailableException):
+    pass
+
+
+class CircuitBreaker:
+    """Breaker por grupo de endpoints: abre tras `failure_threshold` fallos seguidos y prueba con una sola petición."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        on_state_change: Optional[Callable[[str, str], None]] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_request(self) -> bool:
+        """Admite la petición o lanza CircuitOpenError; devuelve True si es la petición de prueba."""
+        if self.state == OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(f"Circuito {self.name} abierto en Factura.com", retry_after=remaining)
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Circuito {self.name} en prueba en Factura.com", retry_after=1.0)
+            self._probe_in_flight = True
+            return True
+
+        return False
+
+    def record(self, success: Optional[bool], probe: bool = False):
+        """`None` indica que la petición no terminó (p. ej. cancelada) y no cuenta como resultado."""
+        if probe:
+            self._probe_in_flight = False
+
+        if success is None:
+            return
+
+        if self.state == OPEN and not probe:
+            # Resultado de una petición admitida antes de abrir: no cambia el estado
+            return
+
+        if success:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+            return
+
+        self.failures += 1
+        if probe or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+
+        previous, self.state = self.state, state
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuito {self.name}: {previous} -> {state}")
+        if self.on_state_change:
+            self.on_state_change(self.name, state)
+
+
+class Bulkhead:
+    def __init__(self, name: str, max_concurrency: int, max_wait: float):
+        self.name = name
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise BulkheadFullError(f"Sin capacidad para {self.name} en Factura.com", retry_after=self.max_wait)
+
+    def release(self):
+        self._semaphore.release()
+
+
+@dataclass
+class EndpointPolicy:
+    breaker: CircuitBreaker
+    bulkhead: Bulkhead
+    timeout: float
+
+
+def classify_endpoint(path: str) -> str:
+    if "/catalogo/" in path:
+        return "catalog"
+    if "/series" in path:
+        return "series"
+    if "/clients" in path:
+        return "clients"
+    if "/cfdi" in path:
+        return "cfdi"
+    return "account"
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Aplica breaker, bulkhead y timeout propios del grupo de endpoints antes de delegar la petición."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policies: Dict[str, EndpointPolicy]):
+        self.transport = transport
+        self.policies = policies
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.policies[classify_endpoint(request.url.path)]
+
+        probe = policy.breaker.before_request()
+        try:
+            await policy.bulkhead.acquire()
+        except BaseException:
+            policy.breaker.record(None, probe)
+            raise
+
+        success = None
+        try:
+            request.extensions["timeout"] = httpx.Timeout(policy.timeout).as_dict()
+            response = await self.transport.handle_async_request(request)
+            success = response.status_code != 429 and response.status_code < 500
+            return response
+        except httpx.TransportError:
+            success = False
+            raise
+        finally:
+            policy.bulkhead.release()
+            policy.breaker.record(success, probe)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+import httpx
+
+from .circuit_breaker import classify_endpoint
+
+logger = logging.getLogger(__name__)
+
+HEDGEABLE_METHODS = ("GET",)
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias; el percentil se recalcula cada `refresh_every` muestras."""
+
+    def __init__(self, percentile: float, window: int = 200, min_samples: int = 20, refresh_every: int = 10):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.refresh_every = max(1, refresh_every)
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._pending = 0
+        self._value: Optional[float] = None
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+        self._pending += 1
+        if self._pending >= self.refresh_every or self._value is None:
+            self._refresh()
+
+    def threshold(self) -> Optional[float]:
+        """Latencia del percentil observado, o None mientras no haya muestras suficientes."""
+        if len(self._samples) < self.min_samples:
+            return None
+        return self._value
+
+    def _refresh(self):
+        self._pending = 0
+        if len(self._samples) < self.min_samples:
+            return
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        self._value = ordered[index]
+
+
+class HedgeBudget:
+    """Token bucket: cada petición original aporta `ratio` tokens y cada hedge gasta uno."""
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+
+    def deposit(self):
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+
+class HedgingTransport(httpx.AsyncBaseTransport):
+    """Lanza una segunda petición idempotente si la primera supera el percentil observado y se queda con la primera respuesta.
+
+    Solo aplica a GET de los grupos indicados; el presupuesto limita la carga extra a `ratio` de las peticiones.
+    Si un intento falla se espera al otro, de modo que el hedge nunca empeora el resultado.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        trackers: Dict[str, LatencyTracker],
+        budget: HedgeBudget,
+        min_delay: float = 0.0,
+        on_hedge: Optional[Callable[[str, str], None]] = None
+    ):
+        self.transport = transport
+        self.trackers = trackers
+        self.budget = budget
+        self.min_delay = min_delay
+        self.on_hedge = on_hedge
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        group = classify_endpoint(request.url.path)
+        tracker = self.trackers.get(group)
+        if tracker is None or request.method not in HEDGEABLE_METHODS:
+            return await self.transport.handle_async_request(request)
+
+        self.budget.deposit()
+        start = time.perf_counter()
+        primary = asyncio.create_task(self.transport.handle_async_request(request))
+
+        threshold = tracker.threshold()
+        if threshold is None:
+            response = await primary
+            tracker.record(time.perf_counter() - start)
+            return response
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=max(threshold, self.min_delay))
+        except BaseException:
+            # asyncio.wait no cancela lo que espera: sin esto la original queda huérfana con su slot y su respuesta
+            primary.cancel()
+            primary.add_done_callback(self._close_late_response)
+            raise
+        if done:
+            response = primary.result()
+            tracker.record(time.perf_counter() - start)
+            return response
+
+        if not self.budget.try_spend():
+            self._notify(group, "budget_exhausted")
+            response = await primary
+            tracker.record(time.perf_counter() - start)
+            return response
+
+        hedge = asyncio.create_task(self.transport.handle_async_request(self._copy(request)))
+        try:
+            response, winner = await self._first_success(primary, hedge)
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+        # Si ganó el hedge, la original tardó al menos esto
+        tracker.record(time.perf_counter() - start)
+        self._notify(group, "hedge_won" if winner is hedge else "primary_won")
+        return response
+
+    async def _first_success(self, primary: asyncio.Task, hedge: asyncio.Task):
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = None
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    error = error or task.exception()
+                elif winner is None:
+                    winner = task
+                else:
+                    # Ambas terminaron en la misma vuelta
+                    self._close_late_response(task)
+
+            if winner is not None:
+                for other in pending:
+                    other.cancel()
+                    other.add_done_callback(self._close_late_response)
+                return winner.result(), winner
+
+        raise error or asyncio.CancelledError()
+
+    @staticmethod
+    def _copy(request: httpx.Request) -> httpx.Request:
+        return httpx.Request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            extensions=dict(request.extensions)
+        )
+
+    @staticmethod
+    def _close_late_response(task: asyncio.Task):
+        # La petición perdedora pudo responder antes de cancelarse: liberar su conexión
+        if task.cancelled() or task.exception() is not None:
+            return
+        asyncio.ensure_future(task.result().aclose())
+
+    def _notify(self, group: str, outcome: str):
+        if self.on_hedge:
+            self.on_hedge(group, outcome)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from datetime import datetime, timezone
+import secrets
+import logging
+
+from config.settings import settings
+from shared.exceptions import ConflictException, ValidationException
+from ..monitoring.profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if not settings.admin_api_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="API de administración deshabilitada")
+
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_api_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de administración inválido")
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin_token)])
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    duration: float = Query(10, gt=0, le=settings.profiler_max_duration_seconds, description="Duración del muestreo en segundos"),
+    mode: str = Query("wall", description="Tipo de perfilado: wall|cpu"),
+    interval_ms: float = Query(5, ge=1, le=100, description="Intervalo de muestreo en milisegundos")
+) -> PlainTextResponse:
+    try:
+        profiler = SamplingProfiler(mode=mode, interval=interval_ms / 1000)
+        collapsed = await profiler.profile(duration)
+
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        return PlainTextResponse(
+            collapsed,
+            headers={
+                "Content-Disposition": f'attachment; filename="profile-{mode}-{timestamp}.collapsed"',
+                "X-Profile-Samples": str(profiler.total_samples)
+            }
+        )
+
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ConflictException as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ejecutando perfilado: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import List, Dict, Any, Optional 
 import logging 
+import math
+from shared.exceptions import ServiceUnavailableException
 from ..services.factura_catalog_service import FacturaCatalogService 
 from ..dependencies import get_factura_catalog_service
 
@@ -8,11 +10,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/catalogs", tags=["catalogs"])
 
-catalog_service = get_factura_catalog_service()
+def _service_unavailable(e: ServiceUnavailableException) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
 
 @router.get("/cfdi-uses")
 async def get_cfdi_uses(
-    regime_code: Optional[str] = Query(None, description="Filtrar por régimen fiscal compatible")
+    regime_code: Optional[str] = Query(None, description="Filtrar por régimen fiscal compatible"),
+    catalog_service: FacturaCatalogService = Depends(get_factura_catalog_service)
 ) -> Dict[str, Any]: 
     try: 
         
@@ -27,6 +35,8 @@ async def get_cfdi_uses(
         
         return {"success": True, "data": cfdi_uses}
         
+    except ServiceUnavailableException as e:
+        raise _service_unavailable(e)
     except Exception as e: 
         logger.error(f"Error obteniendo CFDI uses: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
@@ -34,7 +44,8 @@ async def get_cfdi_uses(
         
 @router.get("/tax-regimes")
 async def get_tax_regimes(
-    person_type: Optional[str] = Query(None, description="Tipo de persona: fisca|moral")
+    person_type: Optional[str] = Query(None, description="Tipo de persona: fisca|moral"),
+    catalog_service: FacturaCatalogService = Depends(get_factura_catalog_service)
 ) -> Dict[str, Any]:
     
     try: 
@@ -52,15 +63,21 @@ async def get_tax_regimes(
         
         return {"success": True, "data": regimes}
         
+    except ServiceUnavailableException as e:
+        raise _service_unavailable(e)
     except Exception as e: 
         logger.error(f"Error obteniendo tax regimes: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
 
 @router.get('/countries')
-async def get_countries() -> Dict[str, Any]: 
+async def get_countries(
+    catalog_service: FacturaCatalogService = Depends(get_factura_catalog_service)
+) -> Dict[str, Any]: 
     try:
         countries = await catalog_service.get_countries()
         return {"success": True, "data": countries}
+    except ServiceUnavailableException as e:
+        raise _service_unavailable(e)
     except Exception as e:
         logger.error(f"Error obteniendo countries: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
\ No newline at end of file
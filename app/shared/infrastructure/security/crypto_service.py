@@ -7,6 +7,7 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from typing import Dict, Any
 
 from ...domain.repositories.encryption_service import EncryptionService 
+from ..monitoring.server_timing import timed
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -42,7 +43,8 @@ class CrytoService(EncryptionService):
             if not data: 
                 return data 
             
-            encrypted_data = self.fernet.encrypt(data.encode())
+            with timed("crypto"):
+                encrypted_data = self.fernet.encrypt(data.encode())
             return encrypted_data.decode()
             
         except Exception as e: 
@@ -55,7 +57,8 @@ class CrytoService(EncryptionService):
             if not encrypted_data: 
                 return encrypted_data 
             
-            decrypted_data = self.fernet.decrypt(encrypted_data.encode())
+            with timed("crypto"):
+                decrypted_data = self.fernet.decrypt(encrypted_data.encode())
             return decrypted_data.decode()
             
         except Exception as e: 
@@ -1,6 +1,7 @@
-import httpx 
 from typing import Dict, List, Any 
 from config.settings import settings 
+from shared.exceptions import ServiceUnavailableException
+from .factura_http import build_factura_http_client
 import logging 
 from datetime import datetime, timedelta, timezone
 
@@ -12,7 +13,7 @@ class FacturaCatalogService:
         self.api_key = settings.factura_com_api_key 
         self.secret_key = settings.factura_com_secret_key
         self.base_url = settings.factura_com_api_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = build_factura_http_client()
         self._cache = {}
         self._cache_expiry = {}
 
@@ -41,6 +42,8 @@ class FacturaCatalogService:
 
             return catalog_data
              
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo CFDI: {str(e)}")
             return []
@@ -72,6 +75,8 @@ class FacturaCatalogService:
 
             return regimes_data
              
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo de regímenes: {str(e)}")
             
@@ -102,6 +107,8 @@ class FacturaCatalogService:
 
             return countries_data
             
+        except ServiceUnavailableException:
+            raise
         except Exception as e: 
             logger.error(f"Error obteniendo catálogo países: {str(e)}")
             return []
@@ -149,4 +156,7 @@ class FacturaCatalogService:
             return False 
         if cache_key not in self._cache_expiry: 
             return False 
-        return datetime.now(timezone.utc) < self._cache_expiry[cache_key]
\ No newline at end of file
+        return datetime.now(timezone.utc) < self._cache_expiry[cache_key]
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import Dict
+
+import httpx
+
+from config.settings import settings
+from shared.infrastructure.monitoring.metrics import factura_circuit_state, factura_concurrency_limit, factura_hedged_requests_total
+from shared.infrastructure.monitoring.server_timing import httpx_timing_hooks
+from shared.infrastructure.resilience.adaptive_limiter import AIMDLimiter, AdaptiveLimitTransport
+from shared.infrastructure.resilience.circuit_breaker import (
+    STATE_VALUES,
+    Bulkhead,
+    CircuitBreaker,
+    EndpointPolicy,
+    ResilientTransport
+)
+from shared.infrastructure.resilience.hedging import HedgeBudget, HedgingTransport, LatencyTracker
+
+ENDPOINT_GROUPS = ("catalog", "account", "series", "clients", "cfdi")
+
+@lru_cache()
+def get_factura_limiter() -> AIMDLimiter:
+    limiter = AIMDLimiter(
+        "factura",
+        initial_limit=settings.factura_limiter_initial,
+        min_limit=settings.factura_limiter_min,
+        max_limit=settings.factura_limiter_max,
+        latency_threshold=settings.factura_limiter_latency_threshold_seconds,
+        backoff_ratio=settings.factura_limiter_backoff_ratio
+    )
+    limiter.subscribe(factura_concurrency_limit.set)
+    return limiter
+
+@lru_cache()
+def get_factura_endpoint_policies() -> Dict[str, EndpointPolicy]:
+    policies = {}
+    for group in ENDPOINT_GROUPS:
+        factura_circuit_state.labels(group=group).set(0)
+        policies[group] = EndpointPolicy(
+            breaker=CircuitBreaker(
+                group,
+                failure_threshold=settings.factura_breaker_failure_threshold,
+                reset_timeout=settings.factura_breaker_reset_timeout_seconds,
+                on_state_change=_record_circuit_state
+            ),
+            bulkhead=Bulkhead(
+                group,
+                max_concurrency=settings.factura_bulkheads.get(group, 4),
+                max_wait=settings.factura_bulkhead_max_wait_seconds
+            ),
+            timeout=settings.factura_endpoint_timeouts.get(group, 30.0)
+        )
+    return policies
+
+def _record_circuit_state(group: str, state: str):
+    factura_circuit_state.labels(group=group).set(STATE_VALUES[state])
+
+@lru_cache()
+def get_factura_latency_trackers() -> Dict[str, LatencyTracker]:
+    return {
+        group: LatencyTracker(
+            settings.factura_hedging_percentile,
+            window=settings.factura_hedging_window,
+            min_samples=settings.factura_hedging_min_samples
+        )
+        for group in settings.factura_hedging_groups
+    }
+
+@lru_cache()
+def get_factura_hedge_budget() -> HedgeBudget:
+    return HedgeBudget(settings.factura_hedging_budget_ratio)
+
+def _record_hedge(group: str, outcome: str):
+    factura_hedged_requests_total.labels(group=group, outcome=outcome).inc()
+
+def build_factura_http_client() -> httpx.AsyncClient:
+    # Orden: hedging -> breaker/bulkhead por endpoint -> límite adaptativo global -> HTTP
+    transport = httpx.AsyncHTTPTransport()
+    if settings.factura_limiter_enabled:
+        transport = AdaptiveLimitTransport(transport, get_factura_limiter())
+    if settings.factura_breakers_enabled:
+        transport = ResilientTransport(transport, get_factura_endpoint_policies())
+    if settings.factura_hedging_enabled:
+        # Cada intento pasa por breaker y limitador, así el hedge no esquiva la protección
+        transport = HedgingTransport(
+            transport,
+            get_factura_latency_trackers(),
+            get_factura_hedge_budget(),
+            min_delay=settings.factura_hedging_min_delay_seconds,
+            on_hedge=_record_hedge
+        )
+
+    return httpx.AsyncClient(
+        timeout=30.0,
+        transport=transport,
+        event_hooks=httpx_timing_hooks("factura")
+    )
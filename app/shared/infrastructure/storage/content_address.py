@@ -0,0 +1,39 @@
+import hashlib
+
+from shared.exceptions import ValidationException
+
+REF_PREFIX = "sha256:"
+
+def content_ref(data: bytes) -> str:
+    return f"{REF_PREFIX}{hashlib.sha256(data).hexdigest()}"
+
+def ref_digest(ref: str) -> str:
+    if not ref or not ref.startswith(REF_PREFIX):
+        raise ValidationException(f"Referencia de blob inválida: {ref}")
+
+    digest = ref[len(REF_PREFIX):]
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise ValidationException(f"Referencia de blob inválida: {ref}")
+    return digest
+
+
+class DigestVerifier:
+    """Calcula el sha256 de lo leído por partes y lo compara con la referencia al terminar."""
+
+    def __init__(self, ref: str):
+        self.ref = ref
+        self.expected = ref_digest(ref)
+        self._hash = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        self._hash.update(chunk)
+
+    def verify(self):
+        if self._hash.hexdigest() != self.expected:
+            raise ValidationException(f"El contenido del blob {self.ref} no coincide con su sha256")
+
+def verify_content(ref: str, data: bytes) -> bytes:
+    verifier = DigestVerifier(ref)
+    verifier.update(data)
+    verifier.verify()
+    return data
@@ -0,0 +1,57 @@
+import logging
+from typing import AsyncIterator
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.exceptions import NotFoundException
+from .content_address import DigestVerifier, content_ref, ref_digest, verify_content
+
+logger = logging.getLogger(__name__)
+
+class GridFSBlobStorage(BlobStorage):
+
+    def __init__(self, database: AsyncIOMotorDatabase, bucket_name: str = "blobs"):
+        self.database = database
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        ref = content_ref(data)
+
+        if not await self.exists(ref):
+            await self.bucket.upload_from_stream(
+                ref_digest(ref),
+                data,
+                metadata={"contentType": content_type, "size": len(data)}
+            )
+            logger.info(f"Blob almacenado en GridFS: {ref} ({len(data)} bytes)")
+
+        return ref
+
+    async def get(self, ref: str) -> bytes:
+        try:
+            grid_out = await self.bucket.open_download_stream_by_name(ref_digest(ref))
+            data = await grid_out.read()
+        except NoFile:
+            raise NotFoundException(f"Blob no encontrado: {ref}")
+        return verify_content(ref, data)
+
+    async def stream(self, ref: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        try:
+            grid_out = await self.bucket.open_download_stream_by_name(ref_digest(ref))
+        except NoFile:
+            raise NotFoundException(f"Blob no encontrado: {ref}")
+
+        verifier = DigestVerifier(ref)
+        while True:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            verifier.update(chunk)
+            yield chunk
+        verifier.verify()
+
+    async def exists(self, ref: str) -> bool:
+        files = await self.bucket.find({"filename": ref_digest(ref)}, limit=1).to_list(1)
+        return len(files) > 0
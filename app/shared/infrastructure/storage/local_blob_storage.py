@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+import tempfile
+from typing import AsyncIterator
+
+from shared.domain.repositories.blob_storage import BlobStorage
+from shared.exceptions import NotFoundException
+from .content_address import DigestVerifier, content_ref, ref_digest, verify_content
+
+logger = logging.getLogger(__name__)
+
+class LocalBlobStorage(BlobStorage):
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+    async def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        ref = content_ref(data)
+        path = self._path(ref)
+
+        if not os.path.exists(path):
+            await asyncio.to_thread(self._write, path, data)
+            logger.info(f"Blob almacenado en disco: {ref} ({len(data)} bytes)")
+
+        return ref
+
+    async def get(self, ref: str) -> bytes:
+        path = self._path(ref)
+        try:
+            data = await asyncio.to_thread(self._read, path)
+        except FileNotFoundError:
+            raise NotFoundException(f"Blob no encontrado: {ref}")
+        return verify_content(ref, data)
+
+    async def stream(self, ref: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        path = self._path(ref)
+        if not os.path.exists(path):
+            raise NotFoundException(f"Blob no encontrado: {ref}")
+
+        verifier = DigestVerifier(ref)
+        blob_file = await asyncio.to_thread(open, path, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(blob_file.read, chunk_size)
+                if not chunk:
+                    break
+                verifier.update(chunk)
+                yield chunk
+            verifier.verify()
+        finally:
+            blob_file.close()
+
+    async def exists(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+    def _path(self, ref: str) -> str:
+        digest = ref_digest(ref)
+        return os.path.join(self.base_path, digest[:2], digest[2:4], digest)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as blob_file:
+            return blob_file.read()